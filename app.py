@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
 import os
 import json
@@ -10,6 +10,8 @@ from datetime import datetime
 from json_processor import setup_logging, read_json_files, apply_edit_one
 from excel_handler import save_to_excel
 from config import API_PORT, API_HOST
+from src.job_manager import JobManager, job_blueprint, is_truthy
+from src import http_compression
 
 # Setup logging
 setup_logging()
@@ -18,12 +20,19 @@ logger = logging.getLogger(__name__)
 # Initialize Flask app
 app = Flask(__name__)
 
+# Accept gzip/zstd request bodies and compress responses the client can decode
+http_compression.init_app(app)
+
+# Background jobs for folders too large to process inside a request
+job_manager = JobManager(max_workers=4, history_size=100)
+app.register_blueprint(job_blueprint(job_manager))
+
 # Configure CORS to allow requests from your frontend
 CORS(app, resources={
     r"/*": {
         "origins": ["http://localhost:3001", "http://127.0.0.1:3001"],
         "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type"]
+        "allow_headers": ["Content-Type", "Content-Encoding"]
     }
 })
 
@@ -118,46 +127,27 @@ def process_edit():
                 'message': f'No JSON files found in folder: {folder_path}'
             })
         
-        # Process each JSON file
-        results = []
-        for filename in json_files:
-            try:
-                file_path = os.path.join(folder_path, filename)
-                
-                # Read JSON file
-                with open(file_path, 'r') as f:
-                    file_data = json.load(f)
-                
-                # Process data (add your actual processing logic here)
-                processed_data = {
-                    **file_data,
-                    'processed': True,
-                    'processed_at': datetime.now().isoformat(),
-                    'edit_id': edit_id
-                }
-                
-                # Add to results
-                results.append({
-                    'filename': filename,
-                    'status': 'success',
-                    'data': processed_data
-                })
-                
-            except Exception as e:
-                results.append({
-                    'filename': filename,
-                    'status': 'error',
-                    'error': str(e)
-                })
+        # Large folders can run as a background job instead of inside the request
+        if is_truthy(data.get('async', request.args.get('async'))):
+            job = job_manager.submit(
+                'process-edit',
+                lambda job: process_edit_files(folder_path, edit_id, json_files, job.update_progress)
+            )
+            return jsonify({
+                'status': 'accepted',
+                'job_id': job.id,
+                'status_url': f'/jobs/{job.id}',
+                'result_url': f'/jobs/{job.id}/result'
+            }), 202
         
-        # Return results
-        return jsonify({
-            'status': 'success',
-            'message': f'Processed {len(json_files)} files',
-            'folder_path': folder_path,
-            'edit_id': edit_id,
-            'results': results
-        })
+        # Stream one result per line if the client asked for NDJSON
+        if wants_ndjson():
+            return Response(
+                stream_with_context(stream_edit_files(folder_path, edit_id, json_files)),
+                mimetype='application/x-ndjson'
+            )
+        
+        return jsonify(process_edit_files(folder_path, edit_id, json_files))
         
     except Exception as e:
         print(f"Error processing request: {str(e)}")
@@ -167,6 +157,79 @@ def process_edit():
             'message': f'Server error: {str(e)}'
         }), 500
 
+def iter_edit_files(folder_path, edit_id, json_files, progress=None):
+    """Process the JSON files of a folder with an edit, yielding one result per file"""
+    for index, filename in enumerate(json_files):
+        try:
+            file_path = os.path.join(folder_path, filename)
+            
+            # Read JSON file
+            with open(file_path, 'r') as f:
+                file_data = json.load(f)
+            
+            # Process data (add your actual processing logic here)
+            processed_data = {
+                **file_data,
+                'processed': True,
+                'processed_at': datetime.now().isoformat(),
+                'edit_id': edit_id
+            }
+            
+            result = {
+                'filename': filename,
+                'status': 'success',
+                'data': processed_data
+            }
+            
+        except Exception as e:
+            result = {
+                'filename': filename,
+                'status': 'error',
+                'error': str(e)
+            }
+        
+        if progress:
+            progress(index + 1, len(json_files))
+        
+        yield result
+
+def process_edit_files(folder_path, edit_id, json_files, progress=None):
+    """Process the JSON files of a folder with an edit and build the response"""
+    return {
+        'status': 'success',
+        'message': f'Processed {len(json_files)} files',
+        'folder_path': folder_path,
+        'edit_id': edit_id,
+        'results': list(iter_edit_files(folder_path, edit_id, json_files, progress))
+    }
+
+def stream_edit_files(folder_path, edit_id, json_files):
+    """Stream the results of a folder edit as NDJSON, one file per line and a summary line last"""
+    try:
+        for result in iter_edit_files(folder_path, edit_id, json_files):
+            yield json.dumps(result) + '\n'
+        
+        yield json.dumps({
+            'status': 'success',
+            'message': f'Processed {len(json_files)} files',
+            'folder_path': folder_path,
+            'edit_id': edit_id
+        }) + '\n'
+    except Exception as e:
+        # Headers are already sent; report the failure in-band
+        logger.error(f"Error streaming folder edit: {str(e)}")
+        yield json.dumps({
+            'status': 'error',
+            'message': f'Server error: {str(e)}'
+        }) + '\n'
+
+def wants_ndjson():
+    """Check for ?stream=true or an Accept header preferring NDJSON over JSON"""
+    if is_truthy(request.args.get('stream')):
+        return True
+    accept = request.accept_mimetypes
+    return accept['application/x-ndjson'] > accept['application/json']
+
 # Process Custom Folder endpoint
 @app.route('/process-folder', methods=['POST', 'OPTIONS'])
 def process_folder():
@@ -1,12 +1,21 @@
 import os
-import json
 import glob
+import argparse
 from datetime import datetime
 
+from src.edit_executor import EditExecutor
+from src.output_formats import OutputFormat, FORMAT_NAMES
+
 # Configuration
 JSON_FILES_DIR = r"C:\json_files"
 PROCESSED_DIR = os.path.join(JSON_FILES_DIR, "processed")
 
+# Worker processes applying the edit; None uses every CPU, 0 edits in this process
+EDIT_WORKERS = None
+
+# Layout and compression of the processed files, one of FORMAT_NAMES
+OUTPUT_FORMAT = "pretty"
+
 # Ensure processed directory exists
 os.makedirs(PROCESSED_DIR, exist_ok=True)
 
@@ -43,8 +52,8 @@ def apply_edit_one(json_data):
     
     return transformed_data
 
-def process_json_files():
-    """Process all JSON files in the specified directory"""
+def process_json_files(workers=EDIT_WORKERS, output_format=OUTPUT_FORMAT):
+    """Process all JSON files in the specified directory, one file per worker process"""
     # Find all JSON files
     json_files = glob.glob(os.path.join(JSON_FILES_DIR, "*.json"))
     
@@ -54,33 +63,29 @@ def process_json_files():
     
     processed_files = []
     
-    for file_path in json_files:
-        filename = os.path.basename(file_path)
-        print(f"Processing: {filename}")
-        
-        try:
-            # Read the JSON file
-            with open(file_path, 'r') as f:
-                data = json.load(f)
+    # Workers read, transform and write their files; only paths and small results cross processes
+    with EditExecutor(max_workers=workers) as executor:
+        for result in executor.map_files(json_files, apply_edit_one, output_dir=PROCESSED_DIR,
+                                         output_format=OutputFormat.parse(output_format)):
+            print(f"Processing: {result['filename']}")
             
-            # Apply the transformation
-            processed_data = apply_edit_one(data)
-            
-            # Save to processed directory
-            processed_path = os.path.join(PROCESSED_DIR, f"processed_{filename}")
-            with open(processed_path, 'w') as f:
-                json.dump(processed_data, f, indent=2)
-            
-            processed_files.append(processed_path)
-            print(f"  ✓ Saved processed file: {processed_path}")
-            
-        except Exception as e:
-            print(f"  ✗ Error processing {filename}: {str(e)}")
+            if result['status'] == 'success':
+                processed_files.append(result['output_path'])
+                print(f"  ✓ Saved processed file: {result['output_path']}")
+            else:
+                print(f"  ✗ Error processing {result['filename']}: {result['error']}")
     
     return processed_files
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply the 'Edit 1' transformation to a directory of JSON files")
+    parser.add_argument('--workers', type=int, default=EDIT_WORKERS,
+                        help='Worker processes (default: one per CPU, 0 to edit in this process)')
+    parser.add_argument('--output-format', choices=FORMAT_NAMES, default=OUTPUT_FORMAT,
+                        help=f'Layout and compression of the processed files (default: {OUTPUT_FORMAT})')
+    args = parser.parse_args()
+    
     print(f"Applying 'Edit 1' transformation to JSON files in {JSON_FILES_DIR}")
-    processed = process_json_files()
+    processed = process_json_files(args.workers, args.output_format)
     print(f"\nSuccessfully processed {len(processed)} JSON files")
     print(f"Processed files saved to: {PROCESSED_DIR}") 
\ No newline at end of file
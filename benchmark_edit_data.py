@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark for ApiService.edit_data.
+
+Compares the copy-on-write edit overlay against the previous copy.deepcopy
+approach on the large datasets produced by generate_large_json, measuring
+wall time and peak traced memory for each.
+"""
+
+import os
+import sys
+import copy
+import time
+import argparse
+import tracemalloc
+
+# Make the src modules importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from json_edit import apply_edit_in_place, apply_edit_overlay
+from generate_large_json import (
+    generate_customer_data,
+    generate_product_catalog,
+    generate_transaction_data,
+    generate_sensor_data,
+    generate_log_data
+)
+
+GENERATORS = {
+    "customer": generate_customer_data,
+    "product": generate_product_catalog,
+    "transaction": generate_transaction_data,
+    "sensor": generate_sensor_data,
+    "log": generate_log_data
+}
+
+def deepcopy_edit(data):
+    """The previous edit_data implementation: deep copy, then edit"""
+    return apply_edit_in_place(copy.deepcopy(data))
+
+def measure(edit_function, data, repeat):
+    """Return the best wall time and the peak traced memory of edit_function(data)"""
+    best_time = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        edit_function(data)
+        elapsed = time.perf_counter() - start
+        best_time = elapsed if best_time is None else min(best_time, elapsed)
+
+    # Measure memory in a separate run so tracing does not skew the timings
+    tracemalloc.start()
+    result = edit_function(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    return best_time, peak
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description='Benchmark edit_data: deepcopy vs copy-on-write overlay')
+    parser.add_argument('--records', type=int, nargs='+', default=[50000, 250000],
+                        help='Record counts to benchmark (default: 50000 250000)')
+    parser.add_argument('--datasets', nargs='+', choices=sorted(GENERATORS), default=['customer', 'log'],
+                        help='Datasets from generate_large_json to use (default: customer log)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions per case (default: 3)')
+    args = parser.parse_args()
+
+    rows = []
+    for dataset in args.datasets:
+        for num_records in args.records:
+            data = GENERATORS[dataset](num_records)
+            data["properties"] = {"source": dataset}
+
+            deepcopy_time, deepcopy_peak = measure(deepcopy_edit, data, args.repeat)
+            overlay_time, overlay_peak = measure(apply_edit_overlay, data, args.repeat)
+
+            rows.append((dataset, num_records, deepcopy_time, deepcopy_peak, overlay_time, overlay_peak))
+
+    print()
+    print(f"{'dataset':<12}{'records':>10}{'deepcopy s':>14}{'deepcopy MB':>14}{'overlay s':>14}{'overlay MB':>14}{'speedup':>10}")
+    for dataset, num_records, deepcopy_time, deepcopy_peak, overlay_time, overlay_peak in rows:
+        speedup = deepcopy_time / overlay_time if overlay_time else float('inf')
+        print(
+            f"{dataset:<12}{num_records:>10}"
+            f"{deepcopy_time:>14.4f}{deepcopy_peak / (1024 * 1024):>14.2f}"
+            f"{overlay_time:>14.6f}{overlay_peak / (1024 * 1024):>14.4f}"
+            f"{speedup:>9.0f}x"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the json_codec module.
+
+Compares encoding (compact and indented) and decoding with the standard
+library against the json_codec backend on the large datasets produced by
+generate_large_json. Without a faster backend installed, json_codec uses the
+standard library and both columns measure the same thing.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+# Make the src modules importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+import json_codec
+from generate_large_json import (
+    generate_customer_data,
+    generate_product_catalog,
+    generate_transaction_data,
+    generate_sensor_data,
+    generate_log_data
+)
+
+GENERATORS = {
+    "customer": generate_customer_data,
+    "product": generate_product_catalog,
+    "transaction": generate_transaction_data,
+    "sensor": generate_sensor_data,
+    "log": generate_log_data
+}
+
+def best_time(function, repeat):
+    """Return the best wall time of function() over repeat runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def measure(data, repeat):
+    """Time each operation with the standard library and with json_codec"""
+    text = json.dumps(data)
+    encoded = json_codec.dumps_bytes(data)
+
+    return {
+        "encode": (best_time(lambda: json.dumps(data), repeat),
+                   best_time(lambda: json_codec.dumps_bytes(data), repeat)),
+        "encode indent": (best_time(lambda: json.dumps(data, indent=2), repeat),
+                          best_time(lambda: json_codec.dumps_bytes(data, pretty=True), repeat)),
+        "decode": (best_time(lambda: json.loads(text), repeat),
+                   best_time(lambda: json_codec.loads(encoded), repeat)),
+    }, len(encoded)
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=f'Benchmark JSON encode/decode: json vs json_codec ({json_codec.BACKEND})')
+    parser.add_argument('--records', type=int, nargs='+', default=[50000, 250000],
+                        help='Record counts to benchmark (default: 50000 250000)')
+    parser.add_argument('--datasets', nargs='+', choices=sorted(GENERATORS), default=['customer', 'log'],
+                        help='Datasets from generate_large_json to use (default: customer log)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions per case (default: 3)')
+    args = parser.parse_args()
+
+    rows = []
+    for dataset in args.datasets:
+        for num_records in args.records:
+            data = GENERATORS[dataset](num_records)
+            timings, size = measure(data, args.repeat)
+            rows.append((dataset, num_records, size, timings))
+
+    print()
+    print(f"json_codec backend: {json_codec.BACKEND}")
+    print(f"{'dataset':<12}{'records':>10}{'MB':>8}{'operation':>16}{'json s':>10}{'codec s':>10}{'codec MB/s':>12}{'speedup':>10}")
+    for dataset, num_records, size, timings in rows:
+        megabytes = size / (1024 * 1024)
+        for operation, (stdlib_time, codec_time) in timings.items():
+            speedup = stdlib_time / codec_time if codec_time else float('inf')
+            print(
+                f"{dataset:<12}{num_records:>10}{megabytes:>8.1f}{operation:>16}"
+                f"{stdlib_time:>10.3f}{codec_time:>10.3f}{megabytes / codec_time:>12.1f}"
+                f"{speedup:>9.1f}x"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 import os
-import json
 import logging
 import sqlite3
 import pandas as pd
@@ -9,6 +8,8 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import traceback
 
+from src import json_codec
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -179,7 +180,7 @@ class DatabaseStorage:
             bool: Success status
         """
         # Skip for very large JSON objects
-        json_str = json.dumps(json_data)
+        json_str = json_codec.dumps(json_data)
         if len(json_str) > 10000000:  # 10MB limit
             logger.warning(f"JSON data for {filename} is too large for database storage (> 10MB)")
             return False
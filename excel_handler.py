@@ -1,7 +1,7 @@
 import pandas as pd
-import json
 import logging
 from config import EXCEL_OUTPUT
+from src import json_codec
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +30,7 @@ def save_to_excel(responses):
                 # Flatten first level of response data
                 for key, value in response_data.items():
                     if isinstance(value, (dict, list)):
-                        row[key] = json.dumps(value)  # Serialize complex objects
+                        row[key] = json_codec.dumps(value)  # Serialize complex objects
                     else:
                         row[key] = value
             
@@ -0,0 +1,273 @@
+import re
+import json
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Union
+
+# Characters read from the file per buffer refill
+BUFFER_SIZE = 1024 * 1024
+
+# Bytes read from the start of a file to guess its layout
+PREFIX_SCAN_BYTES = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+_decoder = json.JSONDecoder()
+
+class JsonArrayLayout:
+    """Shape of a document whose records can be streamed"""
+
+    def __init__(self, kind, template, key_order, item_count):
+        # 'object' for {"...": ..., "data": [...]} documents, 'list' for a root list
+        self.kind = kind
+        # Top-level fields other than the streamed array, in document order; fields
+        # after the array are added once iter_json_array_chunks has read it
+        self.template = template
+        self.key_order = key_order
+        # Number of items, known once iter_json_array_chunks has read the array
+        self.item_count = item_count
+
+class _Tokenizer:
+    """Minimal pull parser over a text file, decoding one JSON value at a time"""
+
+    def __init__(self, f, buffer_size=None):
+        self.f = f
+        self.buffer_size = buffer_size or BUFFER_SIZE
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        # Length in the source text of the last decoded value
+        self.last_size = 0
+
+    def _fill(self, min_size=0):
+        """Drop the consumed part of the buffer and read more of the file"""
+        chunk = self.f.read(max(self.buffer_size, min_size))
+        if not chunk:
+            self.eof = True
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it, '' at end of file"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos] if self.pos < len(self.buf) else ''
+            self._fill()
+
+    def expect(self, char):
+        """Consume the next non-whitespace character, which must be char"""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}, found {found!r}")
+        self.pos += 1
+
+    def expect_end(self):
+        """Check that only whitespace follows the root value, like json.loads does"""
+        if self.peek() != '':
+            raise json.JSONDecodeError("Extra data", self.buf, self.pos)
+
+    def value(self):
+        """Decode the next JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # A number running into the end of the buffer may continue in the file
+                if end < len(self.buf) or self.eof:
+                    self.last_size = end - self.pos
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # The value spans the buffer end; read at least as much again as is buffered
+            self._fill(min_size=len(self.buf) - self.pos)
+
+    def enter_array(self, key):
+        """
+        Position the tokenizer on the first item of the streamed array.
+
+        Returns the template fields and key order for an object document, or
+        (None, None) for a root list. Raises ValueError for other documents.
+        """
+        root = self.peek()
+        if root == '[':
+            self.pos += 1
+            return None, None
+        if root != '{':
+            raise ValueError("Document is neither an object nor a list")
+
+        self.pos += 1
+        template = {}
+        key_order = []
+        while self.peek() != '}':
+            name = self.value()
+            self.expect(':')
+            key_order.append(name)
+            if name == key and self.peek() == '[':
+                self.pos += 1
+                return template, key_order
+            template[name] = self.value()
+            if self.peek() == ',':
+                self.pos += 1
+        raise ValueError(f"Document has no {key!r} array")
+
+    def items(self):
+        """Yield the items of the array the tokenizer is positioned in"""
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if not self.more_items():
+                return
+
+    def more_items(self):
+        """Consume the separator after an array item; returns False at the end of the array"""
+        separator = self.peek()
+        self.pos += 1
+        if separator == ']':
+            return False
+        if separator != ',':
+            raise ValueError(f"Expected ',' or ']' in array, found {separator!r}")
+        return True
+
+    def rest_of_object(self, template, key_order):
+        """Decode the fields following the streamed array into the template"""
+        while self.peek() == ',':
+            self.pos += 1
+            name = self.value()
+            self.expect(':')
+            key_order.append(name)
+            template[name] = self.value()
+        self.expect('}')
+
+def sniff_json_array(file_path: str, key: str = 'data') -> Optional[str]:
+    """
+    Guess from the first PREFIX_SCAN_BYTES of a file whether its records can be streamed.
+
+    This is a cheap hint and never parses the document: an object is reported
+    if the key followed by an array appears in the prefix, at any depth.
+    scan_json_array gives the definite answer.
+
+    Args:
+        file_path: Path of the JSON file.
+        key: Name of the top-level array in object documents.
+
+    Returns:
+        'list' for a root list, 'object' for an object that seems to hold the
+        array, or None.
+    """
+    with open(file_path, 'rb') as f:
+        prefix = f.read(PREFIX_SCAN_BYTES)
+
+    prefix = prefix.lstrip(b' \t\n\r\xef\xbb\xbf')
+    if prefix.startswith(b'['):
+        return 'list'
+    if prefix.startswith(b'{') and re.search(rb'"' + re.escape(key.encode('utf-8')) + rb'"\s*:\s*\[', prefix):
+        return 'object'
+    return None
+
+def scan_json_array(file_path: str, key: str = 'data') -> Optional[JsonArrayLayout]:
+    """
+    Describe a document whose records can be streamed, from the part before its records.
+
+    Only the start of the document is parsed, up to the opening bracket of
+    the array, so the records are decoded once, by iter_json_array_chunks.
+    Passing the layout to iter_json_array_chunks completes it with the item
+    count and the fields after the array.
+
+    Args:
+        file_path: Path of the JSON file.
+        key: Name of the top-level array in object documents.
+
+    Returns:
+        The layout, or None if the document is neither a list nor an object
+        with a top-level array under key.
+    """
+    # utf-8-sig drops a byte order mark, which sniff_json_array accepts too
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        tokenizer = _Tokenizer(f)
+        try:
+            template, key_order = tokenizer.enter_array(key)
+        except ValueError:
+            return None
+
+    if template is None:
+        return JsonArrayLayout('list', None, None, None)
+    return JsonArrayLayout('object', template, key_order, None)
+
+def iter_json_array_chunks(file_path: str,
+                           chunk_size: Optional[int] = None,
+                           max_bytes: Union[int, Callable[[], int], None] = None,
+                           key: str = 'data',
+                           layout: Optional[JsonArrayLayout] = None) -> Iterator[Tuple[List[Any], int]]:
+    """
+    Yield the records of a document in chunks.
+
+    A chunk ends once it holds chunk_size items or its items take up max_bytes
+    of source text, whichever comes first; every chunk holds at least one item.
+    Only the current chunk is held in memory. Use scan_json_array first to
+    check the document can be streamed and to get its template fields.
+
+    Fields after the array are only known once the array has been read, so
+    they are added to the layout's template before the last chunk is
+    yielded: chunks built from the template before then hold the fields
+    that precede the array. The rest of the document is checked before the
+    last chunk too, so text after the root value fails like it does for
+    json.load.
+
+    Args:
+        file_path: Path of the JSON file.
+        chunk_size: Maximum number of items per chunk.
+        max_bytes: Byte budget per chunk, or a function returning it. The
+            function is called at the start of each chunk, so the budget can
+            change while the file is read.
+        key: Name of the top-level array in object documents.
+        layout: Layout from scan_json_array, completed with the item count and
+            the fields after the array.
+
+    Yields:
+        Tuples of the items of a chunk, in document order, and their size in
+        the source text.
+    """
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        tokenizer = _Tokenizer(f)
+        template, key_order = tokenizer.enter_array(key)
+        if layout is not None:
+            template, key_order = layout.template, layout.key_order
+
+        more = tokenizer.peek() != ']'
+        if not more:
+            tokenizer.pos += 1
+            _finish_document(tokenizer, layout, template, key_order, 0)
+
+        chunk = []
+        chunk_bytes = 0
+        budget = None
+        item_count = 0
+        while more:
+            if not chunk and max_bytes is not None:
+                budget = max_bytes() if callable(max_bytes) else max_bytes
+
+            chunk.append(tokenizer.value())
+            chunk_bytes += tokenizer.last_size
+            item_count += 1
+
+            more = tokenizer.more_items()
+            if not more:
+                _finish_document(tokenizer, layout, template, key_order, item_count)
+
+            if not more or (chunk_size is not None and len(chunk) >= chunk_size) or \
+                    (budget is not None and chunk_bytes >= budget):
+                yield chunk, chunk_bytes
+                chunk = []
+                chunk_bytes = 0
+
+def _finish_document(tokenizer: _Tokenizer, layout: Optional[JsonArrayLayout], template: Optional[dict],
+                     key_order: Optional[list], item_count: int):
+    """Read the document after the array, completing the layout with what is only known then"""
+    if layout is not None:
+        layout.item_count = item_count
+    if template is not None:
+        tokenizer.rest_of_object(template, key_order)
+    tokenizer.expect_end()
@@ -1,5 +1,4 @@
 import os
-import json
 import logging
 import time
 import asyncio
@@ -7,26 +6,55 @@ import aiohttp
 import pandas as pd
 import glob
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from functools import partial
 import traceback
 import math
-from tenacity import retry, stop_after_attempt, wait_exponential
+import multiprocessing
 import sys
 
 # Add parent directory to system path (if needed)
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from json_stream import sniff_json_array, scan_json_array, iter_json_array_chunks
+from run_manifest import RunManifest
+from run_metrics import RunMetrics, UnitMetrics, PERCENTILES
+from src.http_compression import SUPPORTED_ENCODINGS, compress, decompress, parse_encoding
+from src.retry_policy import RetryPolicy, ApiStatusError, retry_after_for
+from src import json_codec
+from src.output_formats import OutputFormat, read_document, ndjson_document_line
+
 # Configuration
 JSON_FILES_DIR = r"C:\Cursor_Projects\pytest_project_02 -_UI Framework\Edit1_jsons"
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "output")
 LOG_DIR = os.path.join(os.path.dirname(__file__), "logs")
 MAX_CONCURRENT_REQUESTS = 5  # Adjust based on system capabilities
+FILE_WORKERS = MAX_CONCURRENT_REQUESTS  # Files processed at a time; each holds at most one loaded document
+CONNECTION_LIMIT = 20  # Total pooled connections per processor run
+CONNECTION_LIMIT_PER_HOST = MAX_CONCURRENT_REQUESTS  # Pooled connections per API host
+DNS_CACHE_TTL = 300  # Seconds a resolved API host is cached
 API_ENDPOINT = "http://localhost:5000/process"  # Update with actual endpoint
 TIMEOUT_SECONDS = 120  # Timeout for API requests
-CHUNK_SIZE = 50000  # Number of records to process in chunks for large files
-MAX_RETRIES = 3  # Maximum number of retries for failed requests
-RETRY_DELAY = 2  # Base delay between retries (seconds)
+CHUNK_TARGET_BYTES = 8 * 1024 * 1024  # Initial payload size of a chunk
+CHUNK_MIN_BYTES = 256 * 1024  # Smallest chunk payload the budget shrinks to
+CHUNK_MAX_BYTES = 64 * 1024 * 1024  # Largest chunk payload the budget grows to
+CHUNK_TARGET_SECONDS = 10  # API latency per chunk the budget aims for, well under TIMEOUT_SECONDS
+WRITE_CHUNK_FILES = True  # Keep a response file per chunk; if False, responses go straight into the merged file
+OUTPUT_FORMAT = "pretty"  # Response files: "pretty", "compact" or "ndjson", optionally with "+gzip" or "+zstd"
+STREAM_MIN_BYTES = 16 * 1024 * 1024  # Files at least this large are streamed instead of loaded whole
+LARGE_DOCUMENT_BYTES = 1024 * 1024  # Files of other shapes at least this large are sent as a single chunk
+IO_WORKERS = 4  # Threads doing file I/O and JSON encoding/decoding off the event loop
+DECODE_PROCESSES = 0  # Processes decoding large files; 0 decodes them on the I/O threads
+PROCESS_DECODE_MIN_BYTES = 4 * 1024 * 1024  # Files at least this large are decoded in the process pool, if enabled
+REQUEST_ENCODING = None  # Content-Encoding of request bodies, if the API accepts it: "gzip", "zstd" (needs zstandard) or None
+COMPRESS_MIN_BYTES = 1024  # Request bodies smaller than this are sent uncompressed
+RESUME_RUNS = True  # Checkpoint runs in a manifest so a restarted run skips completed files and chunks
+MANIFEST_FILENAME = "run_manifest.json"  # Manifest file in OUTPUT_DIR
+MAX_RETRIES = 3  # Maximum number of attempts per request
+RETRY_DELAY = 2  # Base delay between retries (seconds), jittered and doubled per retry
+RETRY_BUDGET_RATIO = 0.2  # Retries allowed per request across the whole run
+BREAKER_FAILURE_THRESHOLD = 5  # Consecutive failures that pause all requests
+BREAKER_RESET_SECONDS = 30  # Pause before a single probe request tests the API again
 
 # Ensure directories exist
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -44,37 +72,395 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def _load_json_file(file_path):
+    """
+    Read and decode a JSON file; module level so it can run in a worker process.
+    
+    Returns the decoded data with the seconds spent reading and decoding it.
+    """
+    start = time.perf_counter()
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    read_seconds = time.perf_counter() - start
+    data = json_codec.loads(raw)
+    return data, read_seconds, time.perf_counter() - start - read_seconds
+
+def _count_records(data):
+    """Return the number of records of a document: its item list, or the document itself"""
+    if isinstance(data, dict) and isinstance(data.get('data'), list):
+        return len(data['data'])
+    if isinstance(data, list):
+        return len(data)
+    return 1
+
+def _uncovered_ranges(start, end, covered):
+    """Return the parts of the item range [start, end) outside the sorted, disjoint covered ranges"""
+    ranges = []
+    for covered_start, covered_end in covered:
+        if covered_end <= start or covered_start >= end:
+            continue
+        if covered_start > start:
+            ranges.append((start, covered_start))
+        start = max(start, covered_end)
+    if start < end:
+        ranges.append((start, end))
+    return ranges
+
+class ChunkBudget:
+    """Byte budget for chunk payloads, adapted to the API's observed latency and errors"""
+    
+    def __init__(self, target_bytes=CHUNK_TARGET_BYTES, min_bytes=CHUNK_MIN_BYTES,
+                 max_bytes=CHUNK_MAX_BYTES, target_seconds=CHUNK_TARGET_SECONDS):
+        self.bytes = target_bytes
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.target_seconds = target_seconds
+    
+    def record_success(self, chunk_bytes, elapsed):
+        """Move the budget towards the size the API handles in the target time"""
+        if not chunk_bytes or elapsed <= 0:
+            return
+        
+        # Size the API would have processed in the target time at the observed throughput
+        ideal = chunk_bytes * self.target_seconds / elapsed
+        
+        # Go halfway there, at most doubling per step
+        budget = min(self.bytes * 2, (self.bytes + ideal) / 2)
+        self.bytes = int(min(self.max_bytes, max(self.min_bytes, budget)))
+    
+    def record_failure(self):
+        """Halve the budget after a failed or timed out chunk"""
+        self.bytes = max(self.min_bytes, self.bytes // 2)
+        logger.info(f"Chunk failed, reducing chunk budget to {self.bytes} bytes")
+
+class MergedResponseWriter:
+    """
+    Writes the merged response of a chunked file incrementally, one chunk response at a time.
+    
+    Chunk responses must be added in chunk order. The output matches what
+    writing the fully merged document in the output format produces (for the
+    default "pretty" format, json_codec.dumps_bytes(..., pretty=True)), but only the current
+    chunk response is held in memory. The file is written under a temporary
+    name and only appears once close() finishes it.
+    """
+    
+    def __init__(self, filename, output_path, output_format=None):
+        self.filename = filename
+        self.output_path = output_path
+        self.tmp_path = f"{output_path}.tmp"
+        self.output_format = output_format or OutputFormat()
+        self.chunk_count = 0
+        self.item_count = 0
+        self._file = None
+        self._template = None
+    
+    def add(self, response_data):
+        """Append the items of the next chunk response"""
+        template, items = self._split_response(response_data)
+        
+        if self._file is None:
+            # The first chunk decides the layout: an object with its fields, or a plain list
+            self._template = template
+            self._file = self.output_format.open(self.tmp_path)
+            self._file.write(self._document_start())
+        
+        for item in items:
+            self._file.write(self._item(item))
+            self.item_count += 1
+        
+        self.chunk_count += 1
+    
+    def close(self):
+        """Finish the merged file; returns its path, or None if there were no items to merge"""
+        if self._file is None or self.item_count == 0:
+            self.abort()
+            return None
+        
+        self._file.write(self._document_end())
+        self._file.close()
+        os.replace(self.tmp_path, self.output_path)
+        return self.output_path
+    
+    def _document_start(self):
+        """Encode what precedes the first item; NDJSON writes the fields after the items"""
+        fmt = self.output_format.format
+        if fmt == 'ndjson':
+            return b''
+        if not self._template:
+            return b'['
+        if fmt == 'pretty':
+            fields = b''.join(b'\n  ' + json_codec.dumps_bytes(key) + b': ' + self._indent(value, 1) + b','
+                              for key, value in self._template.items())
+            return b'{' + fields + b'\n  "data": ['
+        fields = b''.join(json_codec.dumps_bytes(key) + b':' + json_codec.dumps_bytes(value) + b','
+                          for key, value in self._template.items())
+        return b'{' + fields + b'"data":['
+    
+    def _item(self, item):
+        """Encode the next item with its separator"""
+        fmt = self.output_format.format
+        if fmt == 'ndjson':
+            return json_codec.dumps_bytes(item) + b'\n'
+        separator = b',' if self.item_count else b''
+        if fmt == 'pretty':
+            level = 2 if self._template else 1
+            return separator + b'\n' + b'  ' * level + self._indent(item, level)
+        return separator + json_codec.dumps_bytes(item)
+    
+    def _document_end(self):
+        """Encode what follows the last item"""
+        fmt = self.output_format.format
+        if not self._template:
+            return {'ndjson': b'', 'pretty': b'\n]'}.get(fmt, b']')
+        
+        merged_info = {
+            'original_file': self.filename,
+            'chunk_count': self.chunk_count,
+            'total_items': self.item_count
+        }
+        if fmt == 'ndjson':
+            return ndjson_document_line({**self._template, 'data': [], 'merged_info': merged_info}, ['data'])
+        if fmt == 'pretty':
+            return b'\n  ],\n  "merged_info": ' + self._indent(merged_info, 1) + b'\n}'
+        return b'],"merged_info":' + json_codec.dumps_bytes(merged_info) + b'}'
+    
+    def abort(self):
+        """Discard the partially written file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+    
+    @staticmethod
+    def _split_response(response_data):
+        """Split a chunk response into its template fields and its items"""
+        if isinstance(response_data, dict) and 'processed_data' in response_data:
+            # Extract from API response structure
+            proc_data = response_data['processed_data']
+            template = {k: v for k, v in proc_data.items() if k != 'data' and k != 'chunk_info'}
+            items = proc_data['data'] if isinstance(proc_data.get('data'), list) else []
+            return template, items
+        if isinstance(response_data, list):
+            # If response is a list, simply extend
+            return {}, response_data
+        return {}, []
+    
+    @staticmethod
+    def _indent(value, level):
+        """Encode a value with indent=2 as it appears nested at the given level"""
+        return json_codec.dumps_bytes(value, pretty=True).replace(b'\n', b'\n' + b'  ' * level)
+
+class _MergeTurns:
+    """Lets concurrently processed chunks append to a MergedResponseWriter in chunk order"""
+    
+    def __init__(self, writer):
+        self.writer = writer
+        self.next_index = 1
+        self.failed = False
+        self._turn = asyncio.Condition()
+    
+    def passed(self, chunk_index):
+        """Return True once the chunk has taken its turn"""
+        return self.next_index > chunk_index
+    
+    async def write(self, chunk_index, response_data, run_blocking):
+        """Wait for the chunk's turn and append its response, writing through run_blocking"""
+        async with self._turn:
+            await self._turn.wait_for(lambda: self.next_index == chunk_index)
+            try:
+                # After a failed chunk the merged file is discarded, so nothing more is written
+                if not self.failed:
+                    await run_blocking(self.writer.add, response_data)
+            except Exception:
+                self.failed = True
+                raise
+            finally:
+                self.next_index += 1
+                self._turn.notify_all()
+    
+    async def skip(self, chunk_index):
+        """Wait for the chunk's turn and pass it on without writing"""
+        async with self._turn:
+            await self._turn.wait_for(lambda: self.next_index == chunk_index)
+            self.failed = True
+            self.next_index += 1
+            self._turn.notify_all()
+
 class JSONProcessor:
-    def __init__(self):
+    def __init__(self, connection_limit=CONNECTION_LIMIT, connection_limit_per_host=CONNECTION_LIMIT_PER_HOST,
+                 dns_cache_ttl=DNS_CACHE_TTL, write_chunk_files=WRITE_CHUNK_FILES,
+                 io_workers=IO_WORKERS, decode_processes=DECODE_PROCESSES, resume=RESUME_RUNS,
+                 manifest_path=None, request_encoding=REQUEST_ENCODING, retry_policy=None,
+                 output_format=OUTPUT_FORMAT, file_workers=FILE_WORKERS):
         self.results = []
         self.start_time = None
         self.end_time = None
         self.json_files_dir = JSON_FILES_DIR  # Allow this to be overridden
+        
+        # One pooled HTTP session per run, created on the first request
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self._session = None
+        self.connection_stats = {'requests': 0, 'connections_created': 0, 'connections_reused': 0}
+        
+        # Request bodies are compressed if asked for; responses are compressed if the API supports it
+        if request_encoding is not None and request_encoding not in SUPPORTED_ENCODINGS:
+            logger.warning(f"{request_encoding} is not available, compressing requests with gzip")
+            request_encoding = "gzip"
+        self.request_encoding = request_encoding
+        self.transfer_stats = {'request_bytes': 0, 'request_bytes_sent': 0,
+                               'response_bytes': 0, 'response_bytes_received': 0}
+        
+        # Retries, their budget and the circuit breaker are shared by all requests of the run
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_attempts=MAX_RETRIES,
+            base_delay=RETRY_DELAY,
+            budget_ratio=RETRY_BUDGET_RATIO,
+            failure_threshold=BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=BREAKER_RESET_SECONDS
+        )
+        
+        # Chunk payload size, shared by all files of the run
+        self.chunk_budget = ChunkBudget()
+        self.write_chunk_files = write_chunk_files
+        
+        # Layout and compression of the response files; any format is read back
+        self.output_format = OutputFormat.parse(output_format) if isinstance(output_format, str) else output_format
+        
+        # Blocking file and JSON work runs in executors, created on first use, so the
+        # event loop keeps every request slot busy while files are read and parsed
+        self.io_workers = io_workers
+        self.decode_processes = decode_processes
+        self._io_executor = None
+        self._decode_executor = None
+        
+        # Files are taken from a bounded queue by this many consumers, so only
+        # their documents (and one chunk per request slot) are in memory
+        self.file_workers = max(1, file_workers)
+        
+        # Checkpoints of the run, loaded by process_json_files
+        self.resume = resume
+        self.manifest_path = manifest_path
+        self.manifest = None
+        
+        # Per-file and per-chunk timings of the latest run
+        self.metrics = RunMetrics()
+        self.metrics_path = None
+
+    async def _get_session(self):
+        """Return the pooled session of this run, creating it on first use"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.connection_limit_per_host,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl
+            )
+            
+            # Count requests and whether each one opened or reused a connection
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_request_start.append(self._on_request_start)
+            trace_config.on_connection_create_end.append(self._on_connection_create)
+            trace_config.on_connection_reuseconn.append(self._on_connection_reuse)
+            
+            # Responses are decompressed in the executor rather than by aiohttp on the event loop
+            self._session = aiohttp.ClientSession(connector=connector, trace_configs=[trace_config],
+                                                  auto_decompress=False)
+            logger.info(f"Opened HTTP session (limit={self.connection_limit}, "
+                        f"limit_per_host={self.connection_limit_per_host}, dns_cache_ttl={self.dns_cache_ttl}s)")
+        return self._session
+
+    async def _on_request_start(self, session, context, params):
+        self.connection_stats['requests'] += 1
+
+    async def _on_connection_create(self, session, context, params):
+        self.connection_stats['connections_created'] += 1
+
+    async def _on_connection_reuse(self, session, context, params):
+        self.connection_stats['connections_reused'] += 1
+
+    async def close(self):
+        """Close the pooled session and executors and log the connection reuse statistics"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            stats = self.connection_stats
+            logger.info(f"Closed HTTP session: {stats['requests']} requests, "
+                        f"{stats['connections_created']} connections opened, "
+                        f"{stats['connections_reused']} reused")
+            transfer = self.transfer_stats
+            logger.info(f"Transferred {transfer['request_bytes_sent']} request bytes for {transfer['request_bytes']} "
+                        f"bytes of JSON and {transfer['response_bytes_received']} response bytes for "
+                        f"{transfer['response_bytes']} bytes of JSON")
+        self._session = None
+        
+        # Every task using the executors has finished by now
+        for executor in (self._io_executor, self._decode_executor):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self._io_executor = None
+        self._decode_executor = None
+
+    async def _run_blocking(self, fn, *args):
+        """Run a blocking call on the I/O thread pool"""
+        if self._io_executor is None:
+            self._io_executor = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="json-io")
+        return await asyncio.get_running_loop().run_in_executor(self._io_executor, partial(fn, *args))
+
+    async def _run_decode(self, fn, file_path, file_size):
+        """
+        Run a CPU-heavy decoding call for a file.
+        
+        Large files go to the process pool when one is configured, so parsing
+        them does not hold the GIL the event loop needs; everything else runs
+        on the I/O thread pool. fn must be a module-level function.
+        """
+        if self.decode_processes > 0 and file_size >= PROCESS_DECODE_MIN_BYTES:
+            if self._decode_executor is None:
+                # Spawned workers avoid forking a process that runs the event loop and I/O threads
+                self._decode_executor = ProcessPoolExecutor(
+                    max_workers=self.decode_processes,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return await asyncio.get_running_loop().run_in_executor(self._decode_executor, fn, file_path)
+        return await self._run_blocking(fn, file_path)
 
     async def process_json_files(self):
         """Process all JSON files in the specified directory asynchronously"""
         self.start_time = time.time()
+        self.metrics = RunMetrics()
         logger.info(f"Starting JSON processing from directory: {self.json_files_dir}")
         
         # Get list of JSON files
-        json_files = glob.glob(os.path.join(self.json_files_dir, "*.json"))
+        json_files = await self._run_blocking(glob.glob, os.path.join(self.json_files_dir, "*.json"))
         if not json_files:
             logger.warning(f"No JSON files found in {self.json_files_dir}")
+            await self.close()
             return []
         
         logger.info(f"Found {len(json_files)} JSON files to process")
         
+        if self.resume:
+            manifest_path = self.manifest_path or os.path.join(OUTPUT_DIR, MANIFEST_FILENAME)
+            self.manifest = await self._run_blocking(RunManifest, manifest_path)
+        
         # Create a semaphore to limit concurrent requests
         semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
         
-        # Process files concurrently with semaphore
-        tasks = [
-            self.process_file(file_path, semaphore)
-            for file_path in json_files
-        ]
+        # Results are filled in as files complete, in the order of json_files
+        self.results = [None] * len(json_files)
         
-        # Wait for all tasks to complete
-        self.results = await asyncio.gather(*tasks)
+        try:
+            await self._process_queued_files(json_files, semaphore)
+        finally:
+            if self.manifest is not None:
+                # Checkpoints were journaled during the run; fold them into the manifest once
+                try:
+                    await self._run_blocking(self.manifest.compact)
+                except OSError as e:
+                    logger.warning(f"Could not compact the run manifest, its journal is kept: {str(e)}")
+            await self.close()
         
         self.end_time = time.time()
         elapsed_time = self.end_time - self.start_time
@@ -82,31 +468,140 @@ class JSONProcessor:
         # Filter out None results (failed processing)
         self.results = [r for r in self.results if r is not None]
         
-        logger.info(f"Completed processing {len(self.results)} files in {elapsed_time:.2f} seconds")
+        stats = self.connection_stats
+        logger.info(f"Completed processing {len(self.results)} files in {elapsed_time:.2f} seconds "
+                    f"({stats['requests']} requests, {stats['connections_created']} connections opened, "
+                    f"{stats['connections_reused']} reused)")
+        logger.info(f"Retries: {self.retry_policy.summary()}")
+        
+        summary = self.metrics.summary(elapsed_time)
+        latency = summary['latency_s']['request']
+        if latency['count']:
+            logger.info(f"Throughput: {summary['records_per_s']:.1f} records/s, {summary['mb_in_per_s']:.2f} MB/s in, "
+                        f"{summary['mb_out_per_s']:.2f} MB/s out; request latency p50 {latency['p50']:.3f}s, "
+                        f"p95 {latency['p95']:.3f}s, p99 {latency['p99']:.3f}s")
         return self.results
 
+    async def _process_queued_files(self, json_files, semaphore):
+        """
+        Process files through a bounded queue with a fixed number of consumers.
+        
+        A file is only read by the consumer that takes it, so at most
+        file_workers files are loaded at a time however many files there are.
+        Each result is stored in self.results as soon as its file completes.
+        """
+        workers = min(self.file_workers, len(json_files))
+        queue = asyncio.Queue(maxsize=workers)
+        
+        async def produce():
+            for item in enumerate(json_files):
+                await queue.put(item)
+            for _ in range(workers):
+                await queue.put(None)
+        
+        async def consume():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                index, file_path = item
+                self.results[index] = await self.process_file(file_path, semaphore)
+        
+        tasks = [asyncio.create_task(produce())] + [asyncio.create_task(consume()) for _ in range(workers)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # A failed consumer stops the run; don't leave the others waiting on the queue
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
     async def process_file(self, file_path, semaphore):
-        """Process a single JSON file and send API request"""
+        """Process a single JSON file, resuming from the run manifest if there is one"""
+        if self.manifest is None:
+            return await self._process_file(file_path, semaphore)
+        
+        filename = os.path.basename(file_path)
+        try:
+            result = await self._run_blocking(self.manifest.begin_file, file_path)
+        except Exception as e:
+            logger.warning(f"Could not read checkpoints for {filename}, processing it from scratch: {str(e)}")
+            return await self._process_file(file_path, semaphore)
+        
+        if result is not None:
+            logger.info(f"Skipping {filename}, completed in an earlier run")
+            return dict(result, resumed=True)
+        
+        result = await self._process_file(file_path, semaphore)
+        try:
+            await self._run_blocking(self.manifest.record_file, file_path, result)
+        except OSError as e:
+            # Only this file is failed; the rest of the run goes on
+            logger.error(f"Could not record {filename} in the run manifest: {str(e)}")
+            unit = self.metrics.get(filename)
+            if unit is not None:
+                unit.finish('error')
+            return dict(result, status='error', error_type='manifest', error_message=str(e))
+        return result
+
+    async def _process_file(self, file_path, semaphore):
+        """Process a single JSON file and record its timings in the run metrics"""
+        unit = self.metrics.start_file(os.path.basename(file_path))
+        result = await self._process_timed_file(file_path, semaphore, unit)
+        unit.finish(result['status'])
+        return result
+
+    async def _process_timed_file(self, file_path, semaphore, unit):
+        """
+        Process a single JSON file and send API request.
+        
+        Reading and decoding a loaded file are timed as its read and parse
+        phases. A streamed file is scanned as its parse phase, and each chunk
+        is read and decoded as that chunk's read phase.
+        """
         filename = os.path.basename(file_path)
         
         try:
             logger.info(f"Reading file: {filename}")
             
+            # Chunks completed by an earlier run are skipped; their responses are merged as they are
+            completed_chunks = []
+            if self.manifest is not None and self.write_chunk_files:
+                completed_chunks = await self._run_blocking(self.manifest.completed_chunks, file_path)
+            
+            # Classify the file from its size and a prefix of its contents, before parsing it
+            file_size = (await self._run_blocking(os.stat, file_path)).st_size
+            unit.bytes_in = file_size
+            
+            # Big files holding a record array are streamed chunk by chunk instead of being loaded whole
+            if file_size >= STREAM_MIN_BYTES and await self._run_blocking(sniff_json_array, file_path) is not None:
+                # Only the fields before the records are parsed here; records are decoded once, chunk by chunk
+                with unit.phase('parse'):
+                    layout = await self._run_blocking(scan_json_array, file_path)
+                if layout is not None:
+                    logger.info(f"Large JSON detected in {filename} ({file_size} bytes), streaming its items in chunks")
+                    item_chunks = iter_json_array_chunks(file_path, max_bytes=lambda: self.chunk_budget.bytes,
+                                                         layout=layout)
+                    chunks = self._build_chunks(filename, layout.template, item_chunks, completed_chunks)
+                    return await self._process_large_json(filename, chunks, semaphore, file_path, completed_chunks, unit)
+            
             # Read JSON file
-            with open(file_path, 'r') as f:
-                data = json.load(f)
+            data, read_seconds, parse_seconds = await self._run_decode(_load_json_file, file_path, file_size)
+            unit.seconds['read'] += read_seconds
+            unit.seconds['parse'] += parse_seconds
             
             # Check if the file is large and needs chunking
-            is_large_file = self._is_large_json(data)
+            is_large_file = self._is_large_json(data, file_size)
             
             if is_large_file:
                 logger.info(f"Large JSON detected in {filename}, processing in chunks")
-                return await self._process_large_json(filename, data, semaphore)
+                chunks = self._split_json(filename, data, file_size, completed_chunks)
+                return await self._process_large_json(filename, chunks, semaphore, file_path, completed_chunks, unit)
             else:
                 logger.info(f"Processing regular JSON file: {filename}")
-                return await self._process_regular_json(filename, data, semaphore)
+                return await self._process_regular_json(filename, data, semaphore, unit)
                 
-        except json.JSONDecodeError as e:
+        except json_codec.JSONDecodeError as e:
             logger.error(f"JSON parsing error in {filename}: {str(e)}")
             return {
                 'filename': filename,
@@ -126,44 +621,36 @@ class JSONProcessor:
                 'timestamp': datetime.now().isoformat()
             }
 
-    def _is_large_json(self, data):
-        """Determine if a JSON is large and needs special handling"""
-        # Estimate size by serializing a small sample
-        if isinstance(data, dict) and 'data' in data and isinstance(data['data'], list):
-            # If data is in a 'data' field and it's a list
-            return len(data['data']) > CHUNK_SIZE
-        elif isinstance(data, list):
-            # If the root element is a list
-            return len(data) > CHUNK_SIZE
-            
-        # Get a rough size estimate by converting to string
-        try:
-            sample = str(data)[:1000]  # Take a small sample to estimate size
-            if len(sample) > 900:  # If the sample is large, likely a big JSON
-                return True
-        except:
-            pass
-            
-        return False  # Default to regular processing
+    def _is_large_json(self, data, file_size):
+        """Determine if a loaded JSON is large and needs special handling"""
+        if (isinstance(data, dict) and isinstance(data.get('data'), list)) or isinstance(data, list):
+            # Record arrays are chunked once they no longer fit in a single chunk of the current budget
+            return file_size > self.chunk_budget.bytes
+        
+        # For other structures, the size on disk tells without rendering the document
+        return file_size >= LARGE_DOCUMENT_BYTES
 
-    async def _process_regular_json(self, filename, data, semaphore):
+    async def _process_regular_json(self, filename, data, semaphore, unit):
         """Process a regular-sized JSON file"""
         async with semaphore:
             try:
                 # Retry mechanism for API calls
-                response_data = await self._send_api_request(data)
+                with unit.phase('send'):
+                    response_data = await self._send_api_request(data)
+                unit.records = _count_records(data)
                 
                 # Save response to file
-                response_file = os.path.join(OUTPUT_DIR, f"response_{filename}")
-                with open(response_file, 'w') as f:
-                    json.dump(response_data, f, indent=2)
+                response_file = self._output_path(f"response_{filename}")
+                with unit.phase('write'):
+                    unit.bytes_out = await self._run_blocking(self.output_format.write, response_file, response_data)
+                response_size = len(await self._run_blocking(json_codec.dumps_bytes, response_data))
                 
                 logger.info(f"Processed {filename} successfully")
                 
                 return {
                     'filename': filename,
                     'status': 'success',
-                    'response_size': len(json.dumps(response_data)),
+                    'response_size': response_size,
                     'response_file': response_file,
                     'timestamp': datetime.now().isoformat()
                 }
@@ -178,54 +665,59 @@ class JSONProcessor:
                     'timestamp': datetime.now().isoformat()
                 }
 
-    async def _process_large_json(self, filename, data, semaphore):
-        """Process a large JSON file by chunking it"""
+    def _build_chunks(self, filename, template, item_chunks, completed_chunks=()):
+        """
+        Wrap chunks of items into chunk payloads, reading one chunk at a time.
+        
+        Items covered by completed_chunks are left out, and no chunk spans
+        them, so every chunk is a contiguous item range. New chunks are
+        numbered after the completed ones.
+        """
+        completed = [(c['item_offset'], c['item_offset'] + c['items_in_chunk']) for c in completed_chunks]
+        chunk_index = max((c['chunk_index'] for c in completed_chunks), default=0)
+        
+        item_offset = 0
+        for items, chunk_bytes in item_chunks:
+            for start, end in _uncovered_ranges(item_offset, item_offset + len(items), completed):
+                chunk_index += 1
+                chunk_items = items if end - start == len(items) else items[start - item_offset:end - item_offset]
+                chunk_data = dict(template) if template is not None else {}
+                chunk_data['data'] = chunk_items
+                chunk_data['chunk_info'] = {
+                    'original_file': filename,
+                    'chunk_index': chunk_index,
+                    'item_offset': start,
+                    'items_in_chunk': len(chunk_items),
+                    'approximate_bytes': chunk_bytes * len(chunk_items) // len(items)
+                }
+                yield chunk_data
+            item_offset += len(items)
+
+    def _slice_by_budget(self, items, item_bytes):
+        """Slice loaded items into chunks that fit the current byte budget"""
+        offset = 0
+        while offset < len(items):
+            count = max(1, int(self.chunk_budget.bytes // item_bytes))
+            chunk = items[offset:offset + count]
+            yield chunk, int(len(chunk) * item_bytes)
+            offset += count
+
+    def _split_json(self, filename, data, file_size, completed_chunks=()):
+        """Split a loaded JSON document into chunk payloads"""
         logger.info(f"Breaking down large JSON {filename} into chunks")
         
         # Determine chunking strategy based on data structure
-        chunks = []
         if isinstance(data, dict) and 'data' in data and isinstance(data['data'], list):
             # If data is in a 'data' field which is a list
             items = data['data']
             template = {k: v for k, v in data.items() if k != 'data'}
-            
-            # Calculate number of chunks
-            num_chunks = math.ceil(len(items) / CHUNK_SIZE)
-            logger.info(f"Splitting {len(items)} items into {num_chunks} chunks")
-            
-            # Create chunks
-            for i in range(0, len(items), CHUNK_SIZE):
-                chunk_data = template.copy()
-                chunk_data['data'] = items[i:i + CHUNK_SIZE]
-                chunk_data['chunk_info'] = {
-                    'original_file': filename,
-                    'chunk_index': i // CHUNK_SIZE + 1,
-                    'total_chunks': num_chunks,
-                    'items_in_chunk': len(chunk_data['data'])
-                }
-                chunks.append(chunk_data)
-                
         elif isinstance(data, list):
             # If the root element is a list
             items = data
-            num_chunks = math.ceil(len(items) / CHUNK_SIZE)
-            logger.info(f"Splitting {len(items)} items into {num_chunks} chunks")
-            
-            for i in range(0, len(items), CHUNK_SIZE):
-                chunk_data = items[i:i + CHUNK_SIZE]
-                # Add metadata as first item
-                chunks.append({
-                    'data': chunk_data,
-                    'chunk_info': {
-                        'original_file': filename,
-                        'chunk_index': i // CHUNK_SIZE + 1,
-                        'total_chunks': num_chunks,
-                        'items_in_chunk': len(chunk_data)
-                    }
-                })
+            template = None
         else:
-            # For other structures, just use the size-based chunking
-            chunks = [{
+            # For other structures, send the document as a single chunk
+            return [{
                 'data': data,
                 'chunk_info': {
                     'original_file': filename,
@@ -235,144 +727,297 @@ class JSONProcessor:
                 }
             }]
         
-        # Process each chunk
-        chunk_results = []
-        for i, chunk in enumerate(chunks):
-            logger.info(f"Processing chunk {i+1}/{len(chunks)} for {filename}")
-            
-            async with semaphore:
+        # Records are sized from the file, which holds them almost entirely
+        item_bytes = max(1, file_size / max(1, len(items)))
+        logger.info(f"Splitting {len(items)} items into chunks of about {self.chunk_budget.bytes} bytes")
+        return self._build_chunks(filename, template, self._slice_by_budget(items, item_bytes), completed_chunks)
+
+    async def _process_large_json(self, filename, chunks, semaphore, file_path=None, completed_chunks=(), unit=None):
+        """
+        Process a large JSON file by sending its chunks concurrently.
+        
+        Chunks share the request semaphore with every other file, so one large
+        file can use all request slots. The next chunk is only read once a slot
+        is free, which keeps at most one chunk per slot in memory and lets its
+        size follow the latest chunk budget. Results are reassembled in chunk
+        order.
+        
+        Without chunk files, each response is appended to the merged file as
+        soon as the chunks before it are written, and its slot is only
+        released then, so buffered responses are bounded by the slot count.
+        
+        Chunks completed by an earlier run are passed in completed_chunks and
+        count towards the result like the chunks sent now, which are recorded
+        in the run manifest as they succeed. Only the chunks sent now are
+        timed in the run metrics.
+        
+        If reading a chunk fails, the chunks already sent are finished and
+        the file is reported as failed, with the merged file discarded.
+        """
+        if unit is None:
+            unit = UnitMetrics('file', filename)
+        
+        merge = None
+        if not self.write_chunk_files:
+            merge = _MergeTurns(MergedResponseWriter(filename, self._output_path(f"merged_response_{filename}"),
+                                                     self.output_format))
+        
+        tasks = []
+        read_error = None
+        chunk_iter = iter(chunks)
+        try:
+            while True:
+                # Wait for a free request slot before reading the next chunk
+                await semaphore.acquire()
+                read_start = time.perf_counter()
                 try:
-                    # Send API request for this chunk
-                    response_data = await self._send_api_request(chunk)
-                    
-                    # Save chunk response
-                    chunk_file = os.path.join(OUTPUT_DIR, f"response_{filename}_chunk{i+1}of{len(chunks)}.json")
-                    with open(chunk_file, 'w') as f:
-                        json.dump(response_data, f, indent=2)
-                    
-                    chunk_results.append({
-                        'chunk_index': i+1,
-                        'status': 'success',
-                        'response_file': chunk_file
-                    })
-                    
-                    logger.info(f"Successfully processed chunk {i+1}/{len(chunks)} for {filename}")
-                    
+                    chunk = await self._run_blocking(next, chunk_iter, None)
                 except Exception as e:
-                    logger.error(f"Error processing chunk {i+1}/{len(chunks)} for {filename}: {str(e)}")
-                    chunk_results.append({
-                        'chunk_index': i+1,
-                        'status': 'error',
-                        'error_message': str(e)
-                    })
+                    semaphore.release()
+                    read_error = e
+                    break
+                except BaseException:
+                    semaphore.release()
+                    raise
+                
+                if chunk is None:
+                    semaphore.release()
+                    break
+                
+                chunk_index = chunk['chunk_info']['chunk_index']
+                chunk_unit = self.metrics.start_chunk(filename, chunk_index, started=read_start)
+                chunk_unit.seconds['read'] = time.perf_counter() - read_start
+                
+                # The task owns the slot from here on and releases it when its request is done
+                tasks.append(asyncio.create_task(
+                    self._process_chunk(filename, chunk_index, chunk, semaphore, merge, file_path, chunk_unit)
+                ))
+                chunk = None
+        finally:
+            # Let chunks already in flight finish, even if reading the next one failed
+            chunk_results = list(await asyncio.gather(*tasks))
+        
+        if read_error is not None:
+            logger.error(f"Error reading the chunks of {filename} after {len(chunk_results)} sent: {str(read_error)}")
+            if merge is not None:
+                await self._run_blocking(merge.writer.abort)
+            return {
+                'filename': filename,
+                'status': 'error',
+                'error_type': 'json_decode' if isinstance(read_error, json_codec.JSONDecodeError) else 'processing',
+                'error_message': str(read_error),
+                'resumed_chunks': len(completed_chunks),
+                'successful_chunks': len(completed_chunks) + sum(1 for r in chunk_results if r['status'] == 'success'),
+                'chunk_results': chunk_results,
+                'timestamp': datetime.now().isoformat()
+            }
+        
+        if completed_chunks:
+            logger.info(f"Resumed {filename}: {len(completed_chunks)} chunks completed earlier, {len(chunk_results)} sent now")
+            chunk_results = sorted(list(completed_chunks) + chunk_results, key=lambda r: r.get('item_offset', 0))
+        
+        num_chunks = len(chunk_results)
         
         # Summarize chunk processing results
         successful_chunks = sum(1 for r in chunk_results if r['status'] == 'success')
+        merged_path = self._output_path(f"merged_response_{filename}")
+        
+        if merge is not None:
+            # The merged file was written as the chunks came in; keep it only if it is complete
+            if successful_chunks == num_chunks:
+                if await self._run_blocking(merge.writer.close):
+                    logger.info(f"Merged {num_chunks} chunk responses for {filename} with {merge.writer.item_count} items")
+            else:
+                await self._run_blocking(merge.writer.abort)
         
         # If all chunks were successful, merge results if appropriate
-        if successful_chunks == len(chunks) and len(chunks) > 1:
-            logger.info(f"All {len(chunks)} chunks processed successfully for {filename}")
+        elif successful_chunks == num_chunks and num_chunks > 1:
+            logger.info(f"All {num_chunks} chunks processed successfully for {filename}")
             
             # Attempt to merge chunk responses into a single file if feasible
             try:
-                self._merge_chunk_responses(filename, chunk_results)
+                with unit.phase('write'):
+                    await self._run_blocking(self._merge_chunk_responses, filename, chunk_results)
             except Exception as e:
                 logger.warning(f"Could not merge chunk responses for {filename}: {str(e)}")
         
+        # Records are counted once their chunk succeeded in this run
+        sent = [self.metrics.get(filename, r['chunk_index']) for r in chunk_results if r['status'] == 'success']
+        unit.records = sum(chunk_unit.records for chunk_unit in sent if chunk_unit is not None)
+        merged = successful_chunks == num_chunks and (merge is not None or num_chunks > 1)
+        merged_file = None
+        if merged and await self._run_blocking(os.path.exists, merged_path):
+            merged_file = merged_path
+            unit.bytes_out = (await self._run_blocking(os.stat, merged_path)).st_size
+        
         return {
             'filename': filename,
             'status': 'chunked',
-            'total_chunks': len(chunks),
+            'total_chunks': num_chunks,
+            'resumed_chunks': len(completed_chunks),
             'successful_chunks': successful_chunks,
-            'failed_chunks': len(chunks) - successful_chunks,
+            'failed_chunks': num_chunks - successful_chunks,
             'chunk_results': chunk_results,
+            'merged_file': merged_file,
             'timestamp': datetime.now().isoformat()
         }
 
+    async def _process_chunk(self, filename, chunk_index, chunk, semaphore, merge=None, file_path=None, unit=None):
+        """Send one chunk and save its response, releasing the request slot held for it"""
+        if unit is None:
+            unit = self.metrics.start_chunk(filename, chunk_index)
+        chunk_bytes = chunk['chunk_info'].get('approximate_bytes')
+        # Chunks are identified by their item range, which stays valid when chunk sizes change between runs
+        item_range = {key: chunk['chunk_info'][key] for key in ('item_offset', 'items_in_chunk') if key in chunk['chunk_info']}
+        logger.info(f"Processing chunk {chunk_index} for {filename} ({chunk['chunk_info'].get('items_in_chunk')} items)")
+        
+        try:
+            # Send API request for this chunk
+            unit.bytes_in = chunk_bytes or 0
+            start = time.perf_counter()
+            with unit.phase('send'):
+                response_data = await self._send_api_request(chunk)
+            self.chunk_budget.record_success(chunk_bytes, time.perf_counter() - start)
+            unit.records = _count_records(chunk)
+            
+            if merge is not None:
+                # Append to the merged file once the chunks before this one are written; the wait counts as writing
+                with unit.phase('write'):
+                    await merge.write(chunk_index, response_data, self._run_blocking)
+                logger.info(f"Successfully processed chunk {chunk_index} for {filename}")
+                unit.finish('success')
+                return {
+                    'chunk_index': chunk_index,
+                    'status': 'success',
+                    'response_file': None,
+                    **item_range
+                }
+            
+            # Save chunk response
+            chunk_file = self._output_path(f"response_{filename}_chunk{chunk_index}.json")
+            with unit.phase('write'):
+                unit.bytes_out = await self._run_blocking(self.output_format.write, chunk_file, response_data)
+            
+            result = {
+                'chunk_index': chunk_index,
+                'status': 'success',
+                'response_file': chunk_file,
+                **item_range
+            }
+            if self.manifest is not None and file_path is not None and item_range:
+                with unit.phase('write'):
+                    await self._run_blocking(self.manifest.record_chunk, file_path, result)
+            
+            logger.info(f"Successfully processed chunk {chunk_index} for {filename}")
+            unit.finish('success')
+            return result
+            
+        except Exception as e:
+            unit.finish('error')
+            self.chunk_budget.record_failure()
+            logger.error(f"Error processing chunk {chunk_index} for {filename}: {str(e)}")
+            return {
+                'chunk_index': chunk_index,
+                'status': 'error',
+                'error_message': str(e),
+                **item_range
+            }
+        finally:
+            if merge is not None and not merge.passed(chunk_index):
+                # A failed chunk still has to hand the turn on to the chunks after it
+                await merge.skip(chunk_index)
+            semaphore.release()
+
+    def _output_path(self, name):
+        """Return the path in OUTPUT_DIR of a response file named as plain JSON, in the output format"""
+        return os.path.join(OUTPUT_DIR, self.output_format.file_name(name))
+
     def _merge_chunk_responses(self, filename, chunk_results):
-        """Attempt to merge chunked responses into a single file"""
+        """Merge the chunk response files into a single file, reading one chunk at a time"""
         logger.info(f"Attempting to merge chunk responses for {filename}")
         
-        # Collect all chunk responses
-        merged_data = {}
-        merged_items = []
+        writer = MergedResponseWriter(filename, self._output_path(f"merged_response_{filename}"), self.output_format)
+        try:
+            for chunk in chunk_results:
+                if chunk['status'] == 'success':
+                    # Chunk files of an earlier run may be in another output format
+                    writer.add(read_document(chunk['response_file']))
+        except Exception:
+            writer.abort()
+            raise
         
-        for chunk in chunk_results:
-            if chunk['status'] == 'success':
-                with open(chunk['response_file'], 'r') as f:
-                    chunk_data = json.load(f)
+        if writer.close():
+            logger.info(f"Successfully merged {writer.chunk_count} chunks for {filename} with {writer.item_count} items")
+
+    async def _send_api_request(self, data):
+        """Send API request, retrying failures under the run's retry policy"""
+        return await self.retry_policy.call_async(self._post_api_request, data)
+
+    async def _post_api_request(self, data):
+        """Send a single API request over the pooled session"""
+        session = await self._get_session()
+        try:
+            # Chunk payloads can be large, so they are encoded and decoded off the event loop
+            body = await self._run_blocking(json_codec.dumps_bytes, data)
+            headers = {
+                'Content-Type': 'application/json',
+                'Accept-Encoding': ', '.join(SUPPORTED_ENCODINGS)
+            }
+            
+            # The generated records are repetitive and compress very well
+            encoding = self.request_encoding
+            self.transfer_stats['request_bytes'] += len(body)
+            if encoding is not None and len(body) >= COMPRESS_MIN_BYTES:
+                body = await self._run_blocking(compress, body, encoding)
+                headers['Content-Encoding'] = encoding
+            self.transfer_stats['request_bytes_sent'] += len(body)
+            
+            async with session.post(
+                API_ENDPOINT, 
+                data=body,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=TIMEOUT_SECONDS)
+            ) as response:
                 
-                # Extract items from the response
-                if isinstance(chunk_data, dict) and 'processed_data' in chunk_data:
-                    # Extract from API response structure
-                    proc_data = chunk_data['processed_data']
-                    
-                    # Initialize merged data structure if this is the first chunk
-                    if not merged_data:
-                        merged_data = {k: v for k, v in proc_data.items() 
-                                      if k != 'data' and k != 'chunk_info'}
-                    
-                    # Extract and append data items
-                    if 'data' in proc_data and isinstance(proc_data['data'], list):
-                        merged_items.extend(proc_data['data'])
+                response_body = await self._read_response_body(response)
                 
-                elif isinstance(chunk_data, list):
-                    # If response is a list, simply extend
-                    merged_items.extend(chunk_data)
-        
-        # Create merged file if we have items
-        if merged_items:
-            if merged_data:
-                # For dict structure with 'data' field
-                merged_data['data'] = merged_items
-                merged_data['merged_info'] = {
-                    'original_file': filename,
-                    'chunk_count': len(chunk_results),
-                    'total_items': len(merged_items)
-                }
+                if 400 <= response.status < 500 and 'Content-Encoding' in headers:
+                    # APIs that cannot read compressed bodies answer 415, or often just 400; the retry sends
+                    # this body, and all later ones, uncompressed, so a genuine client error still shows up
+                    logger.warning(f"API refused a {encoding} request body with status {response.status}, "
+                                   f"sending bodies uncompressed")
+                    self.request_encoding = None
+                    raise ApiStatusError(response.status, f"{encoding} request bodies not supported", retryable=True)
                 
-                # Save merged response
-                merged_file = os.path.join(OUTPUT_DIR, f"merged_response_{filename}")
-                with open(merged_file, 'w') as f:
-                    json.dump(merged_data, f, indent=2)
+                if response.status != 200:
+                    error_text = response_body.decode('utf-8', errors='replace')
+                    logger.error(f"API request failed with status {response.status}: {error_text}")
+                    raise ApiStatusError(response.status, error_text,
+                                         retry_after=retry_after_for(response.status, response.headers))
                 
-                logger.info(f"Successfully merged {len(chunk_results)} chunks for {filename} with {len(merged_items)} items")
-            else:
-                # For list structure
-                merged_file = os.path.join(OUTPUT_DIR, f"merged_response_{filename}")
-                with open(merged_file, 'w') as f:
-                    json.dump(merged_items, f, indent=2)
+                # Parse JSON response
+                return await self._run_blocking(json_codec.loads, response_body)
                 
-                logger.info(f"Successfully merged {len(chunk_results)} chunks for {filename} with {len(merged_items)} items")
+        except aiohttp.ClientError as e:
+            logger.error(f"Network error in API request: {str(e)}")
+            raise
+        except asyncio.TimeoutError:
+            logger.error(f"API request timed out after {TIMEOUT_SECONDS} seconds")
+            raise Exception(f"API request timed out after {TIMEOUT_SECONDS} seconds")
+        except Exception as e:
+            logger.error(f"Unexpected error in API request: {str(e)}")
+            raise
 
-    @retry(stop=stop_after_attempt(MAX_RETRIES), wait=wait_exponential(multiplier=RETRY_DELAY))
-    async def _send_api_request(self, data):
-        """Send API request with retry logic"""
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(
-                    API_ENDPOINT, 
-                    json=data,
-                    timeout=aiohttp.ClientTimeout(total=TIMEOUT_SECONDS)
-                ) as response:
-                    
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error(f"API request failed with status {response.status}: {error_text}")
-                        raise Exception(f"API request failed: {response.status} - {error_text}")
-                    
-                    # Parse JSON response
-                    return await response.json()
-                    
-            except aiohttp.ClientError as e:
-                logger.error(f"Network error in API request: {str(e)}")
-                raise
-            except asyncio.TimeoutError:
-                logger.error(f"API request timed out after {TIMEOUT_SECONDS} seconds")
-                raise Exception(f"API request timed out after {TIMEOUT_SECONDS} seconds")
-            except Exception as e:
-                logger.error(f"Unexpected error in API request: {str(e)}")
-                raise
+    async def _read_response_body(self, response):
+        """Read a response body, decompressing it off the event loop"""
+        body = await response.read()
+        self.transfer_stats['response_bytes_received'] += len(body)
+        
+        encoding = parse_encoding(response.headers.get('Content-Encoding'))
+        if encoding is not None:
+            body = await self._run_blocking(decompress, body, encoding, None)
+        self.transfer_stats['response_bytes'] += len(body)
+        return body
 
     def save_results_to_excel(self):
         """Save processing results to Excel"""
@@ -385,12 +1030,15 @@ class JSONProcessor:
             summary_data = []
             
             for result in self.results:
+                # Files completed by an earlier run were not timed in this one
+                unit = self.metrics.get(result.get('filename', ''))
                 row = {
                     'Filename': result.get('filename', ''),
                     'Status': result.get('status', ''),
                     'Timestamp': result.get('timestamp', ''),
-                    'Processing Time (s)': round(self.end_time - self.start_time, 2) if self.end_time and self.start_time else None
+                    'Processing Time (s)': round(unit.total_seconds, 3) if unit and unit.total_seconds is not None else None
                 }
+                row.update(self._unit_columns(unit))
                 
                 # Add fields based on status
                 if result.get('status') == 'success':
@@ -425,24 +1073,98 @@ class JSONProcessor:
                     chunk_details = []
                     for result in chunked_results:
                         for chunk in result.get('chunk_results', []):
+                            unit = self.metrics.get(result.get('filename', ''), chunk.get('chunk_index'))
                             chunk_details.append({
                                 'Filename': result.get('filename', ''),
                                 'Chunk Index': chunk.get('chunk_index', ''),
                                 'Status': chunk.get('status', ''),
                                 'Response File': chunk.get('response_file', '') if chunk.get('status') == 'success' else '',
-                                'Error Message': chunk.get('error_message', '') if chunk.get('status') == 'error' else ''
+                                'Error Message': chunk.get('error_message', '') if chunk.get('status') == 'error' else '',
+                                'Processing Time (s)': round(unit.total_seconds, 3) if unit and unit.total_seconds is not None else None,
+                                **self._unit_columns(unit)
                             })
                     
                     if chunk_details:
                         pd.DataFrame(chunk_details).to_excel(writer, sheet_name='Chunk Details', index=False)
+                
+                # Run totals, throughput and latency percentiles
+                metrics = self._run_metrics()
+                run_rows, latency_rows = self._metrics_rows(metrics['run'])
+                pd.DataFrame(run_rows).to_excel(writer, sheet_name='Metrics', index=False)
+                pd.DataFrame(latency_rows).to_excel(writer, sheet_name='Metrics', index=False, startrow=len(run_rows) + 2)
             
             logger.info(f"Results saved to Excel: {excel_path}")
+            
+            # The same metrics, machine-readable, next to the workbook
+            self.metrics_path = f"{os.path.splitext(excel_path)[0]}_metrics.json"
+            with open(self.metrics_path, 'wb') as f:
+                json_codec.dump(metrics, f, pretty=True)
+            logger.info(f"Metrics saved to: {self.metrics_path}")
+            
             return excel_path
             
         except Exception as e:
             logger.error(f"Error saving results to Excel: {str(e)}")
             return None
 
+    def _run_metrics(self):
+        """Return the run metrics, with the request, transfer and retry statistics of the run"""
+        elapsed = self.end_time - self.start_time if self.end_time and self.start_time else None
+        metrics = self.metrics.to_dict(elapsed)
+        metrics['run'].update({
+            'started_at': datetime.fromtimestamp(self.start_time).isoformat() if self.start_time else None,
+            'connections': dict(self.connection_stats),
+            'transfer': dict(self.transfer_stats),
+            'retries': self.retry_policy.snapshot()
+        })
+        return metrics
+
+    @staticmethod
+    def _unit_columns(unit):
+        """Excel columns with the phase timings and sizes of a file or chunk"""
+        if unit is None:
+            return {}
+        return {
+            'Read (s)': round(unit.seconds['read'], 3),
+            'Parse (s)': round(unit.seconds['parse'], 3),
+            'Send (s)': round(unit.seconds['send'], 3),
+            'Write (s)': round(unit.seconds['write'], 3),
+            'Bytes In': unit.bytes_in,
+            'Bytes Out': unit.bytes_out,
+            'Records': unit.records
+        }
+
+    @staticmethod
+    def _metrics_rows(run):
+        """Rows of the Metrics sheet: one table of run totals and one of latency percentiles"""
+        run_rows = [
+            {'Metric': 'Elapsed (s)', 'Value': run['elapsed_s']},
+            {'Metric': 'Files', 'Value': run['files']},
+            {'Metric': 'Chunks', 'Value': run['chunks']},
+            {'Metric': 'Records', 'Value': run['records']},
+            {'Metric': 'Bytes In', 'Value': run['bytes_in']},
+            {'Metric': 'Bytes Out', 'Value': run['bytes_out']},
+            {'Metric': 'Records/s', 'Value': run['records_per_s']},
+            {'Metric': 'MB/s In', 'Value': run['mb_in_per_s']},
+            {'Metric': 'MB/s Out', 'Value': run['mb_out_per_s']},
+            {'Metric': 'Requests', 'Value': run['connections']['requests']},
+            {'Metric': 'Request Bytes Sent', 'Value': run['transfer']['request_bytes_sent']},
+            {'Metric': 'Response Bytes Received', 'Value': run['transfer']['response_bytes_received']},
+            {'Metric': 'Retries', 'Value': run['retries']['retries']},
+            {'Metric': 'Circuit Breaker Opened', 'Value': run['retries']['circuit_opened']},
+        ]
+        # Busy time summed over files and chunks, which overlap; compare phases with each other
+        run_rows += [{'Metric': f'{phase.capitalize()} Time (s)', 'Value': seconds}
+                     for phase, seconds in run['phase_seconds'].items()]
+        
+        latency_rows = []
+        for name, latency in run['latency_s'].items():
+            row = {'Latency (s)': name.capitalize(), 'Count': latency['count'], 'Mean': latency['mean']}
+            row.update({f'p{q}': latency[f'p{q}'] for q in PERCENTILES})
+            row['Max'] = latency['max']
+            latency_rows.append(row)
+        return run_rows, latency_rows
+
     def save_to_database(self, db_type='sqlite', connection_string=None):
         """Save results to database"""
         try:
@@ -502,9 +1224,8 @@ class JSONProcessor:
                     
                     # Save response to file
                     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    response_file = os.path.join(OUTPUT_DIR, f"folder_response_{timestamp}.json")
-                    with open(response_file, 'w') as f:
-                        json.dump(response_data, f, indent=2)
+                    response_file = self._output_path(f"folder_response_{timestamp}.json")
+                    await self._run_blocking(self.output_format.write, response_file, response_data)
                     
                     logger.info(f"Processed folder {folder_path} successfully")
                     
@@ -557,6 +1278,9 @@ class JSONProcessor:
                 'message': f'Failed to process folder {folder_path}',
                 'error': str(e)
             }
+        finally:
+            await self.close()
+            logger.info(f"Retries: {self.retry_policy.summary()}")
 
 async def process_edit1_jsons():
     """Process all JSON files in the Edit1_jsons directory"""
@@ -1,15 +1,19 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 import time
 import random
 import logging
 import os
 from datetime import datetime
-import json
 from flask_cors import CORS
 
+from src.job_manager import JobManager, job_blueprint, is_truthy
+from src.edit_executor import EditExecutor
+from src import http_compression, json_codec
+
 # Configure app
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})  # Enable CORS for all routes and origins
+http_compression.init_app(app)  # Accept gzip/zstd request bodies and compress responses
 
 # Setup logging
 log_dir = os.path.join(os.path.dirname(__file__), "logs")
@@ -26,6 +30,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Background jobs for folders too large to process inside a request
+job_manager = JobManager(max_workers=4, history_size=100)
+app.register_blueprint(job_blueprint(job_manager))
+
+# Worker processes applying process_data to folder files; None uses every CPU, 0 processes them in the request thread
+EDIT_WORKERS = None
+edit_executor = EditExecutor(max_workers=EDIT_WORKERS)
+
 @app.route('/', methods=['GET'])
 def index():
     """Root endpoint for health check"""
@@ -83,48 +95,20 @@ def process_folder():
         
         logger.info(f"Found {len(json_files)} JSON files in folder")
         
-        # Process each JSON file
-        results = []
-        for file_path in json_files:
-            try:
-                # Read the JSON file
-                with open(file_path, 'r') as f:
-                    file_data = json.load(f)
-                
-                # Process the data
-                processed_data = process_data(file_data)
-                
-                # Add to results
-                results.append({
-                    'file_name': os.path.basename(file_path),
-                    'status': 'success',
-                    'data': processed_data
-                })
-                
-                logger.info(f"Successfully processed file: {os.path.basename(file_path)}")
-                
-            except Exception as e:
-                logger.error(f"Error processing file {os.path.basename(file_path)}: {str(e)}")
-                results.append({
-                    'file_name': os.path.basename(file_path),
-                    'status': 'error',
-                    'error': str(e)
-                })
+        # Large folders can run as a background job instead of inside the request
+        if is_truthy(data.get('async', request.args.get('async'))):
+            job = job_manager.submit(
+                'process-folder',
+                lambda job: process_folder_files(folder_path, edit_id, json_files, job.update_progress)
+            )
+            return jsonify({
+                'status': 'accepted',
+                'job_id': job.id,
+                'status_url': f'/jobs/{job.id}',
+                'result_url': f'/jobs/{job.id}/result'
+            }), 202
         
-        # Return consolidated response
-        successful = sum(1 for r in results if r['status'] == 'success')
-        
-        return jsonify({
-            'status': 'success',
-            'message': f'Processed {len(results)} files from folder',
-            'folder_path': folder_path,
-            'edit_id': edit_id,
-            'total_files': len(results),
-            'successful': successful,
-            'failed': len(results) - successful,
-            'results': results,
-            'timestamp': datetime.now().isoformat()
-        })
+        return Response(process_folder_files(folder_path, edit_id, json_files), mimetype='application/json')
         
     except Exception as e:
         logger.error(f"Error processing folder: {str(e)}")
@@ -134,6 +118,49 @@ def process_folder():
             'error': str(e)
         }), 500
 
+def process_folder_files(folder_path, edit_id, json_files, progress=None,
+                         message='Processed {count} files from folder'):
+    """
+    Process the JSON files of a folder in worker processes and build the consolidated response.
+
+    Workers return each processed file encoded, which is decoded into the
+    response document; the document is encoded once, as the response body.
+    """
+    results = []
+    successful = 0
+    for index, result in enumerate(edit_executor.map_files(json_files, process_data, return_data=True)):
+        if result['status'] == 'success':
+            successful += 1
+            results.append({
+                'file_name': result['filename'],
+                'status': 'success',
+                'data': json_codec.loads(result['data'])
+            })
+            logger.info(f"Successfully processed file: {result['filename']}")
+        else:
+            logger.error(f"Error processing file {result['filename']}: {result['error']}")
+            results.append({
+                'file_name': result['filename'],
+                'status': 'error',
+                'error': result['error']
+            })
+        
+        if progress:
+            progress(index + 1, len(json_files))
+    
+    # Return consolidated response
+    return json_codec.dumps_bytes({
+        'status': 'success',
+        'message': message.format(count=len(results)),
+        'folder_path': folder_path,
+        'edit_id': edit_id,
+        'total_files': len(results),
+        'successful': successful,
+        'failed': len(results) - successful,
+        'timestamp': datetime.now().isoformat(),
+        'results': results
+    })
+
 @app.route('/process', methods=['POST', 'OPTIONS'])
 def process_json():
     """Main endpoint for processing JSON data"""
@@ -234,48 +261,10 @@ def process_edit():
         
         logger.info(f"Found {len(json_files)} JSON files to process")
         
-        # Process each JSON file
-        results = []
-        for file_path in json_files:
-            try:
-                # Read the JSON file
-                with open(file_path, 'r') as f:
-                    file_data = json.load(f)
-                
-                # Process the data
-                processed_data = process_data(file_data)
-                
-                # Add to results
-                results.append({
-                    'file_name': os.path.basename(file_path),
-                    'status': 'success',
-                    'data': processed_data
-                })
-                
-                logger.info(f"Successfully processed file: {os.path.basename(file_path)}")
-                
-            except Exception as e:
-                logger.error(f"Error processing file {os.path.basename(file_path)}: {str(e)}")
-                results.append({
-                    'file_name': os.path.basename(file_path),
-                    'status': 'error',
-                    'error': str(e)
-                })
-        
-        # Return consolidated response
-        successful = sum(1 for r in results if r['status'] == 'success')
-        
-        return jsonify({
-            'status': 'success',
-            'message': f'Processed {len(results)} files with Edit 1',
-            'folder_path': folder_path,
-            'edit_id': edit_id,
-            'total_files': len(results),
-            'successful': successful,
-            'failed': len(results) - successful,
-            'results': results,
-            'timestamp': datetime.now().isoformat()
-        })
+        return Response(
+            process_folder_files(folder_path, edit_id, json_files, message='Processed {count} files with Edit 1'),
+            mimetype='application/json'
+        )
         
     except Exception as e:
         logger.error(f"Error processing Edit1_jsons: {str(e)}")
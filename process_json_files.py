@@ -8,6 +8,8 @@ import time
 from tqdm import tqdm  # For progress bar
 import sys
 
+from src.retry_policy import RetryPolicy, ApiStatusError, retry_after_for
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -25,8 +27,8 @@ SOURCE_DIR = r"C:\Cursor_Projects\pytest_project_02 -_UI Framework\Edit1_jsons"
 API_ENDPOINT = "http://localhost:5000/process-edit"
 MAX_WORKERS = 5  # Adjust based on your system capabilities
 REQUEST_TIMEOUT = 60  # Seconds
-RETRY_COUNT = 3
-RETRY_DELAY = 2  # Seconds
+RETRY_COUNT = 3  # Attempts per file
+RETRY_DELAY = 2  # Seconds; base of the jittered exponential backoff
 
 def check_api_connection():
     """Check if the API server is running and accessible"""
@@ -42,63 +44,55 @@ def check_api_connection():
         logger.error(f"Failed to connect to API server: {str(e)}")
         return False
 
-def process_file(file_path):
-    """Process a single JSON file through the API with retry logic"""
+def send_file(file_path):
+    """Send a single request for a file; raises on failure"""
+    # Prepare request payload
+    payload = {
+        "file_path": file_path,
+        "edit_id": "Edit 1"
+    }
+    
+    # Send request to API
+    response = requests.post(
+        API_ENDPOINT, 
+        json=payload, 
+        timeout=REQUEST_TIMEOUT,
+        headers={"Content-Type": "application/json"}
+    )
+    
+    # Check response
+    if response.status_code != 200:
+        logger.warning(f"Failed to process: {file_path} - Status: {response.status_code} - Response: {response.text}")
+        raise ApiStatusError(response.status_code, response.text,
+                             retry_after=retry_after_for(response.status_code, response.headers))
+    
+    return response.json()
+
+def process_file(file_path, retry_policy):
+    """Process a single JSON file through the API, retrying under the run's retry policy"""
     # Normalize path to ensure proper format
     file_path = os.path.normpath(file_path)
     
-    for attempt in range(RETRY_COUNT):
-        try:
-            # Prepare request payload
-            payload = {
-                "file_path": file_path,
-                "edit_id": "Edit 1"
-            }
-            
-            # Send request to API
-            response = requests.post(
-                API_ENDPOINT, 
-                json=payload, 
-                timeout=REQUEST_TIMEOUT,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            # Check response
-            if response.status_code == 200:
-                logger.info(f"Successfully processed: {file_path}")
-                return {"file": file_path, "status": "success", "response": response.json()}
-            else:
-                logger.warning(f"Failed to process: {file_path} - Status: {response.status_code} - Response: {response.text}")
-                
-                if attempt < RETRY_COUNT - 1:
-                    logger.info(f"Retrying in {RETRY_DELAY} seconds... (Attempt {attempt+1}/{RETRY_COUNT})")
-                    time.sleep(RETRY_DELAY)
-                else:
-                    return {
-                        "file": file_path, 
-                        "status": "error", 
-                        "status_code": response.status_code,
-                        "message": response.text
-                    }
-        
-        except requests.exceptions.Timeout:
-            logger.warning(f"Timeout processing {file_path}")
-            if attempt < RETRY_COUNT - 1:
-                logger.info(f"Retrying in {RETRY_DELAY} seconds... (Attempt {attempt+1}/{RETRY_COUNT})")
-                time.sleep(RETRY_DELAY)
-            else:
-                return {"file": file_path, "status": "error", "message": "API request timed out"}
-        
-        except Exception as e:
-            logger.error(f"Error processing {file_path}: {str(e)}")
-            if attempt < RETRY_COUNT - 1:
-                logger.info(f"Retrying in {RETRY_DELAY} seconds... (Attempt {attempt+1}/{RETRY_COUNT})")
-                time.sleep(RETRY_DELAY)
-            else:
-                return {"file": file_path, "status": "error", "message": str(e)}
-    
-    # This should not be reached, but just in case
-    return {"file": file_path, "status": "error", "message": "Maximum retry attempts exceeded"}
+    try:
+        response = retry_policy.call(send_file, file_path)
+        logger.info(f"Successfully processed: {file_path}")
+        return {"file": file_path, "status": "success", "response": response}
+    
+    except ApiStatusError as e:
+        return {
+            "file": file_path, 
+            "status": "error", 
+            "status_code": e.status,
+            "message": str(e)
+        }
+    
+    except requests.exceptions.Timeout:
+        logger.warning(f"Timeout processing {file_path}")
+        return {"file": file_path, "status": "error", "message": "API request timed out"}
+    
+    except Exception as e:
+        logger.error(f"Error processing {file_path}: {str(e)}")
+        return {"file": file_path, "status": "error", "message": str(e)}
 
 def main():
     """Run all tests"""
@@ -128,11 +122,14 @@ def main():
     
     print(f"✅ Found {len(json_files)} JSON files to process")
     
+    # Retries of all workers share one budget and circuit breaker, so a struggling API is not flooded with retries
+    retry_policy = RetryPolicy(max_attempts=RETRY_COUNT, base_delay=RETRY_DELAY)
+    
     # Process files in parallel with progress bar
     results = []
     with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
         # Submit all tasks
-        future_to_file = {executor.submit(process_file, file_path): file_path for file_path in json_files}
+        future_to_file = {executor.submit(process_file, file_path, retry_policy): file_path for file_path in json_files}
         
         # Process results as they complete with progress bar
         for future in tqdm(
@@ -162,6 +159,12 @@ def main():
     print(f"  - Successful: {success_count}")
     print(f"  - Failed: {error_count}")
     
+    retry_stats = retry_policy.snapshot()
+    print(f"  - Retries: {retry_stats['retries']} "
+          f"({retry_stats['budget_exhausted']} refused by the retry budget, "
+          f"circuit breaker opened {retry_stats['circuit_opened']} times)")
+    logger.info(f"Retries: {retry_policy.summary()}")
+    
     # Save results to Excel
     try:
         df = pd.DataFrame([
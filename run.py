@@ -11,6 +11,8 @@ import asyncio
 import logging
 from datetime import datetime
 
+from src.output_formats import FORMAT_NAMES
+
 # Configure logging
 log_format = '%(asctime)s - %(levelname)s - %(message)s'
 logging.basicConfig(level=logging.INFO, format=log_format)
@@ -29,14 +31,20 @@ def setup_environment():
     os.makedirs(output_dir, exist_ok=True)
     os.makedirs(logs_dir, exist_ok=True)
 
-async def run_processor(db_export=False, db_type='sqlite', input_dir=None):
+async def run_processor(db_export=False, db_type='sqlite', input_dir=None, fresh=False, output_format=None):
     """Run the JSON processor"""
     # Import here to avoid circular imports
-    from large_scale_json_processor import JSONProcessor
+    from large_scale_json_processor import JSONProcessor, OUTPUT_DIR, MANIFEST_FILENAME
+    from run_manifest import RunManifest
     
     try:
+        # Discard the checkpoints of earlier runs instead of resuming them
+        if fresh:
+            RunManifest(os.path.join(OUTPUT_DIR, MANIFEST_FILENAME)).clear()
+            logger.info("Starting a fresh run")
+        
         # Create processor instance
-        processor = JSONProcessor()
+        processor = JSONProcessor(output_format=output_format) if output_format else JSONProcessor()
         
         # Override input directory if specified
         if input_dir:
@@ -91,14 +99,14 @@ def generate_test_data():
     except Exception as e:
         logger.error(f"Error generating test data: {str(e)}")
 
-async def process_folder(folder_path, edit_id="Edit 1"):
+async def process_folder(folder_path, edit_id="Edit 1", output_format=None):
     """Process all JSON files in a specific folder"""
     # Import here to avoid circular imports
     from large_scale_json_processor import JSONProcessor
     
     try:
         # Create processor instance
-        processor = JSONProcessor()
+        processor = JSONProcessor(output_format=output_format) if output_format else JSONProcessor()
         
         # Process folder
         logger.info(f"Processing folder: {folder_path} with Edit ID: {edit_id}")
@@ -152,11 +160,17 @@ def main():
     process_parser.add_argument('--db-type', choices=['sqlite', 'postgresql'], default='sqlite',
                              help='Database type (default: sqlite)')
     process_parser.add_argument('--input-dir', type=str, help='Custom input directory for JSON files')
+    process_parser.add_argument('--fresh', action='store_true',
+                             help='Ignore the checkpoints of earlier runs instead of resuming')
+    process_parser.add_argument('--output-format', choices=FORMAT_NAMES,
+                             help='Layout and compression of the response files (default: pretty)')
     
     # Process folder command
     folder_parser = subparsers.add_parser('process-folder', help='Process all JSON files in a folder')
     folder_parser.add_argument('--folder-path', type=str, required=True, help='Path to folder containing JSON files')
     folder_parser.add_argument('--edit-id', type=str, default='Edit 1', help='Edit ID to apply (default: Edit 1)')
+    folder_parser.add_argument('--output-format', choices=FORMAT_NAMES,
+                            help='Layout and compression of the response file (default: pretty)')
     
     # Process Edit1_jsons command
     edit1_parser = subparsers.add_parser('process-edit1', help='Process JSON files from Edit1_jsons folder')
@@ -184,10 +198,12 @@ def main():
         asyncio.run(run_processor(
             db_export=args.db, 
             db_type=args.db_type,
-            input_dir=args.input_dir
+            input_dir=args.input_dir,
+            fresh=args.fresh,
+            output_format=args.output_format
         ))
     elif args.command == 'process-folder':
-        asyncio.run(process_folder(args.folder_path, args.edit_id))
+        asyncio.run(process_folder(args.folder_path, args.edit_id, args.output_format))
     elif args.command == 'process-edit1':
         asyncio.run(process_edit1_jsons())
     elif args.command == 'db-export':
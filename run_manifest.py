@@ -0,0 +1,248 @@
+import os
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from src import json_codec
+
+# Bytes hashed per read
+HASH_BLOCK_SIZE = 1024 * 1024
+
+MANIFEST_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+def file_sha256(file_path: str) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def is_complete(result: Optional[Dict[str, Any]]) -> bool:
+    """Return True for a file result that needs no further work."""
+    if not result:
+        return False
+    if result.get('status') == 'success':
+        return True
+    return result.get('status') == 'chunked' and result.get('failed_chunks') == 0
+
+def output_files(result: Dict[str, Any]) -> List[str]:
+    """Return the response, merged and chunk response files a file result refers to."""
+    paths = [result.get('response_file'), result.get('merged_file')]
+    paths += [chunk.get('response_file') for chunk in result.get('chunk_results', [])]
+    return [path for path in paths if path]
+
+class RunManifest:
+    """
+    Checkpoints of a processing run, kept in a JSON file so a restarted run can resume.
+
+    Each input file is recorded with its content hash, its final result once
+    it is complete, and the item range and response file of every chunk that
+    was processed successfully. Chunk boundaries follow the adaptive chunk
+    budget, so chunks are identified by item range rather than by index.
+    A file whose contents changed starts over.
+
+    Methods block on file I/O and may be called from several threads.
+    Every change (a file starting, a chunk or a file result) is appended to
+    a journal next to the manifest, so a checkpoint costs the same however
+    many came before it. compact() folds the journal into the manifest,
+    once at the end of a run.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the RunManifest, loading the checkpoints of an earlier run.
+
+        Args:
+            path: Path of the manifest file.
+        """
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self._lock = threading.Lock()
+        self._files = {}
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    manifest = json_codec.load(f)
+                if manifest.get('version') == MANIFEST_VERSION:
+                    self._files = manifest.get('files', {})
+                else:
+                    logger.warning(f"Ignoring run manifest {path} with unsupported version")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable run manifest {path}: {str(e)}")
+
+        if os.path.exists(self.journal_path):
+            self._replay_journal()
+
+    def begin_file(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Start (or resume) a file.
+
+        The content hash is only recomputed when the file's size or
+        modification time changed since it was recorded. A completed file
+        whose response files no longer all exist is processed again.
+
+        Args:
+            file_path: Path of the input file.
+
+        Returns:
+            The recorded result if the file was already completed with the same
+            contents, otherwise None.
+        """
+        key = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+
+        with self._lock:
+            entry = self._files.get(key)
+            unchanged = entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns
+
+        if not unchanged:
+            content_hash = file_sha256(file_path)
+            record = {'hash': content_hash, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+            with self._lock:
+                if key in self._files and self._files[key]['hash'] != content_hash:
+                    logger.info(f"{file_path} changed since the last run, processing it again")
+                entry = self._begin_entry(key, record)
+                self._append_journal({'file': key, 'begin': record})
+
+        with self._lock:
+            result = entry['result']
+        if not is_complete(result):
+            return None
+
+        missing = [path for path in output_files(result) if not os.path.exists(path)]
+        if missing:
+            logger.info(f"{file_path} was completed but {len(missing)} of its response files are gone, "
+                        f"processing it again")
+            with self._lock:
+                entry['result'] = None
+            return None
+        return result
+
+    def completed_chunks(self, file_path: str) -> List[Dict[str, Any]]:
+        """
+        Return the successful chunks of a file whose response files still exist.
+
+        Args:
+            file_path: Path of the input file.
+
+        Returns:
+            Chunk results ordered by item offset.
+        """
+        with self._lock:
+            entry = self._files.get(os.path.abspath(file_path))
+            chunks = [dict(chunk) for chunk in entry['chunks']] if entry else []
+
+        chunks = [chunk for chunk in chunks if chunk.get('response_file') and os.path.exists(chunk['response_file'])]
+        return sorted(chunks, key=lambda chunk: chunk['item_offset'])
+
+    def record_chunk(self, file_path: str, chunk_result: Dict[str, Any]):
+        """
+        Record a successful chunk, identified by its item range.
+
+        Args:
+            file_path: Path of the input file.
+            chunk_result: Chunk result with item_offset, items_in_chunk and response_file.
+        """
+        key = os.path.abspath(file_path)
+        with self._lock:
+            entry = self._files.get(key)
+            if entry is None:
+                return
+            self._add_chunk(entry, chunk_result)
+            self._append_journal({'file': key, 'hash': entry['hash'], 'chunk': chunk_result})
+
+    def record_file(self, file_path: str, result: Dict[str, Any]):
+        """
+        Record the result of a file; only complete results make a rerun skip it.
+
+        Args:
+            file_path: Path of the input file.
+            result: File result returned by the processor.
+        """
+        key = os.path.abspath(file_path)
+        with self._lock:
+            entry = self._files.get(key)
+            if entry is None:
+                return
+            entry['result'] = result
+            self._append_journal({'file': key, 'hash': entry['hash'], 'result': result})
+
+    def compact(self):
+        """Write the manifest with every journaled change and empty the journal."""
+        with self._lock:
+            self._save()
+
+    def clear(self):
+        """Forget every checkpoint, so the next run starts from scratch."""
+        with self._lock:
+            self._files = {}
+            for path in (self.path, self.journal_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _begin_entry(self, key: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Start the entry of a file, keeping its checkpoints if its contents are the same."""
+        entry = self._files.get(key)
+        if entry is None or entry['hash'] != record['hash']:
+            entry = {'hash': record['hash'], 'result': None, 'chunks': []}
+            self._files[key] = entry
+        entry['size'] = record['size']
+        entry['mtime_ns'] = record['mtime_ns']
+        return entry
+
+    @staticmethod
+    def _add_chunk(entry: Dict[str, Any], chunk_result: Dict[str, Any]):
+        """Add a chunk to a file entry; it replaces any earlier chunk overlapping its item range."""
+        start = chunk_result['item_offset']
+        end = start + chunk_result['items_in_chunk']
+        entry['chunks'] = [chunk for chunk in entry['chunks']
+                           if chunk['item_offset'] >= end or chunk['item_offset'] + chunk['items_in_chunk'] <= start]
+        entry['chunks'].append(chunk_result)
+
+    def _append_journal(self, record: Dict[str, Any]):
+        """Append one change to the journal."""
+        line = json_codec.dumps_bytes(record, default=str)
+        with open(self.journal_path, 'ab') as f:
+            f.write(line + b'\n')
+
+    def _replay_journal(self):
+        """Apply the changes journaled since the manifest was last written."""
+        try:
+            with open(self.journal_path, 'rb') as f:
+                lines = f.readlines()
+        except OSError as e:
+            logger.warning(f"Ignoring unreadable run manifest journal {self.journal_path}: {str(e)}")
+            return
+
+        for line in lines:
+            try:
+                record = json_codec.loads(line)
+            except ValueError:
+                # A line cut short by a crash; its change is made again
+                continue
+
+            if 'begin' in record:
+                self._begin_entry(record['file'], record['begin'])
+                continue
+            # The hash ties a change to the file's contents, so changes to an earlier version are dropped
+            entry = self._files.get(record['file'])
+            if entry is None or entry['hash'] != record['hash']:
+                continue
+            if 'chunk' in record:
+                self._add_chunk(entry, record['chunk'])
+            else:
+                entry['result'] = record['result']
+
+    def _save(self):
+        """Write the manifest to a temporary file and move it into place, then empty the journal it includes."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            json_codec.dump({'version': MANIFEST_VERSION, 'files': self._files}, f, default=str)
+        os.replace(tmp_path, self.path)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
@@ -0,0 +1,166 @@
+import math
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+# Phases timed for every file and chunk
+PHASES = ('read', 'parse', 'send', 'write')
+
+# Latency percentiles reported for the run
+PERCENTILES = (50, 95, 99)
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Return the q-th percentile of values, interpolating between ranks like numpy."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+def latency_summary(values: List[float]) -> Dict[str, Any]:
+    """Return the count, mean, percentiles and maximum of latencies in seconds."""
+    summary = {'count': len(values), 'mean': sum(values) / len(values) if values else None}
+    for q in PERCENTILES:
+        summary[f'p{q}'] = percentile(values, q)
+    summary['max'] = max(values) if values else None
+    return summary
+
+class UnitMetrics:
+    """
+    Timings and sizes of one file or chunk.
+
+    Phases are timed with phase(); a phase entered several times (e.g. a
+    chunk file and its manifest entry both being written) accumulates.
+    """
+
+    def __init__(self, kind: str, filename: str, chunk_index: Optional[int] = None,
+                 started: Optional[float] = None):
+        """
+        Initialize the UnitMetrics.
+
+        Args:
+            kind: "file" or "chunk".
+            filename: Name of the input file.
+            chunk_index: Index of the chunk, for chunks.
+            started: time.perf_counter() value the unit started at; defaults to now.
+        """
+        self.kind = kind
+        self.filename = filename
+        self.chunk_index = chunk_index
+        self.status = None
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.total_seconds = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.records = 0
+        self._started = time.perf_counter() if started is None else started
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a phase of the unit."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+
+    def finish(self, status: str):
+        """Record the unit's status and its wall time since it started."""
+        self.status = status
+        self.total_seconds = time.perf_counter() - self._started
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the unit's metrics, with times in seconds."""
+        row = {'kind': self.kind, 'filename': self.filename}
+        if self.chunk_index is not None:
+            row['chunk_index'] = self.chunk_index
+        row['status'] = self.status
+        row.update({f'{name}_s': round(seconds, 6) for name, seconds in self.seconds.items()})
+        row['total_s'] = round(self.total_seconds, 6) if self.total_seconds is not None else None
+        row.update({'bytes_in': self.bytes_in, 'bytes_out': self.bytes_out, 'records': self.records})
+        return row
+
+class RunMetrics:
+    """
+    Per-file and per-chunk timings of a processing run, and their summary.
+
+    A file's bytes_in and records count its whole input, so the run totals
+    are taken from file units only; bytes_out is written by files (single
+    responses and merged files) and chunks (chunk responses) alike, so it is
+    summed over both. Files and chunks completed by an earlier run are not
+    timed.
+    """
+
+    def __init__(self):
+        self.files: List[UnitMetrics] = []
+        self.chunks: List[UnitMetrics] = []
+        self._units = {}
+
+    def start_file(self, filename: str) -> UnitMetrics:
+        """Start timing a file."""
+        unit = UnitMetrics('file', filename)
+        self.files.append(unit)
+        self._units[(filename, None)] = unit
+        return unit
+
+    def start_chunk(self, filename: str, chunk_index: int, started: Optional[float] = None) -> UnitMetrics:
+        """Start timing a chunk of a file, optionally from an earlier time.perf_counter() value."""
+        unit = UnitMetrics('chunk', filename, chunk_index, started)
+        self.chunks.append(unit)
+        self._units[(filename, chunk_index)] = unit
+        return unit
+
+    def summary(self, elapsed_seconds: Optional[float]) -> Dict[str, Any]:
+        """
+        Summarize the run.
+
+        Args:
+            elapsed_seconds: Wall time of the run.
+
+        Returns:
+            Dictionary with the run totals, throughput and latency percentiles.
+        """
+        units = self.files + self.chunks
+        records = sum(unit.records for unit in self.files)
+        bytes_in = sum(unit.bytes_in for unit in self.files)
+        bytes_out = sum(unit.bytes_out for unit in units)
+
+        def rate(amount):
+            return amount / elapsed_seconds if elapsed_seconds else None
+
+        # Requests are the sends of unchunked files and of chunks
+        requests = [unit.seconds['send'] for unit in units if unit.seconds['send'] > 0]
+
+        return {
+            'elapsed_s': elapsed_seconds,
+            'files': len(self.files),
+            'chunks': len(self.chunks),
+            'records': records,
+            'bytes_in': bytes_in,
+            'bytes_out': bytes_out,
+            'records_per_s': rate(records),
+            'mb_in_per_s': rate(bytes_in / (1024 * 1024)),
+            'mb_out_per_s': rate(bytes_out / (1024 * 1024)),
+            'phase_seconds': {name: sum(unit.seconds[name] for unit in units) for name in PHASES},
+            'latency_s': {
+                'request': latency_summary(requests),
+                'file': latency_summary([unit.total_seconds for unit in self.files if unit.total_seconds is not None]),
+                'chunk': latency_summary([unit.total_seconds for unit in self.chunks if unit.total_seconds is not None]),
+                **{name: latency_summary([unit.seconds[name] for unit in units if unit.seconds[name] > 0])
+                   for name in ('read', 'parse', 'write')}
+            }
+        }
+
+    def to_dict(self, elapsed_seconds: Optional[float]) -> Dict[str, Any]:
+        """Return the run summary and the metrics of every file and chunk."""
+        return {
+            'run': self.summary(elapsed_seconds),
+            'files': [unit.to_dict() for unit in self.files],
+            'chunks': [unit.to_dict() for unit in self.chunks]
+        }
+
+    def get(self, filename: str, chunk_index: Optional[int] = None) -> Optional[UnitMetrics]:
+        """Return the metrics of a file, or of one of its chunks, timed in this run."""
+        return self._units.get((filename, chunk_index))
@@ -1,8 +1,16 @@
+import os
+import sys
 import requests
 import json
 import logging
 from typing import Dict, Any, Optional, List
 
+# Add the current directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from payload_logging import PayloadLogger
+from retry_policy import RetryPolicy, ApiStatusError, retry_after_for
+
 # Configure logging
 logging.basicConfig(
     filename='logs/api_client.log',
@@ -16,14 +24,26 @@ class ApiClient:
     A client for making requests to the API.
     """
     
-    def __init__(self, base_url: str = "http://localhost:5000"):
+    def __init__(self,
+                base_url: str = "http://localhost:5000",
+                log_sample_rate: float = 0.01,
+                log_max_chars: int = 1024,
+                retry_policy: Optional[RetryPolicy] = None):
         """
         Initialize the API client.
         
         Args:
             base_url: Base URL of the API server.
+            log_sample_rate: Fraction of requests whose payloads are logged.
+            log_max_chars: Maximum number of characters of a logged payload.
+            retry_policy: Retry policy shared by the client's requests; by default
+                one with its own retry budget and circuit breaker.
         """
         self.base_url = base_url
+        self.retry_policy = retry_policy or RetryPolicy()
+        
+        # Payloads are sampled, capped and written off the calling thread
+        self.payload_log = PayloadLogger(logger, sample_rate=log_sample_rate, max_chars=log_max_chars)
         logger.info(f"ApiClient initialized with base URL: {base_url}")
     
     def process_json(self, payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -38,21 +58,15 @@ class ApiClient:
         """
         try:
             url = f"{self.base_url}/process-json"
-            logger.info(f"Making POST request to {url} with payload: {payload}")
-            
-            headers = {'Content-Type': 'application/json'}
-            response = requests.post(url, json=payload, headers=headers)
-            
-            # Check for successful response
-            response.raise_for_status()
+            self.payload_log.info(f"Making POST request to {url} with payload", payload)
             
             # Parse the JSON response
-            json_response = response.json()
-            logger.info(f"Received response: {json_response}")
+            json_response = self.retry_policy.call(self._post, url, payload)
+            self.payload_log.info("Received response", json_response)
             
             return json_response
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ApiStatusError) as e:
             logger.error(f"Error making API request: {str(e)}")
             raise
         except json.JSONDecodeError as e:
@@ -62,6 +76,27 @@ class ApiClient:
             logger.error(f"Unexpected error in API client: {str(e)}")
             raise
     
+    def _post(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a single POST request.
+        
+        Args:
+            url: Endpoint URL.
+            payload: The JSON payload to send.
+            
+        Returns:
+            The decoded response.
+        """
+        headers = {'Content-Type': 'application/json'}
+        response = requests.post(url, json=payload, headers=headers)
+        
+        # Check for successful response
+        if not response.ok:
+            raise ApiStatusError(response.status_code, response.text,
+                                 retry_after=retry_after_for(response.status_code, response.headers))
+        
+        return response.json()
+    
     def save_response_to_file(self, response: Dict[str, Any], output_file: str):
         """
         Save an API response to a file.
@@ -71,6 +106,7 @@ class ApiClient:
             output_file: Path to the output file.
         """
         try:
+            # Saved responses keep their 4-space, ASCII-escaped layout, which json_codec does not produce
             with open(output_file, 'w') as file:
                 json.dump(response, file, indent=4)
             
@@ -1,13 +1,30 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
+import io
 import logging
 import os
+import sys
+import atexit
+import threading
+import multiprocessing
+from collections import deque
 from typing import Dict, Any, Optional, Tuple
-import json
-import copy
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
 from flask_cors import CORS
 import pandas as pd
 from pathlib import Path
 
+# Add the current directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from results_store import ResultsStore, ResultsWriter, ResultsWriteError
+from json_edit import apply_edit_overlay
+from upload_processor import process_upload
+from report_index import report_file_name
+from report_partitions import ReportPartitions
+from job_manager import JobManager, job_blueprint, is_truthy
+from payload_logging import PayloadLogger
+import json_codec
+
 # Configure logging
 logging.basicConfig(
     filename='logs/api_service.log',
@@ -16,23 +33,92 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Media type of streamed bulk responses, one JSON result per line
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
 class ApiService:
     """
     API service for processing JSON data and handling HTTP requests.
     """
     
-    def __init__(self, host: str = "127.0.0.1", port: int = 5000):
+    def __init__(self,
+                host: str = "127.0.0.1",
+                port: int = 5000,
+                results_dir: str = "results",
+                file_load_workers: int = 8,
+                file_load_window: int = 4,
+                upload_workers: Optional[int] = None,
+                upload_window: Optional[int] = None,
+                job_workers: int = 4,
+                job_history: int = 100,
+                log_sample_rate: float = 0.01,
+                log_max_chars: int = 1024):
         """
         Initialize the API service.
         
         Args:
             host: Host address for the API server.
             port: Port number for the API server.
+            results_dir: Directory holding the results store and Excel reports.
+            file_load_workers: Number of threads loading files for /process-edit.
+            file_load_window: Number of files one request loads ahead of the file
+                it is processing; below file_load_workers so concurrent requests
+                share the loader threads.
+            upload_workers: Number of worker processes for bulk uploads. Defaults to
+                the number of CPUs; 0 processes uploads on the request thread.
+            upload_window: Number of uploads one request has read and submitted
+                ahead of the upload whose result it is waiting for. Defaults to
+                twice the number of upload workers.
+            job_workers: Number of background jobs that run at the same time.
+            job_history: Number of finished jobs kept for status and result lookups.
+            log_sample_rate: Fraction of requests whose bodies are logged.
+            log_max_chars: Maximum number of characters of a logged body.
         """
         self.host = host
         self.port = port
+        self.results_dir = results_dir
         self.app = Flask(__name__)
         
+        # Request and response bodies are sampled, capped and written off the request thread
+        self.payload_log = PayloadLogger(logger, sample_rate=log_sample_rate, max_chars=log_max_chars)
+        
+        # Bounded pool shared by all requests for loading and parsing JSON files
+        self.file_loader = ThreadPoolExecutor(
+            max_workers=file_load_workers,
+            thread_name_prefix="file-loader"
+        )
+        self.file_load_window = max(1, file_load_window)
+        
+        # Process pool for bulk uploads, created on first use
+        self.upload_workers = os.cpu_count() if upload_workers is None else upload_workers
+        self.upload_window = max(1, 2 * self.upload_workers if upload_window is None else upload_window)
+        self._upload_pool = None
+        self._upload_pool_lock = threading.Lock()
+        
+        # Background jobs for long-running requests
+        self.job_manager = JobManager(max_workers=job_workers, history_size=job_history)
+        
+        # Append-only store for edit results; the workbook is rendered on demand
+        self.results_store = ResultsStore(
+            db_path=os.path.join(results_dir, 'edit_results.db'),
+            excel_path=os.path.join(results_dir, 'edit_results.xlsx'),
+            import_excel_path=os.path.join(results_dir, 'api_responses.xlsx')
+        )
+        
+        
+        # Per-ID reports, invalidated and rebuilt in the background as results are committed
+        self.report_partitions = ReportPartitions(
+            self.results_store,
+            reports_dir=os.path.join(results_dir, 'reports')
+        )
+        
+        # Single background writer; request handlers only enqueue rows
+        self.results_writer = ResultsWriter(
+            self.results_store,
+            on_commit=self.report_partitions.rows_committed
+        )
+        atexit.register(self.results_writer.close)
+        
         # Enable CORS with more permissive settings
         CORS(
             self.app, 
@@ -72,6 +158,9 @@ class ApiService:
         
         # New route for processing edits from local JSON files
         self.app.route('/process-edit', methods=['POST'])(self.process_edit)
+        
+        # Status and results of background jobs
+        self.app.register_blueprint(job_blueprint(self.job_manager))
         logger.info("API routes configured")
     
     def health_check(self):
@@ -116,17 +205,26 @@ class ApiService:
                     "message": "No ID provided"
                 }), 400
             
+            # Commit queued rows so the report includes them
+            self.results_writer.flush()
+            
             # Path to the Excel file
             if id == 'all':
-                excel_path = os.path.join('results', 'api_responses.xlsx')
+                # Render the workbook from the results store (cached until new rows arrive)
+                excel_path = self.results_store.render_excel() or self.results_store.excel_path
+                outdated = False
             else:
-                excel_path = os.path.join('results', f'report_{id}.xlsx')
+                # Per-ID reports are partitions kept current from the results store
+                partition_path = self.report_partitions.get(id)
+                excel_path = partition_path or os.path.join(self.results_dir, f'report_{id}.xlsx')
+                # Without a partition the store has no rows for the ID, so any older report is stale
+                outdated = partition_path is None
             
             # Get absolute path
             abs_excel_path = os.path.abspath(excel_path)
             
-            # Check if the file exists
-            if not os.path.exists(abs_excel_path):
+            # Check if the file exists and is current
+            if not os.path.exists(abs_excel_path) or outdated:
                 # If specific file doesn't exist, try to create it from the main Excel file
                 try:
                     self.generate_individual_report(id, abs_excel_path)
@@ -161,18 +259,8 @@ class ApiService:
             id: ID of the processed JSON.
             output_path: Path to save the Excel file.
         """
-        # Main Excel file path
-        main_excel_path = os.path.join('results', 'api_responses.xlsx')
-        
-        # Check if the main file exists
-        if not os.path.exists(main_excel_path):
-            raise FileNotFoundError(f"Main Excel file not found: {main_excel_path}")
-        
-        # Read the main Excel file
-        df = pd.read_excel(main_excel_path)
-        
-        # Filter for the specific ID
-        filtered_df = df[df['Input JSON'].str.contains(f"example{id}.json")]
+        # Look up the rows for the specific ID in the results store's report_id index
+        filtered_df = self.results_store.report_rows(id, self.results_store.last_report_row_id(id))
         
         # Check if any rows were found
         if filtered_df.empty:
@@ -195,51 +283,54 @@ class ApiService:
         """
         Get list of processed JSON files.
         
+        Query parameters:
+            limit: Maximum number of records to return.
+            cursor: Opaque cursor from a previous page's next_cursor.
+        
+        Records come from the results store, so committed edits are listed
+        without rendering a workbook. Without limit or cursor the full list is
+        returned. With either of them the response is a page: {"items": [...],
+        "next_cursor": ..., "total": ...}, where the cursor is the last row id
+        of the page, so later pages are keyset queries on the store's id.
+        
         Returns:
             JSON response with list of processed JSON files.
         """
         try:
-            # Path to the results directory
-            results_dir = 'results'
-            
-            # Check if the directory exists
-            if not os.path.exists(results_dir):
-                logger.warning(f"Results directory not found: {results_dir}")
-                return jsonify([]), 200
-            
-            # Get the main Excel file
-            excel_path = os.path.join(results_dir, 'api_responses.xlsx')
-            
-            # Check if the file exists
-            if not os.path.exists(excel_path):
-                logger.warning(f"Excel file not found: {excel_path}")
-                return jsonify([]), 200
-            
-            # Read the Excel file
-            df = pd.read_excel(excel_path)
-            
-            # Extract the processed JSONs
-            processed_jsons = []
-            for index, row in df.iterrows():
-                # Extract the filename from the path
-                file_path = row['Input JSON']
-                file_name = os.path.basename(file_path)
-                
-                # Extract the ID from the filename
-                id = file_name.replace('example', '').replace('.json', '')
-                
-                # Create a record
-                record = {
-                    'id': id,
-                    'file_name': file_name,
-                    'timestamp': row['Timestamp'],
-                    'status': row['Status']
-                }
-                
-                processed_jsons.append(record)
+            paginate = 'limit' in request.args or 'cursor' in request.args
             
-            logger.info(f"Returning {len(processed_jsons)} processed JSON records")
-            return jsonify(processed_jsons), 200
+            # Parse the pagination parameters
+            try:
+                start = int(request.args.get('cursor') or 0)
+                limit = int(request.args['limit']) if 'limit' in request.args else None
+                if start < 0 or (limit is not None and limit <= 0):
+                    raise ValueError
+            except ValueError:
+                logger.error("Invalid limit or cursor parameter")
+                return jsonify({
+                    "status": "error",
+                    "message": "limit must be a positive integer and cursor a value returned by a previous page"
+                }), 400
+            
+            if not paginate:
+                processed_jsons = [self._processed_json_record(row) for row in self.results_store.list_results()]
+                logger.info(f"Returning {len(processed_jsons)} processed JSON records")
+                return jsonify(processed_jsons), 200
+            
+            # One extra row tells whether there is a next page
+            rows = self.results_store.list_results(after_id=start, limit=None if limit is None else limit + 1)
+            has_more = limit is not None and len(rows) > limit
+            rows = rows[:limit]
+            items = [self._processed_json_record(row) for row in rows]
+            next_cursor = str(rows[-1]['id']) if has_more else None
+            total = self.results_store.count()
+            
+            logger.info(f"Returning {len(items)} of {total} processed JSON records from cursor {start}")
+            return jsonify({
+                "items": items,
+                "next_cursor": next_cursor,
+                "total": total
+            }), 200
             
         except Exception as e:
             logger.error(f"Error getting processed JSONs: {str(e)}")
@@ -248,6 +339,24 @@ class ApiService:
                 "message": f"Error getting processed JSONs: {str(e)}"
             }), 500
     
+    @staticmethod
+    def _processed_json_record(row):
+        """
+        Build the /processed-jsons record of a results store row.
+        
+        Args:
+            row: Row from ResultsStore.list_results.
+            
+        Returns:
+            Dictionary with id, file_name, timestamp and status.
+        """
+        return {
+            'id': row['report_id'],
+            'file_name': report_file_name(row['file_path']) if row['file_path'] else None,
+            'timestamp': row['timestamp'],
+            'status': row['status']
+        }
+    
     def process_json(self):
         """
         Process a JSON request.
@@ -273,7 +382,7 @@ class ApiService:
                     "message": "No JSON data received"
                 }), 400
             
-            logger.info(f"Received JSON request: {data}")
+            self.payload_log.info("Received JSON request", data)
             
             # Extract the file path and operation
             file_path = data.get('file_path')
@@ -299,7 +408,7 @@ class ApiService:
                 "operation": operation
             }
             
-            logger.info(f"Processed request successfully: {response}")
+            self.payload_log.info("Processed request successfully", response)
             return jsonify(response), 200
         
         except Exception as e:
@@ -313,6 +422,9 @@ class ApiService:
         """
         Edit 1 feature: Modify the JSON data.
         
+        The original is left untouched. Only the modified paths are copied, so
+        the result shares all unchanged values with the input.
+        
         Args:
             data: The JSON data to modify.
             
@@ -320,16 +432,7 @@ class ApiService:
             Modified JSON data.
         """
         try:
-            # Make a deep copy of the data to avoid modifying the original
-            edited_data = copy.deepcopy(data)
-            
-            # Add an "edited" flag
-            edited_data["edited"] = True
-            edited_data["edit_version"] = "Edit 1"
-            
-            # If there's a "properties" field, modify it
-            if "properties" in edited_data:
-                edited_data["properties"]["processed"] = True
+            edited_data = apply_edit_overlay(data)
             
             logger.info("Applied Edit 1 to data")
             return edited_data
@@ -385,9 +488,9 @@ class ApiService:
             
             # Validate JSON format
             try:
-                with open(file_path, 'r') as f:
-                    json.load(f)
-            except json.JSONDecodeError as e:
+                with open(file_path, 'rb') as f:
+                    json_codec.load(f)
+            except json_codec.JSONDecodeError as e:
                 # Remove the invalid file
                 os.remove(file_path)
                 logger.error(f"Invalid JSON format: {str(e)}")
@@ -418,6 +521,9 @@ class ApiService:
         """
         Process multiple JSON files uploaded in bulk.
         
+        ?stream=true or "Accept: application/x-ndjson" streams one result per line
+        as each file is done, followed by a summary line.
+        
         Returns:
             JSON response with status and processing results.
         """
@@ -461,64 +567,46 @@ class ApiService:
             # Process each file
             processed_files = []
             failed_files = []
+            uploads = []
             
             for file in files:
-                try:
-                    # Skip if no filename
-                    if file.filename == '':
-                        continue
-                    
-                    # Log file information
-                    logger.info(f"Processing file: {file.filename}, Content-Type: {file.content_type}")
-                    
-                    # Check if it's a JSON file
-                    if not file.filename.endswith('.json'):
-                        failed_files.append({
-                            "filename": file.filename,
-                            "reason": "Not a JSON file"
-                        })
-                        continue
-                    
-                    # Save the file
-                    file_path = os.path.join(upload_dir, file.filename)
-                    file.save(file_path)
-                    logger.info(f"Saved file to: {file_path}")
-                    
-                    # Validate JSON format
-                    try:
-                        with open(file_path, 'r') as f:
-                            json_data = json.load(f)
-                            
-                            # Process the JSON data (apply the edit function)
-                            processed_data = self.edit_data(json_data)
-                            
-                            # Save the processed data back to the file
-                            with open(file_path, 'w') as f_write:
-                                json.dump(processed_data, f_write, indent=2)
-                            
-                            processed_files.append({
-                                "filename": file.filename,
-                                "path": file_path,
-                                "status": "success"
-                            })
-                            logger.info(f"Successfully processed file: {file.filename}")
-                            
-                    except json.JSONDecodeError as e:
-                        # Remove the invalid file
-                        os.remove(file_path)
-                        error_message = f"Invalid JSON format: {str(e)}"
-                        logger.error(f"Error with file {file.filename}: {error_message}")
-                        failed_files.append({
-                            "filename": file.filename,
-                            "reason": error_message
-                        })
-                        
-                except Exception as e:
-                    error_message = f"Processing error: {str(e)}"
-                    logger.error(f"Error processing file {file.filename}: {error_message}")
+                # Skip if no filename
+                if file.filename == '':
+                    continue
+                
+                # Log file information
+                logger.info(f"Processing file: {file.filename}, Content-Type: {file.content_type}")
+                
+                # Check if it's a JSON file
+                if not file.filename.endswith('.json'):
                     failed_files.append({
                         "filename": file.filename,
-                        "reason": error_message
+                        "reason": "Not a JSON file"
+                    })
+                    continue
+                
+                # Take over the upload's stream: Flask closes request files when the view
+                # returns, before a streamed response has read them
+                uploads.append((file.filename, file.stream))
+                file.stream = io.BytesIO()
+            
+            # Uploads are read and submitted as earlier ones finish, not all up front
+            pending = self._submit_uploads(uploads, upload_dir)
+            
+            if self._wants_ndjson():
+                return Response(
+                    stream_with_context(self._stream_uploads(pending, failed_files)),
+                    mimetype=NDJSON_MIMETYPE
+                )
+            
+            # Collect the results in upload order
+            for result in self._iter_upload_results(pending):
+                if result["status"] == "success":
+                    processed_files.append(result)
+                else:
+                    failed_files.append({
+                        "filename": result["filename"],
+                        "reason": result["reason"]
                     })
             
             # Prepare response
@@ -543,6 +631,148 @@ class ApiService:
                 "message": error_message
             }), 500
     
+    def _submit_uploads(self, uploads, upload_dir):
+        """
+        Read and submit uploads, keeping at most upload_window of them in flight.
+        
+        The next upload is only read once the oldest one is taken, so a large
+        request does not hold every body in memory and in the pool's queue.
+        
+        Args:
+            uploads: (filename, stream) pairs; each stream is closed once read.
+            upload_dir: Directory the processed files are written to.
+            
+        Yields:
+            (filename, future) pairs, in upload order.
+        """
+        pending = deque()
+        try:
+            for filename, stream in uploads:
+                try:
+                    # Read the upload once; it is parsed, edited and written by a worker
+                    with stream:
+                        raw = stream.read()
+                    future = self._submit_upload(filename, raw, upload_dir)
+                except Exception as e:
+                    future = Future()
+                    future.set_exception(e)
+                pending.append((filename, future))
+                if len(pending) >= self.upload_window:
+                    yield pending.popleft()
+            while pending:
+                yield pending.popleft()
+        finally:
+            # Stop queued uploads if the request stops early
+            for _, future in pending:
+                future.cancel()
+            for _, stream in uploads:
+                stream.close()
+    
+    def _iter_upload_results(self, pending):
+        """
+        Wait for the submitted uploads and yield their results in upload order.
+        
+        Args:
+            pending: (filename, future) pairs from _submit_uploads.
+            
+        Yields:
+            Per-file results of process_upload.
+        """
+        for filename, future in pending:
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {
+                    "filename": filename,
+                    "status": "error",
+                    "reason": f"Processing error: {str(e)}"
+                }
+            
+            if result["status"] == "success":
+                logger.info(
+                    f"Successfully processed file: {result['filename']} "
+                    f"({result['bytes_read']} bytes in, {result['bytes_written']} bytes out, "
+                    f"{result['total_time']:.3f}s)"
+                )
+            else:
+                logger.error(f"Error with file {result['filename']}: {result['reason']}")
+            
+            yield result
+    
+    def _stream_uploads(self, pending, failed_files):
+        """
+        Yield one NDJSON line per upload as it is done, followed by a summary line.
+        
+        Args:
+            pending: (filename, future) pairs from _submit_uploads.
+            failed_files: Uploads rejected before processing.
+            
+        Yields:
+            NDJSON lines.
+        """
+        processed_count = 0
+        failed_count = 0
+        try:
+            for failed in failed_files:
+                failed_count += 1
+                yield self._ndjson_line({
+                    "filename": failed["filename"],
+                    "status": "error",
+                    "reason": failed["reason"]
+                })
+            
+            for result in self._iter_upload_results(pending):
+                if result["status"] == "success":
+                    processed_count += 1
+                else:
+                    failed_count += 1
+                yield self._ndjson_line(result)
+            
+            logger.info(f"Bulk processing completed: {processed_count} successful, {failed_count} failed")
+            yield self._ndjson_line({
+                "status": "success",
+                "message": f"Processed {processed_count} files successfully, {failed_count} failed",
+                "processedCount": processed_count,
+                "failedCount": failed_count
+            })
+        
+        except Exception as e:
+            # Headers are already sent; report the failure in-band
+            logger.error(f"Error streaming bulk upload results: {str(e)}")
+            yield self._ndjson_line({
+                "status": "error",
+                "message": f"Error handling bulk file upload: {str(e)}"
+            })
+    
+    def _submit_upload(self, filename, raw, upload_dir):
+        """
+        Hand an upload to the upload pool.
+        
+        Args:
+            filename: Name of the uploaded file.
+            raw: Contents of the upload.
+            upload_dir: Directory the processed file is written to.
+            
+        Returns:
+            A future resolving to the per-file result of process_upload.
+        """
+        if self.upload_workers == 0:
+            # Process inline, wrapped in a future like the pooled path
+            future = Future()
+            future.set_result(process_upload(filename, raw, upload_dir))
+            return future
+        
+        with self._upload_pool_lock:
+            if self._upload_pool is None:
+                # Spawned workers avoid forking a process that runs writer and loader threads
+                self._upload_pool = ProcessPoolExecutor(
+                    max_workers=self.upload_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                logger.info(f"Started upload pool with {self.upload_workers} workers")
+        
+        return self._upload_pool.submit(process_upload, filename, raw, upload_dir)
+    
     def process_edit(self):
         """
         Process a JSON edit request. This endpoint accepts JSON with a file_path parameter
@@ -550,6 +780,13 @@ class ApiService:
         
         It can also accept multiple file paths via the file_paths parameter.
         
+        With "async": true in the body (or ?async=true) the edit runs as a background
+        job and the response is 202 with the job ID; poll /jobs/<job_id> for status and
+        progress and fetch the outcome from /jobs/<job_id>/result.
+        
+        For file_paths, ?stream=true or "Accept: application/x-ndjson" streams one
+        result per line as each file is done, followed by a summary line.
+        
         Returns:
             JSON response with edit status.
         """
@@ -570,6 +807,7 @@ class ApiService:
             file_path = data.get('file_path')
             file_paths = data.get('file_paths', [])
             edit_id = data.get('edit_id', 'Edit 1')  # Default to Edit 1 if not provided
+            run_async = is_truthy(data.get('async', request.args.get('async')))
             
             # Validate input
             if not file_path and not file_paths:
@@ -579,187 +817,357 @@ class ApiService:
                     "message": "Either file_path or file_paths parameter is required"
                 }), 400
             
-            # Process either single file or multiple files
-            if file_path:
-                # Single file case
-                logger.info(f"Processing single file from path: {file_path}")
-                
-                # Validate that the file exists
-                if not os.path.isfile(file_path):
-                    logger.error(f"File not found: {file_path}")
-                    return jsonify({
-                        "status": "error",
-                        "message": f"File not found at path: {file_path}"
-                    }), 404
-                
-                # Load and parse the JSON file
-                try:
-                    with open(file_path, 'r') as file:
-                        json_data = json.load(file)
-                        
-                    logger.info(f"Successfully loaded JSON from {file_path}")
-                    
-                    # Process single file
-                    processed_data = {
-                        "input": json_data,
-                        "edit_id": edit_id,
-                        "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        "status": "Success",
-                        "file_path": file_path
-                    }
-                    
-                    # Save to Excel
-                    self._save_edit_to_excel(processed_data)
-                    
-                    return jsonify({
-                        "status": "success",
-                        "message": "Edit is working properly",
-                        "edit_id": edit_id,
-                        "processed": True
-                    }), 200
+            if not file_path and (not isinstance(file_paths, list) or len(file_paths) == 0):
+                logger.error("Invalid file_paths parameter: must be a non-empty list")
+                return jsonify({
+                    "status": "error",
+                    "message": "file_paths must be a non-empty list of file paths"
+                }), 400
+            
+            if run_async:
+                job = self.job_manager.submit(
+                    "process-edit",
+                    lambda job: self._run_edit(file_path, file_paths, edit_id, job.update_progress)
+                )
+                return self._job_accepted(job)
+            
+            if not file_path and self._wants_ndjson():
+                return Response(
+                    stream_with_context(self._stream_edit(file_paths, edit_id)),
+                    mimetype=NDJSON_MIMETYPE
+                )
+            
+            body, status_code = self._run_edit(file_path, file_paths, edit_id)
+            return jsonify(body), status_code
+        
+        except ResultsWriteError as e:
+            # The edit was applied but could not be recorded; the client is not at fault
+            logger.error(f"Error recording edit results: {str(e)}")
+            return jsonify({
+                "status": "error",
+                "message": f"Edit results could not be recorded: {str(e)}"
+            }), 503
+        except Exception as e:
+            logger.error(f"Error processing edit: {str(e)}")
+            return jsonify({
+                "status": "error",
+                "message": f"Error processing edit: {str(e)}"
+            }), 500
+    
+    def _run_edit(self, file_path, file_paths, edit_id, progress=None):
+        """
+        Apply an edit to one file or a list of files and queue the results.
+        
+        Runs on the request thread or, for async requests, on a job worker.
+        
+        Args:
+            file_path: Path of a single file, or None.
+            file_paths: Paths of several files, used when file_path is not set.
+            edit_id: ID of the edit.
+            progress: Optional callback taking (completed, total).
+            
+        Returns:
+            Tuple of the response body and the HTTP status code.
+            
+        Raises:
+            ResultsWriteError: If the results writer could not commit queued rows.
+        """
+        # Process either single file or multiple files
+        if file_path:
+            # Single file case
+            logger.info(f"Processing single file from path: {file_path}")
+            
+            # Validate that the file exists
+            if not os.path.isfile(file_path):
+                logger.error(f"File not found: {file_path}")
+                return {
+                    "status": "error",
+                    "message": f"File not found at path: {file_path}"
+                }, 404
+            
+            # Load and parse the JSON file
+            try:
+                with open(file_path, 'rb') as file:
+                    json_data = json_codec.load(file)
                     
-                except Exception as e:
-                    logger.error(f"Error parsing JSON file: {str(e)}")
-                    return jsonify({
-                        "status": "error",
-                        "message": f"Error parsing JSON file: {str(e)}"
-                    }), 400
+                logger.info(f"Successfully loaded JSON from {file_path}")
                 
-            else:
-                # Multiple files case
-                logger.info(f"Processing multiple files: {file_paths}")
-                
-                if not isinstance(file_paths, list) or len(file_paths) == 0:
-                    logger.error("Invalid file_paths parameter: must be a non-empty list")
-                    return jsonify({
-                        "status": "error",
-                        "message": "file_paths must be a non-empty list of file paths"
-                    }), 400
-                
-                results = []
-                success_count = 0
-                error_count = 0
+                # Process single file
+                processed_data = {
+                    "input": json_data,
+                    "edit_id": edit_id,
+                    "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "status": "Success",
+                    "file_path": file_path
+                }
                 
-                for index, path in enumerate(file_paths):
-                    try:
-                        # Validate that the file exists
-                        if not os.path.isfile(path):
-                            logger.warning(f"File not found: {path}")
-                            results.append({
-                                "file_path": path,
-                                "status": "error",
-                                "message": f"File not found at path: {path}"
-                            })
-                            error_count += 1
-                            continue
-                        
-                        # Load and parse the JSON file
-                        with open(path, 'r') as file:
-                            json_data = json.load(file)
-                        
-                        logger.info(f"Successfully loaded JSON from {path}")
-                        
-                        # Process file
-                        file_edit_id = f"{edit_id}_{index + 1}" if len(file_paths) > 1 else edit_id
-                        processed_data = {
-                            "input": json_data,
-                            "edit_id": file_edit_id,
-                            "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "status": "Success",
-                            "file_path": path
-                        }
-                        
-                        # Save to Excel
-                        self._save_edit_to_excel(processed_data)
-                        
-                        # Add to results
-                        results.append({
-                            "file_path": path,
-                            "status": "success",
-                            "edit_id": file_edit_id
-                        })
-                        success_count += 1
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing file {path}: {str(e)}")
-                        results.append({
-                            "file_path": path,
-                            "status": "error",
-                            "message": str(e)
-                        })
-                        error_count += 1
+                # Queue the result for the background writer
+                self.results_writer.submit(self._build_result_row(processed_data))
+                if progress:
+                    progress(1, 1)
                 
-                return jsonify({
-                    "status": "success" if error_count == 0 else "partial",
-                    "message": "Edit processing completed",
-                    "summary": {
-                        "total": len(file_paths),
-                        "success": success_count,
-                        "error": error_count
-                    },
+                return {
+                    "status": "success",
+                    "message": "Edit is working properly",
                     "edit_id": edit_id,
-                    "results": results,
                     "processed": True
-                }), 200
+                }, 200
+                
+            except ResultsWriteError:
+                raise
+            except Exception as e:
+                logger.error(f"Error parsing JSON file: {str(e)}")
+                return {
+                    "status": "error",
+                    "message": f"Error parsing JSON file: {str(e)}"
+                }, 400
+        
+        # Multiple files case
+        self.payload_log.info(f"Processing {len(file_paths)} files", file_paths)
+        
+        results = []
+        result_rows = []
+        
+        for result, row in self._iter_edit_files(file_paths, edit_id, progress):
+            results.append(result)
+            if row is not None:
+                # Collect the result; all rows are queued once per request
+                result_rows.append(row)
+        
+        # Queue the request's rows for the background writer in one go
+        self.results_writer.submit_many(result_rows)
+        
+        body = self._edit_summary(file_paths, edit_id, results)
+        body["results"] = results
+        body["processed"] = True
+        return body, 200
+    
+    def _stream_edit(self, file_paths, edit_id):
+        """
+        Apply an edit to a list of files, yielding one NDJSON line per file.
+        
+        Each line holds the per-file result as soon as the file is done; the last
+        line holds the summary. Rows are queued for the writer file by file, so
+        no processed document is kept until the end of the request.
+        
+        Args:
+            file_paths: Paths of the files.
+            edit_id: ID of the edit.
+            
+        Yields:
+            NDJSON lines.
+        """
+        self.payload_log.info(f"Streaming {len(file_paths)} files", file_paths)
+        
+        results = []
+        try:
+            for result, row in self._iter_edit_files(file_paths, edit_id):
+                if row is not None:
+                    self.results_writer.submit(row)
+                results.append(result)
+                yield self._ndjson_line(result)
+            
+            yield self._ndjson_line(self._edit_summary(file_paths, edit_id, results))
         
         except Exception as e:
-            logger.error(f"Error processing edit: {str(e)}")
-            return jsonify({
+            # Headers are already sent; report the failure in-band
+            logger.error(f"Error streaming edit: {str(e)}")
+            yield self._ndjson_line({
                 "status": "error",
                 "message": f"Error processing edit: {str(e)}"
-            }), 500
+            })
+    
+    def _iter_edit_files(self, file_paths, edit_id, progress=None):
+        """
+        Load a list of files and build their edit results, in request order.
+        
+        Args:
+            file_paths: Paths of the files.
+            edit_id: ID of the edit.
+            progress: Optional callback taking (completed, total).
+            
+        Yields:
+            Tuples of the per-file result and its results store row (None on error).
+        """
+        if progress:
+            progress(0, len(file_paths))
+        
+        # Files are loaded a few at a time ahead of the one being processed, in request order
+        futures = self._load_files(file_paths)
+        
+        for index, (path, future) in enumerate(zip(file_paths, futures)):
+            try:
+                try:
+                    json_data = future.result()
+                except FileNotFoundError:
+                    logger.warning(f"File not found: {path}")
+                    yield {
+                        "file_path": path,
+                        "status": "error",
+                        "message": f"File not found at path: {path}"
+                    }, None
+                    continue
+                finally:
+                    # Only this file's document and the window's loads are held
+                    future = None
+                    if progress:
+                        progress(index + 1)
+                
+                logger.info(f"Successfully loaded JSON from {path}")
+                
+                # Process file
+                file_edit_id = f"{edit_id}_{index + 1}" if len(file_paths) > 1 else edit_id
+                processed_data = {
+                    "input": json_data,
+                    "edit_id": file_edit_id,
+                    "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "status": "Success",
+                    "file_path": path
+                }
+                row = self._build_result_row(processed_data)
+                
+            except Exception as e:
+                logger.error(f"Error processing file {path}: {str(e)}")
+                yield {
+                    "file_path": path,
+                    "status": "error",
+                    "message": str(e)
+                }, None
+                continue
             
-    def _save_edit_to_excel(self, processed_data):
+            yield {
+                "file_path": path,
+                "status": "success",
+                "edit_id": file_edit_id
+            }, row
+    
+    def _load_files(self, file_paths):
         """
-        Save the processed edit data to Excel.
+        Load files on the loader threads, keeping at most file_load_window loads in flight.
         
         Args:
-            processed_data: Data to save to Excel.
+            file_paths: Paths of the files.
+            
+        Yields:
+            The future of each file's parsed document, in request order.
         """
+        pending = deque()
         try:
-            # Path to the Excel file
-            excel_path = os.path.join('results', 'api_responses.xlsx')
+            for path in file_paths:
+                pending.append(self.file_loader.submit(self._read_json_file, path))
+                if len(pending) >= self.file_load_window:
+                    yield pending.popleft()
+            while pending:
+                yield pending.popleft()
+        finally:
+            # Stop queued loads if the request stops early
+            for future in pending:
+                future.cancel()
+    
+    def _edit_summary(self, file_paths, edit_id, results):
+        """
+        Build the summary part of a multi-file edit response.
+        
+        Args:
+            file_paths: Paths of the files.
+            edit_id: ID of the edit.
+            results: Per-file results.
             
-            # Create results directory if it doesn't exist
-            os.makedirs(os.path.dirname(excel_path), exist_ok=True)
+        Returns:
+            Dictionary with the overall status and counts.
+        """
+        success_count = sum(1 for result in results if result["status"] == "success")
+        error_count = len(results) - success_count
+        
+        return {
+            "status": "success" if error_count == 0 else "partial",
+            "message": "Edit processing completed",
+            "summary": {
+                "total": len(file_paths),
+                "success": success_count,
+                "error": error_count
+            },
+            "edit_id": edit_id
+        }
+    
+    def _wants_ndjson(self):
+        """
+        Check whether the client asked for a streamed NDJSON response.
+        
+        Streaming is selected with ?stream=true or an Accept header that prefers
+        application/x-ndjson over application/json.
+        
+        Returns:
+            True if the response should be streamed.
+        """
+        if is_truthy(request.args.get('stream')):
+            return True
+        accept = request.accept_mimetypes
+        return accept[NDJSON_MIMETYPE] > accept['application/json']
+    
+    @staticmethod
+    def _ndjson_line(record):
+        """Encode a record as one NDJSON line."""
+        return json_codec.dumps(record) + "\n"
+    
+    def _job_accepted(self, job):
+        """
+        Build the response for a newly submitted job.
+        
+        Args:
+            job: The submitted job.
             
-            # Check if Excel file exists, create it if not
-            if os.path.exists(excel_path):
-                # Read existing Excel file
-                try:
-                    df = pd.read_excel(excel_path, sheet_name="Processed JSON")
-                except ValueError:
-                    # If "Processed JSON" sheet doesn't exist, create a new DataFrame
-                    df = pd.DataFrame(columns=["edit_id", "timestamp", "status", "json_input", "response"])
-            else:
-                # Create a new DataFrame if the file doesn't exist
-                df = pd.DataFrame(columns=["edit_id", "timestamp", "status", "json_input", "response"])
-            
-            # Convert the input and response to JSON strings
-            json_input = json.dumps(processed_data["input"], indent=2)
-            response = json.dumps({"message": "Edit is working properly"}, indent=2)
-            
-            # Create a new row for the DataFrame
-            new_row = {
-                "edit_id": processed_data["edit_id"],
-                "timestamp": processed_data["timestamp"],
-                "status": processed_data["status"],
-                "json_input": json_input,
-                "response": response
-            }
+        Returns:
+            JSON response with the job ID and its status and result URLs.
+        """
+        return jsonify({
+            "status": "accepted",
+            "job_id": job.id,
+            "status_url": f"/jobs/{job.id}",
+            "result_url": f"/jobs/{job.id}/result"
+        }), 202
             
-            # Append the new row to the DataFrame
-            df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
+    def _read_json_file(self, path):
+        """
+        Load and parse a JSON file. Runs on the file loader pool.
+        
+        Args:
+            path: Path to the JSON file.
             
-            # Write the DataFrame to Excel
-            with pd.ExcelWriter(excel_path, engine='openpyxl', mode='w') as writer:
-                df.to_excel(writer, sheet_name="Processed JSON", index=False)
-                
-            logger.info(f"Successfully saved edit data to Excel: {excel_path}")
+        Returns:
+            The parsed JSON data.
+            
+        Raises:
+            FileNotFoundError: If the path is not an existing file.
+        """
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
         
-        except Exception as e:
-            logger.error(f"Error saving edit data to Excel: {str(e)}")
-            raise
+        with open(path, 'rb') as file:
+            return json_codec.load(file)
+    
+    def _build_result_row(self, processed_data):
+        """
+        Build a results store row from the processed edit data.
+        
+        Args:
+            processed_data: Data to record.
+            
+        Returns:
+            Dictionary with the result columns.
+        """
+        # Convert the input and response to JSON strings
+        json_input = json_codec.dumps(processed_data["input"], pretty=True)
+        response = json_codec.dumps({"message": "Edit is working properly"}, pretty=True)
+        
+        return {
+            "edit_id": processed_data["edit_id"],
+            "timestamp": processed_data["timestamp"],
+            "status": processed_data["status"],
+            "file_path": processed_data.get("file_path"),
+            "json_input": json_input,
+            "response": response
+        }
     
     def run(self):
         """Run the API server."""
@@ -769,6 +1177,14 @@ class ApiService:
         except Exception as e:
             logger.error(f"Error running API server: {str(e)}")
             raise
+        finally:
+            # Let running jobs finish, then commit any rows still waiting in the writer queue
+            self.job_manager.shutdown()
+            self.results_writer.close()
+            self.report_partitions.close()
+            self.file_loader.shutdown(wait=False)
+            if self._upload_pool is not None:
+                self._upload_pool.shutdown()
 
 # For direct execution testing
 if __name__ == "__main__":
@@ -1,7 +1,7 @@
 import sqlite3
 import os
+import sys
 import logging
-import json
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
@@ -10,6 +10,11 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 import dotenv
 
+# Add the current directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json_codec
+
 # Configure logging
 logging.basicConfig(
     filename='logs/db_manager.log',
@@ -143,7 +148,7 @@ class DatabaseManager:
         """
         try:
             # Convert API response to JSON string
-            api_response_str = json.dumps(api_response)
+            api_response_str = json_codec.dumps(api_response)
             
             # Get current timestamp
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -216,7 +221,7 @@ class DatabaseManager:
                         "edit_id": record["edit_id"],
                         "timestamp": record["timestamp"],
                         "input_json": record["input_json"],
-                        "api_response": json.loads(record["api_response"]),
+                        "api_response": json_codec.loads(record["api_response"]),
                         "expected_result": record["expected_result"]
                     }
                     logger.info(f"Retrieved response for edit_id {edit_id}")
@@ -241,7 +246,7 @@ class DatabaseManager:
                         "edit_id": record["edit_id"],
                         "timestamp": record["timestamp"].strftime("%Y-%m-%d %H:%M:%S"),
                         "input_json": record["input_json"],
-                        "api_response": json.loads(record["api_response"]),
+                        "api_response": json_codec.loads(record["api_response"]),
                         "expected_result": record["expected_result"]
                     }
                     logger.info(f"Retrieved response for edit_id {edit_id}")
@@ -281,7 +286,7 @@ class DatabaseManager:
                         "edit_id": record["edit_id"],
                         "timestamp": record["timestamp"],
                         "input_json": record["input_json"],
-                        "api_response": json.loads(record["api_response"]),
+                        "api_response": json_codec.loads(record["api_response"]),
                         "expected_result": record["expected_result"]
                     })
             
@@ -299,7 +304,7 @@ class DatabaseManager:
                         "edit_id": record["edit_id"],
                         "timestamp": record["timestamp"].strftime("%Y-%m-%d %H:%M:%S"),
                         "input_json": record["input_json"],
-                        "api_response": json.loads(record["api_response"]),
+                        "api_response": json_codec.loads(record["api_response"]),
                         "expected_result": record["expected_result"]
                     })
             
@@ -0,0 +1,233 @@
+import os
+import sys
+import time
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+# Add the current directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json_codec
+from output_formats import OutputFormat
+
+# Shared by the Flask services and the command-line scripts, which configure logging themselves
+logger = logging.getLogger(__name__)
+
+class EditExecutor:
+    """
+    Applies an edit transform to many JSON files in worker processes.
+
+    Only file paths and a reference to the transform are sent to the workers.
+    Each worker reads its file, applies the transform and writes the output
+    file itself, so edited documents never travel between processes as
+    pickled objects. A worker returns a small result dict, optionally with
+    the edited document as encoded JSON bytes that the caller can splice into
+    a response without decoding it.
+
+    The transform (and the optional analyze function) must be defined at
+    module level so the workers can import them.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None):
+        """
+        Initialize the EditExecutor.
+
+        Args:
+            max_workers: Number of worker processes. Defaults to the number of
+                CPUs; 0 runs every edit inline in the calling process.
+            max_pending: Files queued or running at a time. Defaults to four
+                per worker, enough to keep the workers busy while results are
+                collected in order.
+        """
+        self.max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+        self.max_pending = max_pending or 4 * max(1, self.max_workers)
+
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def map_files(self, file_paths: Iterable[str], transform: Callable[[Any], Any],
+                  output_dir: Optional[str] = None, output_prefix: str = "processed_",
+                  pretty: bool = False, analyze: Optional[Callable[[Any], Dict[str, Any]]] = None,
+                  return_data: bool = False, ordered: bool = True,
+                  output_format: Optional[OutputFormat] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Edit files, yielding one result per file as the workers finish them.
+
+        Args:
+            file_paths: Paths of the JSON files.
+            transform: Function taking the decoded document and returning the edited one.
+            output_dir: Directory the workers write the edited files to, or None to not write them.
+            output_prefix: Prefix of the output file names.
+            pretty: Indent the output files.
+            analyze: Function summarizing the edited document in a small dict,
+                returned in the result's "analysis".
+            return_data: Return the edited document, encoded as compact JSON bytes, in "data".
+            ordered: Yield results in the order of file_paths rather than as they complete.
+            output_format: Layout and compression of the output files, overriding
+                pretty; output file names take the format's extension.
+
+        Yields:
+            Dictionaries with file_path, filename, status ("success" or
+            "error"), output_path, bytes_read, bytes_written and elapsed, or
+            error for failed files.
+        """
+        tasks = (
+            (file_path, transform, self._output_path(file_path, output_dir, output_prefix, output_format),
+             pretty, analyze, return_data, output_format)
+            for file_path in file_paths
+        )
+
+        if self.max_workers == 0:
+            for task in tasks:
+                yield edit_file(*task)
+            return
+
+        pool = self._get_pool()
+        try:
+            if ordered:
+                yield from self._map_ordered(pool, tasks)
+            else:
+                yield from self._map_unordered(pool, tasks)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool for the next call
+            self._discard_pool(pool)
+            raise
+
+    def close(self):
+        """Shut the worker processes down."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Start the worker processes on first use."""
+        with self._pool_lock:
+            if self._pool is None:
+                # Spawned workers avoid forking a process that runs server threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                logger.info(f"Started edit pool with {self.max_workers} workers")
+            return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor):
+        """Forget a broken pool so that _get_pool starts a new one."""
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
+
+    def _map_ordered(self, pool, tasks) -> Iterator[Dict[str, Any]]:
+        """Keep up to max_pending files in flight and yield their results in submission order."""
+        pending = deque()
+        try:
+            for task in tasks:
+                pending.append(pool.submit(edit_file, *task))
+                if len(pending) >= self.max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Stop queued edits if the caller stops early
+            for future in pending:
+                future.cancel()
+
+    def _map_unordered(self, pool, tasks) -> Iterator[Dict[str, Any]]:
+        """Keep up to max_pending files in flight and yield their results as they complete."""
+        pending = set()
+        try:
+            for task in tasks:
+                if len(pending) >= self.max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                pending.add(pool.submit(edit_file, *task))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    @staticmethod
+    def _output_path(file_path: str, output_dir: Optional[str], output_prefix: str,
+                     output_format: Optional[OutputFormat] = None) -> Optional[str]:
+        """Return the output file of an input file, if outputs are written."""
+        if output_dir is None:
+            return None
+        name = f"{output_prefix}{os.path.basename(file_path)}"
+        if output_format is not None:
+            name = output_format.file_name(name)
+        return os.path.join(output_dir, name)
+
+def edit_file(file_path: str, transform: Callable[[Any], Any], output_path: Optional[str] = None,
+              pretty: bool = False, analyze: Optional[Callable[[Any], Dict[str, Any]]] = None,
+              return_data: bool = False, output_format: Optional[OutputFormat] = None) -> Dict[str, Any]:
+    """
+    Read, edit and write a single JSON file; runs in a worker process.
+
+    Args:
+        file_path: Path of the JSON file.
+        transform: Function taking the decoded document and returning the edited one.
+        output_path: Path the edited document is written to, or None.
+        pretty: Indent the output file.
+        analyze: Function summarizing the edited document.
+        return_data: Return the edited document as compact JSON bytes.
+        output_format: Layout and compression of the output file, overriding pretty.
+
+    Returns:
+        Dictionary with the per-file status, byte counts and timing.
+    """
+    start = time.perf_counter()
+    result = {
+        "file_path": file_path,
+        "filename": os.path.basename(file_path),
+        "output_path": output_path
+    }
+
+    try:
+        with open(file_path, "rb") as f:
+            raw = f.read()
+        edited = transform(json_codec.loads(raw))
+        result["bytes_read"] = len(raw)
+        del raw
+
+        bytes_written = 0
+        encoded = None
+        if output_path is not None and output_format is not None:
+            bytes_written = output_format.write(output_path, edited)
+        elif output_path is not None:
+            encoded = json_codec.dumps_bytes(edited, pretty=pretty)
+            with open(output_path, "wb") as f:
+                f.write(encoded)
+            bytes_written = len(encoded)
+
+        if return_data:
+            result["data"] = encoded if encoded is not None and not pretty else json_codec.dumps_bytes(edited)
+
+        if analyze is not None:
+            result["analysis"] = analyze(edited)
+
+        result["bytes_written"] = bytes_written
+        result["status"] = "success"
+
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e)
+
+    result["elapsed"] = time.perf_counter() - start
+    return result
@@ -0,0 +1,196 @@
+import io
+import gzip
+import json
+import logging
+from typing import Optional
+
+from flask import Flask, Response, request
+from werkzeug.wsgi import get_input_stream
+
+try:
+    import zstandard
+except ImportError:
+    # zstd is optional; gzip is always available
+    zstandard = None
+
+# Shared by the Flask services and the batch client, which configure logging themselves
+logger = logging.getLogger(__name__)
+
+# Content codings this process can read and write, most preferred first
+SUPPORTED_ENCODINGS = ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = 1024
+
+# Largest request body accepted after decompression
+MAX_DECOMPRESSED_BYTES = 1024 * 1024 * 1024
+
+# Bytes decompressed per read
+READ_BLOCK_SIZE = 1024 * 1024
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Errors raised for corrupt compressed bodies
+DECOMPRESSION_ERRORS = (OSError, EOFError, ValueError) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+class BodyTooLarge(ValueError):
+    """Raised when a compressed body expands beyond the allowed size."""
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """
+    Compress a body with a content coding.
+
+    Args:
+        data: Uncompressed body.
+        encoding: "gzip" or "zstd".
+
+    Returns:
+        The compressed body.
+    """
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+def open_decompressed(stream, encoding: str):
+    """
+    Wrap a binary stream so that reading it yields the decompressed body.
+
+    Args:
+        stream: Stream of the compressed body.
+        encoding: "gzip" or "zstd".
+
+    Returns:
+        A readable binary stream.
+    """
+    if encoding == "gzip":
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdDecompressor().stream_reader(stream, read_across_frames=True)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+def decompress(data: bytes, encoding: str, max_size: Optional[int] = MAX_DECOMPRESSED_BYTES) -> bytes:
+    """
+    Decompress a body, refusing to expand it beyond max_size.
+
+    Args:
+        data: Compressed body.
+        encoding: "gzip" or "zstd".
+        max_size: Maximum decompressed size, or None for no limit.
+
+    Returns:
+        The decompressed body.
+    """
+    return _read_limited(open_decompressed(io.BytesIO(data), encoding), max_size)
+
+def parse_encoding(header: Optional[str]) -> Optional[str]:
+    """
+    Return the content coding named by a Content-Encoding header.
+
+    Args:
+        header: Header value.
+
+    Returns:
+        The lower-cased coding, or None for no header or "identity".
+    """
+    encoding = (header or "").strip().lower()
+    if not encoding or encoding == "identity":
+        return None
+    return encoding
+
+def init_app(app: Flask, min_size: int = COMPRESS_MIN_BYTES, max_request_size: int = MAX_DECOMPRESSED_BYTES):
+    """
+    Make a Flask app accept compressed request bodies and compress its responses.
+
+    Request bodies with a supported Content-Encoding are decompressed before
+    the view reads them, so views use request.json as usual; other codings
+    are refused with 415. Responses of at least min_size bytes are compressed
+    with the best coding the client lists in Accept-Encoding. Streamed and
+    file responses are sent as they are.
+
+    Args:
+        app: The Flask application.
+        min_size: Smallest response body that is compressed.
+        max_request_size: Largest request body accepted after decompression.
+    """
+    app.wsgi_app = _RequestDecompressor(app.wsgi_app, max_request_size)
+
+    @app.after_request
+    def compress_response(response):
+        return _compress_response(response, min_size)
+
+class _RequestDecompressor:
+    """WSGI middleware that replaces a compressed request body by its decompressed bytes."""
+
+    def __init__(self, wsgi_app, max_size: int):
+        self.wsgi_app = wsgi_app
+        self.max_size = max_size
+
+    def __call__(self, environ, start_response):
+        encoding = parse_encoding(environ.get("HTTP_CONTENT_ENCODING"))
+        if encoding is None:
+            return self.wsgi_app(environ, start_response)
+
+        if encoding not in SUPPORTED_ENCODINGS:
+            return self._error(f"Unsupported Content-Encoding: {encoding}", 415)(environ, start_response)
+
+        try:
+            body = _read_limited(open_decompressed(get_input_stream(environ), encoding), self.max_size)
+        except BodyTooLarge as e:
+            return self._error(str(e), 413)(environ, start_response)
+        except DECOMPRESSION_ERRORS as e:
+            logger.warning(f"Could not decompress {encoding} request body: {str(e)}")
+            return self._error(f"Invalid {encoding} request body", 400)(environ, start_response)
+
+        environ["wsgi.input"] = io.BytesIO(body)
+        environ["CONTENT_LENGTH"] = str(len(body))
+        environ.pop("HTTP_CONTENT_ENCODING", None)
+        environ.pop("HTTP_TRANSFER_ENCODING", None)
+        environ["wsgi.input_terminated"] = False
+        return self.wsgi_app(environ, start_response)
+
+    @staticmethod
+    def _error(message: str, status: int) -> Response:
+        """Build an error response outside of a Flask request."""
+        response = Response(
+            json.dumps({"status": "error", "message": message}),
+            status=status,
+            mimetype="application/json"
+        )
+        # Tell the client which codings it can use instead (RFC 7694)
+        response.headers["Accept-Encoding"] = ", ".join(SUPPORTED_ENCODINGS)
+        return response
+
+def _compress_response(response, min_size: int):
+    """Compress a response body with the coding the client prefers."""
+    response.vary.add("Accept-Encoding")
+
+    if response.direct_passthrough or response.is_streamed or "Content-Encoding" in response.headers:
+        return response
+
+    encoding = request.accept_encodings.best_match(SUPPORTED_ENCODINGS)
+    if encoding is None:
+        return response
+
+    body = response.get_data()
+    if len(body) < min_size:
+        return response
+
+    response.set_data(compress(body, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+def _read_limited(stream, max_size: Optional[int]) -> bytes:
+    """Read a stream to the end, raising BodyTooLarge past max_size bytes."""
+    parts = []
+    size = 0
+    while True:
+        part = stream.read(READ_BLOCK_SIZE)
+        if not part:
+            return b"".join(parts)
+        size += len(part)
+        if max_size is not None and size > max_size:
+            raise BodyTooLarge(f"Request body exceeds {max_size} bytes when decompressed")
+        parts.append(part)
@@ -0,0 +1,308 @@
+import os
+import uuid
+import pickle
+import shutil
+import logging
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Optional, Callable
+
+from flask import Blueprint, Response, jsonify
+
+# Shared by the Flask services, which configure logging themselves
+logger = logging.getLogger(__name__)
+
+# Finished results larger than this, pickled, are kept on disk instead of in memory
+MAX_RESULT_MEMORY_BYTES = 1024 * 1024
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+class Job:
+    """
+    A unit of work submitted to a JobManager.
+
+    The job function reports progress through update_progress(); its return
+    value becomes the job result, which the JobManager may keep on disk.
+    """
+
+    def __init__(self, kind: str):
+        """
+        Initialize the Job.
+
+        Args:
+            kind: Name of the operation, e.g. "process-edit".
+        """
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.completed = 0
+        self.total = None
+        self.error = None
+        self.submitted_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+
+        self._result = None
+        self._result_path = None
+        self._lock = threading.Lock()
+
+    @property
+    def result(self) -> Any:
+        """Return the job result, loading it from disk if it was spilled there."""
+        if self._result_path is None:
+            return self._result
+        with open(self._result_path, 'rb') as f:
+            return pickle.load(f)
+
+    @property
+    def finished(self) -> bool:
+        """Return True once the job succeeded or failed."""
+        return self.status in (SUCCEEDED, FAILED)
+
+    def update_progress(self, completed: int, total: Optional[int] = None):
+        """
+        Record the job's progress.
+
+        Args:
+            completed: Number of items processed so far.
+            total: Total number of items, if known.
+        """
+        with self._lock:
+            self.completed = completed
+            if total is not None:
+                self.total = total
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return the job's status and progress, without the result.
+
+        Returns:
+            Dictionary describing the job.
+        """
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "progress": {
+                    "completed": self.completed,
+                    "total": self.total
+                },
+                "submitted_at": self.submitted_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "error": self.error
+            }
+
+class JobManager:
+    """
+    Runs long-running requests as background jobs.
+
+    Jobs run on a bounded thread pool. Queued and running jobs are always
+    kept; finished jobs are retained, together with their results, until
+    more than history_size finished jobs exist, oldest first. Results larger
+    than max_result_memory_bytes are written to result_dir and only their
+    path is kept, so the history holds at most history_size small results
+    in memory.
+    """
+
+    def __init__(self, max_workers: int = 4, history_size: int = 100,
+                 result_dir: Optional[str] = None, max_result_memory_bytes: int = MAX_RESULT_MEMORY_BYTES):
+        """
+        Initialize the JobManager.
+
+        Args:
+            max_workers: Number of jobs that run at the same time.
+            history_size: Number of finished jobs kept for status and result lookups.
+            result_dir: Directory for results kept on disk. Defaults to a temporary
+                directory removed with the JobManager.
+            max_result_memory_bytes: Largest pickled result kept in memory.
+        """
+        self.max_workers = max_workers
+        self.history_size = history_size
+        self.max_result_memory_bytes = max_result_memory_bytes
+
+        if result_dir is None:
+            result_dir = tempfile.mkdtemp(prefix="job-results-")
+            weakref.finalize(self, shutil.rmtree, result_dir, True)
+        else:
+            os.makedirs(result_dir, exist_ok=True)
+        self.result_dir = result_dir
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-worker")
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._finished = OrderedDict()
+
+        logger.info(f"JobManager initialized with max_workers={max_workers}, history_size={history_size}")
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        """
+        Queue a job.
+
+        The function is called as fn(job, *args, **kwargs) on a worker thread.
+
+        Args:
+            kind: Name of the operation.
+            fn: Function doing the work.
+
+        Returns:
+            The queued job.
+        """
+        job = Job(kind)
+        with self._lock:
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        logger.info(f"Queued {kind} job {job.id}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Look up a job.
+
+        Args:
+            job_id: ID returned on submission.
+
+        Returns:
+            The job, or None if it is unknown or was dropped from the history.
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop accepting jobs.
+
+        Args:
+            wait: Wait for queued and running jobs to finish.
+        """
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, fn: Callable[..., Any], args, kwargs):
+        """Run a job on a worker thread and record its outcome."""
+        with job._lock:
+            job.status = RUNNING
+            job.started_at = datetime.now().isoformat()
+
+        result = None
+        result_path = None
+        error = None
+        try:
+            result = fn(job, *args, **kwargs)
+            result_path = self._spill_result(job, result)
+            if result_path is not None:
+                result = None
+            logger.info(f"{job.kind} job {job.id} succeeded")
+        except Exception as e:
+            logger.error(f"{job.kind} job {job.id} failed: {str(e)}")
+            error = str(e)
+
+        # Finish and retire the job in one step, so a finished job is always in the history
+        evicted = []
+        with self._lock:
+            with job._lock:
+                job._result = result
+                job._result_path = result_path
+                job.error = error
+                job.status = SUCCEEDED if error is None else FAILED
+                job.finished_at = datetime.now().isoformat()
+
+            self._finished[job.id] = job
+            while len(self._finished) > self.history_size:
+                evicted_id, evicted_job = self._finished.popitem(last=False)
+                self._jobs.pop(evicted_id, None)
+                evicted.append(evicted_job)
+
+        for evicted_job in evicted:
+            if evicted_job._result_path is not None:
+                os.remove(evicted_job._result_path)
+
+    def _spill_result(self, job: Job, result: Any) -> Optional[str]:
+        """Write a large result to result_dir; returns its path, or None if it stays in memory."""
+        if result is None:
+            return None
+        data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) <= self.max_result_memory_bytes:
+            return None
+
+        path = os.path.join(self.result_dir, f"{job.id}.pickle")
+        with open(path, 'wb') as f:
+            f.write(data)
+        logger.info(f"Kept the {len(data)}-byte result of {job.kind} job {job.id} on disk")
+        return path
+
+def is_truthy(value) -> bool:
+    """Interpret a body or query flag such as true, "true" or "1"."""
+    if isinstance(value, str):
+        return value.lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+def job_blueprint(job_manager: JobManager) -> Blueprint:
+    """
+    Build the routes reporting on background jobs.
+
+    GET /jobs/<job_id> returns a job's status and progress.
+    GET /jobs/<job_id>/result returns its result once it succeeded, the job
+    status with 202 while it is still running, or the error with 500 if it
+    failed. A result is a JSON-serializable body, a (body, status code)
+    pair, or an already encoded JSON body as bytes.
+
+    Args:
+        job_manager: JobManager the jobs were submitted to.
+
+    Returns:
+        Blueprint to register on the Flask app.
+    """
+    blueprint = Blueprint("jobs", __name__)
+
+    def job_not_found(job_id):
+        logger.warning(f"Job not found: {job_id}")
+        return jsonify({
+            "status": "error",
+            "message": f"Job not found: {job_id}"
+        }), 404
+
+    @blueprint.route('/jobs/<job_id>', methods=['GET'])
+    def get_job(job_id):
+        """Status and progress of a background job"""
+        job = job_manager.get(job_id)
+        if job is None:
+            return job_not_found(job_id)
+
+        return jsonify(job.to_dict()), 200
+
+    @blueprint.route('/jobs/<job_id>/result', methods=['GET'])
+    def get_job_result(job_id):
+        """Result of a background job; 202 with the job status while it is still running"""
+        job = job_manager.get(job_id)
+        if job is None:
+            return job_not_found(job_id)
+
+        if not job.finished:
+            return jsonify(job.to_dict()), 202
+
+        if job.error is not None:
+            return jsonify({
+                "status": "error",
+                "message": f"Job failed: {job.error}",
+                "job_id": job_id
+            }), 500
+
+        result = job.result
+        if isinstance(result, bytes):
+            return Response(result, mimetype='application/json')
+        if isinstance(result, tuple):
+            body, status_code = result
+            return jsonify(body), status_code
+        return jsonify(result), 200
+
+    return blueprint
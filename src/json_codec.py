@@ -0,0 +1,114 @@
+import io
+import json
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional; the standard library is used without it
+    orjson = None
+
+# Name of the backend in use, "orjson" or "json"
+BACKEND = "orjson" if orjson is not None else "json"
+
+# Raised for invalid documents by every backend (orjson's error is a subclass)
+JSONDecodeError = json.JSONDecodeError
+
+if orjson is not None:
+    # Keys that are not strings are converted like the standard library does
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    """
+    Decode a JSON document.
+
+    Args:
+        data: Document as text or UTF-8 bytes.
+
+    Returns:
+        The decoded value.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # The standard library also accepts NaN and Infinity, and reports errors in its own terms
+            pass
+    return json.loads(data)
+
+def load(fp) -> Any:
+    """
+    Decode a JSON document from a file opened in text or binary mode.
+
+    Args:
+        fp: Readable file object; binary mode avoids decoding the text twice.
+
+    Returns:
+        The decoded value.
+    """
+    return loads(fp.read())
+
+def dumps_bytes(obj: Any, pretty: bool = False, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """
+    Encode a value as UTF-8 JSON.
+
+    Output is compact unless pretty is set, which indents by two spaces like
+    json.dumps(obj, indent=2). It is not byte-identical to json.dumps:
+    non-ASCII characters are written as UTF-8 instead of \\u escapes, and
+    with orjson float exponents are spelled without "+" or leading zeros
+    (1e16, 1.5e-7) and NaN and infinities are written as null. Documents
+    without such values encode to the same bytes.
+
+    Args:
+        obj: Value to encode.
+        pretty: Indent the output for people to read.
+        default: Function returning a serializable version of unsupported objects.
+
+    Returns:
+        The encoded document.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=default,
+                                option=_ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if pretty else 0))
+        except orjson.JSONEncodeError:
+            # Integers beyond 64 bits and other values only the standard library encodes
+            pass
+    return _stdlib_dumps(obj, pretty, default).encode("utf-8")
+
+def dumps(obj: Any, pretty: bool = False, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """
+    Encode a value as JSON text.
+
+    Args:
+        obj: Value to encode.
+        pretty: Indent the output for people to read.
+        default: Function returning a serializable version of unsupported objects.
+
+    Returns:
+        The encoded document.
+    """
+    if orjson is None:
+        return _stdlib_dumps(obj, pretty, default)
+    return dumps_bytes(obj, pretty, default).decode("utf-8")
+
+def dump(obj: Any, fp, pretty: bool = False, default: Optional[Callable[[Any], Any]] = None):
+    """
+    Encode a value into a file opened in text or binary mode.
+
+    Args:
+        obj: Value to encode.
+        fp: Writable file object.
+        pretty: Indent the output for people to read.
+        default: Function returning a serializable version of unsupported objects.
+    """
+    if isinstance(fp, io.TextIOBase):
+        fp.write(dumps(obj, pretty, default))
+    else:
+        fp.write(dumps_bytes(obj, pretty, default))
+
+def _stdlib_dumps(obj: Any, pretty: bool, default: Optional[Callable[[Any], Any]]) -> str:
+    """Encode with the standard library, matching the orjson output format (UTF-8, not \\u escapes)."""
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=default)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=default)
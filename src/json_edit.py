@@ -0,0 +1,50 @@
+import copy
+from typing import Dict, Any
+
+def apply_edit_in_place(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Edit 1 feature: Modify the JSON data in place.
+
+    Args:
+        data: The JSON data to modify. The caller must own it.
+
+    Returns:
+        The same, modified JSON data.
+    """
+    # Add an "edited" flag
+    data["edited"] = True
+    data["edit_version"] = "Edit 1"
+
+    # If there's a "properties" field, modify it
+    if "properties" in data:
+        data["properties"]["processed"] = True
+
+    return data
+
+def apply_edit_overlay(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Edit 1 feature: Return a modified view of the JSON data without changing it.
+
+    Only the containers on the modified paths (the root and "properties")
+    are copied; every other value is shared with the original. Callers must
+    treat the result as read-only below those paths.
+
+    Args:
+        data: The JSON data to modify.
+
+    Returns:
+        Modified JSON data sharing unchanged values with the original.
+    """
+    edited_data = copy.copy(data)
+
+    # Add an "edited" flag
+    edited_data["edited"] = True
+    edited_data["edit_version"] = "Edit 1"
+
+    # If there's a "properties" field, copy it before modifying it
+    if "properties" in edited_data:
+        properties = copy.copy(edited_data["properties"])
+        properties["processed"] = True
+        edited_data["properties"] = properties
+
+    return edited_data
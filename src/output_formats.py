@@ -0,0 +1,293 @@
+import os
+import sys
+import gzip
+from typing import Any, List, Optional
+
+try:
+    import zstandard
+except ImportError:
+    # zstd is optional; gzip is always available
+    zstandard = None
+
+# Add the current directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json_codec
+
+# Document layouts: indented JSON, compact JSON, or one record per line
+FORMATS = ("pretty", "compact", "ndjson")
+
+# Compression of output files, most preferred first
+COMPRESSIONS = ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+# Output format names accepted by OutputFormat.parse, e.g. "ndjson+zstd"
+FORMAT_NAMES = FORMATS + tuple(f"{fmt}+{compression}" for fmt in FORMATS for compression in COMPRESSIONS)
+
+# gzip runs at a faster level than for HTTP bodies: output volumes are large and written once
+GZIP_LEVEL = 3
+ZSTD_LEVEL = 3
+
+_EXTENSIONS = {"pretty": ".json", "compact": ".json", "ndjson": ".ndjson"}
+_COMPRESSED_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Key of the NDJSON line holding the document the records belong to
+NDJSON_DOCUMENT_KEY = "__document__"
+# Key of the same line giving where the records go in that document
+NDJSON_RECORDS_KEY = "__records__"
+
+class OutputFormat:
+    """
+    Layout and compression of the JSON files a processor writes.
+
+    "pretty" indents documents like json.dump(indent=2), though non-ASCII
+    text is written as UTF-8 rather than escaped (see json_codec.dumps_bytes),
+    "compact" writes them without whitespace, and "ndjson" writes the records of a document
+    one per line. A document with a record list (a top-level list, "data",
+    or "processed_data.data") is written as its records followed by a last
+    line holding the rest of the document and where the records belong, so
+    list documents are plain NDJSON and every document reads back whole
+    with read_document().
+
+    Compressed formats add ".gz" or ".zst" to the file name, and NDJSON
+    files use ".ndjson" instead of ".json".
+    """
+
+    def __init__(self, fmt: str = "pretty", compression: Optional[str] = None):
+        """
+        Initialize the OutputFormat.
+
+        Args:
+            fmt: "pretty", "compact" or "ndjson".
+            compression: None, "gzip" or "zstd" (needs zstandard).
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown output format: {fmt}")
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported output compression: {compression}")
+        self.format = fmt
+        self.compression = compression
+
+    @classmethod
+    def parse(cls, name: str) -> "OutputFormat":
+        """
+        Create an OutputFormat from its name.
+
+        Args:
+            name: One of FORMAT_NAMES, e.g. "compact" or "ndjson+gzip".
+
+        Returns:
+            The output format.
+        """
+        fmt, _, compression = name.partition("+")
+        return cls(fmt, compression or None)
+
+    @property
+    def name(self) -> str:
+        """Return the name parse() accepts for this format."""
+        return f"{self.format}+{self.compression}" if self.compression else self.format
+
+    @property
+    def extension(self) -> str:
+        """Return the file extension of the format, e.g. ".ndjson.gz"."""
+        return _EXTENSIONS[self.format] + _COMPRESSED_EXTENSIONS.get(self.compression, "")
+
+    def file_name(self, name: str) -> str:
+        """
+        Return the name of an output file in this format.
+
+        Args:
+            name: Name of the file as plain JSON, ending in ".json".
+
+        Returns:
+            The name with its ".json" extension replaced by this format's.
+        """
+        stem = name[:-len(".json")] if name.lower().endswith(".json") else name
+        return stem + self.extension
+
+    def encode(self, document: Any) -> bytes:
+        """
+        Encode a whole document, uncompressed.
+
+        Args:
+            document: Value to encode.
+
+        Returns:
+            The encoded file contents.
+        """
+        if self.format == "ndjson":
+            return encode_ndjson(document)
+        return json_codec.dumps_bytes(document, pretty=self.format == "pretty")
+
+    def open(self, path: str):
+        """
+        Open a file for writing in this format's compression.
+
+        Args:
+            path: Path of the file.
+
+        Returns:
+            A writable binary stream; closing it closes the file.
+        """
+        if self.compression == "gzip":
+            return gzip.open(path, "wb", compresslevel=GZIP_LEVEL)
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(open(path, "wb"))
+        return open(path, "wb")
+
+    def write(self, path: str, document: Any) -> int:
+        """
+        Write a document to a file.
+
+        Args:
+            path: Path of the file.
+            document: Value to write.
+
+        Returns:
+            The size of the file in bytes.
+        """
+        encoded = self.encode(document)
+        if self.compression is None:
+            with open(path, "wb") as f:
+                f.write(encoded)
+            return len(encoded)
+
+        with self.open(path) as f:
+            f.write(encoded)
+        return os.path.getsize(path)
+
+def records_path(document: Any) -> Optional[List[str]]:
+    """
+    Return where the records of a document are.
+
+    Args:
+        document: Decoded document.
+
+    Returns:
+        [] for a list, the keys leading to the record list, or None.
+    """
+    if isinstance(document, list):
+        return []
+    if isinstance(document, dict):
+        processed = document.get("processed_data")
+        if isinstance(processed, dict) and isinstance(processed.get("data"), list):
+            return ["processed_data", "data"]
+        if isinstance(document.get("data"), list):
+            return ["data"]
+    return None
+
+def ndjson_document_line(document: Any, path: Optional[List[str]]) -> bytes:
+    """
+    Encode the NDJSON line holding a document without its records.
+
+    Args:
+        document: The document, with an empty list where its records go.
+        path: Keys leading to the record list, or None for no records.
+
+    Returns:
+        The encoded line, newline included.
+    """
+    return json_codec.dumps_bytes({NDJSON_DOCUMENT_KEY: document, NDJSON_RECORDS_KEY: path}) + b"\n"
+
+def encode_ndjson(document: Any) -> bytes:
+    """
+    Encode a document as NDJSON.
+
+    Args:
+        document: Value to encode.
+
+    Returns:
+        The records, one per line, followed by the document line unless the
+        document is a plain list.
+    """
+    path = records_path(document)
+    if path is None:
+        return ndjson_document_line(document, None)
+
+    records = _get_path(document, path)
+    lines = [json_codec.dumps_bytes(record) + b"\n" for record in records]
+    if path:
+        lines.append(ndjson_document_line(_set_path(document, path, []), path))
+    return b"".join(lines)
+
+def decode_ndjson(data: bytes) -> Any:
+    """
+    Decode a document written by encode_ndjson, or any plain NDJSON.
+
+    Args:
+        data: File contents.
+
+    Returns:
+        The decoded document; plain NDJSON decodes to the list of its records.
+    """
+    records = [json_codec.loads(line) for line in data.splitlines() if line.strip()]
+    if records and isinstance(records[-1], dict) and NDJSON_DOCUMENT_KEY in records[-1]:
+        last = records.pop()
+        path = last.get(NDJSON_RECORDS_KEY)
+        if path is None:
+            return last[NDJSON_DOCUMENT_KEY]
+        return _set_path(last[NDJSON_DOCUMENT_KEY], path, records)
+    return records
+
+def open_input(path: str):
+    """
+    Open a file for reading, decompressing it if it is gzip or zstd compressed.
+
+    The compression is recognized from the contents, not the file name.
+
+    Args:
+        path: Path of the file.
+
+    Returns:
+        A readable binary stream; closing it closes the file.
+    """
+    with open(path, "rb") as f:
+        magic = f.read(4)
+
+    if magic.startswith(_GZIP_MAGIC):
+        return gzip.open(path, "rb")
+    if magic == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise ValueError(f"{path} is zstd compressed; install zstandard to read it")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True)
+    return open(path, "rb")
+
+def read_document(path: str) -> Any:
+    """
+    Read a document written in any output format.
+
+    Args:
+        path: Path of the file; NDJSON is recognized by its ".ndjson" extension.
+
+    Returns:
+        The decoded document.
+    """
+    with open_input(path) as f:
+        data = f.read()
+    if is_ndjson(path):
+        return decode_ndjson(data)
+    return json_codec.loads(data)
+
+def is_ndjson(path: str) -> bool:
+    """Return True for a file name with the NDJSON extension, compressed or not."""
+    name = path.lower()
+    for extension in _COMPRESSED_EXTENSIONS.values():
+        if name.endswith(extension):
+            name = name[:-len(extension)]
+    return name.endswith(".ndjson")
+
+def _get_path(document: Any, path: List[str]) -> Any:
+    """Return the value at a key path."""
+    for key in path:
+        document = document[key]
+    return document
+
+def _set_path(document: Any, path: List[str], value: Any) -> Any:
+    """Return a copy of a document with the value at a key path replaced, copying only along the path."""
+    if not path:
+        return value
+    copy = dict(document)
+    copy[path[0]] = _set_path(document[path[0]], path[1:], value)
+    return copy
@@ -0,0 +1,143 @@
+import json
+import queue
+import atexit
+import random
+import logging
+import threading
+from typing import Any, Optional
+
+# Encoder used to render payloads; iterencode() yields the document piece by
+# piece, so rendering stops as soon as the size cap is reached
+_encoder = json.JSONEncoder(default=str, ensure_ascii=False)
+
+# Records waiting to be written by the log writer thread
+_queue = queue.Queue(maxsize=10000)
+_thread = None
+_thread_lock = threading.Lock()
+
+class LazyPayload:
+    """
+    A log argument that renders a JSON payload only when the record is formatted.
+
+    The rendered text is capped at max_chars; larger payloads are cut off
+    and marked as truncated.
+    """
+
+    __slots__ = ("payload", "max_chars")
+
+    def __init__(self, payload: Any, max_chars: int):
+        self.payload = payload
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        parts = []
+        size = 0
+        for chunk in _encoder.iterencode(self.payload):
+            parts.append(chunk)
+            size += len(chunk)
+            if size > self.max_chars:
+                return "".join(parts)[:self.max_chars] + f"... [truncated at {self.max_chars} chars]"
+        return "".join(parts)
+
+class PayloadLogger:
+    """
+    Logs request and response bodies without paying for them on the request thread.
+
+    Only a sample of the calls logs the body, capped at max_chars; the others
+    log the message alone. Records are created on the calling thread and
+    formatted and written by a background writer thread, so logged payloads
+    must not be modified after they are handed over.
+    """
+
+    def __init__(self, logger: logging.Logger, sample_rate: float = 0.01, max_chars: int = 1024):
+        """
+        Initialize the PayloadLogger.
+
+        Args:
+            logger: Logger the records are written to.
+            sample_rate: Fraction of calls (0.0 to 1.0) that log the body.
+            max_chars: Maximum number of characters of a logged body.
+        """
+        self.logger = logger
+        self.sample_rate = sample_rate
+        self.max_chars = max_chars
+        self.dropped = 0
+
+    def info(self, message: str, payload: Any):
+        """
+        Log a message with a payload at INFO level.
+
+        Args:
+            message: Message describing the payload.
+            payload: JSON-serializable payload.
+        """
+        self.log(logging.INFO, message, payload)
+
+    def log(self, level: int, message: str, payload: Any):
+        """
+        Log a message with a payload.
+
+        Args:
+            level: Logging level.
+            message: Message describing the payload.
+            payload: JSON-serializable payload.
+        """
+        if not self.logger.isEnabledFor(level):
+            return
+
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            msg, args = "%s: %s", (message, LazyPayload(payload, self.max_chars))
+        else:
+            msg, args = "%s (body not sampled)", (message,)
+
+        record = self.logger.makeRecord(self.logger.name, level, "(payload)", 0, msg, args, None)
+        _start_writer()
+        try:
+            _queue.put_nowait((self.logger, record))
+        except queue.Full:
+            # Never block a request on logging
+            self.dropped += 1
+
+def flush(timeout: Optional[float] = None) -> bool:
+    """
+    Wait until every queued payload record has been written.
+
+    Args:
+        timeout: Maximum time in seconds to wait.
+
+    Returns:
+        True if the queue was drained within the timeout.
+    """
+    if _thread is None:
+        return True
+
+    done = threading.Event()
+    _queue.put(done)
+    return done.wait(timeout)
+
+def _start_writer():
+    """Start the log writer thread on first use."""
+    global _thread
+    if _thread is not None:
+        return
+
+    with _thread_lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_write_records, name="payload-log-writer", daemon=True)
+            _thread.start()
+            atexit.register(flush, 5.0)
+
+def _write_records():
+    """Format and write queued records."""
+    while True:
+        item = _queue.get()
+        if isinstance(item, threading.Event):
+            item.set()
+            continue
+
+        logger, record = item
+        try:
+            logger.handle(record)
+        except Exception:
+            # Logging must never take the writer thread down
+            pass
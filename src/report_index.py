@@ -0,0 +1,28 @@
+import ntpath
+
+def report_file_name(file_path: str) -> str:
+    """
+    Return the file name of an input JSON path.
+
+    Results hold Windows paths, so both separators are accepted.
+
+    Args:
+        file_path: Path of the input JSON file.
+
+    Returns:
+        The file name.
+    """
+    return ntpath.basename(str(file_path))
+
+def report_id_from_path(file_path: str) -> str:
+    """
+    Derive the report ID from an input JSON path (e.g. ".../example12.json" -> "12").
+
+    Args:
+        file_path: Path of the input JSON file.
+
+    Returns:
+        The report ID.
+    """
+    file_name = report_file_name(file_path)
+    return file_name.replace('example', '').replace('.json', '')
@@ -0,0 +1,146 @@
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from results_store import ResultsStore
+from report_index import report_id_from_path
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/report_partitions.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class ReportPartitions:
+    """
+    Per-ID Excel reports maintained from the results store.
+
+    Every report ID has its own workbook (reports/report_<id>.xlsx). When a
+    batch of results is committed, the partitions of the affected IDs become
+    stale and are rebuilt on a background thread from the store's report_id
+    index. A download of a stale partition rebuilds it immediately instead
+    of serving outdated rows.
+    """
+
+    def __init__(self, store: ResultsStore, reports_dir: str = "results/reports"):
+        """
+        Initialize the ReportPartitions.
+
+        Args:
+            store: The results store the partitions are built from.
+            reports_dir: Directory holding the partition workbooks.
+        """
+        self.store = store
+        self.reports_dir = reports_dir
+        os.makedirs(reports_dir, exist_ok=True)
+
+        # Serializes builds so a partition file is never written twice at once
+        self._build_lock = threading.Lock()
+
+        # IDs with a background rebuild queued but not yet started
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-partitions")
+
+        logger.info(f"ReportPartitions initialized with directory: {reports_dir}")
+
+    def path_for(self, report_id: str) -> str:
+        """Return the path of the partition workbook for a report ID."""
+        return os.path.join(self.reports_dir, f"report_{report_id}.xlsx")
+
+    def rows_committed(self, rows: List[Dict[str, Any]]):
+        """
+        Invalidate the partitions touched by a committed batch.
+
+        Used as the ResultsWriter commit callback.
+
+        Args:
+            rows: The committed rows.
+        """
+        report_ids = {report_id_from_path(row["file_path"]) for row in rows if row.get("file_path")}
+        for report_id in report_ids:
+            self.schedule_rebuild(report_id)
+
+    def schedule_rebuild(self, report_id: str):
+        """
+        Queue a background rebuild of a partition, unless one is already queued.
+
+        Args:
+            report_id: The report ID.
+        """
+        with self._pending_lock:
+            if report_id in self._pending:
+                return
+            self._pending.add(report_id)
+
+        self._executor.submit(self._rebuild_pending, report_id)
+
+    def get(self, report_id: str) -> Optional[str]:
+        """
+        Return an up-to-date partition workbook for a report ID.
+
+        Args:
+            report_id: The report ID.
+
+        Returns:
+            Path to the partition, or None if the store has no rows for the ID.
+        """
+        last_row_id = self.store.last_report_row_id(report_id)
+        if last_row_id == 0:
+            return None
+
+        path = self.path_for(report_id)
+        if self.store.partition_row_id(report_id) >= last_row_id and os.path.exists(path):
+            return path
+
+        # Stale or missing: rebuild now rather than serve outdated rows
+        return self.build(report_id)
+
+    def build(self, report_id: str) -> Optional[str]:
+        """
+        Build the partition workbook for a report ID if it is stale.
+
+        Args:
+            report_id: The report ID.
+
+        Returns:
+            Path to the partition, or None if the store has no rows for the ID.
+        """
+        with self._build_lock:
+            last_row_id = self.store.last_report_row_id(report_id)
+            if last_row_id == 0:
+                return None
+
+            path = self.path_for(report_id)
+            if self.store.partition_row_id(report_id) >= last_row_id and os.path.exists(path):
+                return path
+
+            df = self.store.report_rows(report_id, last_row_id)
+
+            # Write to a temporary file so downloads never see a partial workbook
+            tmp_path = os.path.join(self.reports_dir, f".report_{report_id}.tmp.xlsx")
+            df.to_excel(tmp_path, sheet_name="Processed JSON", index=False)
+            os.replace(tmp_path, path)
+
+            self.store.set_partition_row_id(report_id, last_row_id)
+            logger.info(f"Built report partition for ID {report_id} with {len(df)} rows")
+            return path
+
+    def close(self):
+        """Wait for queued rebuilds and stop the background thread."""
+        self._executor.shutdown(wait=True)
+
+    def _rebuild_pending(self, report_id: str):
+        """Background task: rebuild a partition queued by schedule_rebuild."""
+        # Rows committed after this point queue another rebuild
+        with self._pending_lock:
+            self._pending.discard(report_id)
+
+        try:
+            self.build(report_id)
+        except Exception as e:
+            logger.error(f"Error rebuilding report partition for ID {report_id}: {str(e)}")
@@ -0,0 +1,504 @@
+import os
+import time
+import queue
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Callable
+
+import pandas as pd
+
+from report_index import report_id_from_path
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/results_store.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Columns of the "Processed JSON" sheet, in the order they are rendered
+RESULT_COLUMNS = ["edit_id", "timestamp", "status", "json_input", "response"]
+
+class ResultsStore:
+    """
+    Append-only store for edit results.
+
+    Rows are appended to a SQLite table running in WAL mode, so recording a
+    result costs a single insert no matter how many rows already exist.
+    The Excel workbook is only rendered on request and the rendered file is
+    reused until new rows arrive. It is a workbook of its own: the shared
+    api_responses.xlsx is left to ExcelReporter and the workflow, and the
+    rows it held before the store existed are imported when the store is
+    created.
+    """
+
+    def __init__(self,
+                db_path: str = "results/edit_results.db",
+                excel_path: str = "results/edit_results.xlsx",
+                import_excel_path: Optional[str] = None):
+        """
+        Initialize the ResultsStore.
+
+        Args:
+            db_path: Path to the SQLite database file holding the results.
+            excel_path: Path of the Excel workbook rendered from the results.
+            import_excel_path: Workbook whose "Processed JSON" rows are imported
+                once, when the database is created.
+        """
+        self.db_path = db_path
+        self.excel_path = excel_path
+
+        # Create the directories if they don't exist
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        os.makedirs(os.path.dirname(os.path.abspath(excel_path)), exist_ok=True)
+
+        # A single connection shared by all threads, serialized by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+
+        # Row id and file mtime of the last rendered workbook
+        self._rendered_row_id = None
+        self._rendered_mtime = None
+
+        created = self._init_db()
+        if created and import_excel_path and os.path.exists(import_excel_path):
+            self._import_excel(import_excel_path)
+        logger.info(f"ResultsStore initialized with database: {db_path}")
+
+    def _init_db(self) -> bool:
+        """Initialize the results table and switch the database to WAL mode; returns True if it was created."""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            created = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'edit_results'"
+            ).fetchone() is None
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS edit_results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    edit_id TEXT,
+                    timestamp TEXT,
+                    status TEXT,
+                    file_path TEXT,
+                    json_input TEXT,
+                    response TEXT
+                )
+            ''')
+
+            # Report ID of each row, for per-ID report partitions
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(edit_results)")]
+            if "report_id" not in columns:
+                self._conn.execute("ALTER TABLE edit_results ADD COLUMN report_id TEXT")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_edit_results_report_id ON edit_results (report_id, id)"
+            )
+
+            # Last row id included in each rendered report partition
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS report_partitions (
+                    report_id TEXT PRIMARY KEY,
+                    built_row_id INTEGER
+                )
+            ''')
+            self._conn.commit()
+        return created
+
+    def _import_excel(self, excel_path: str):
+        """Import the "Processed JSON" rows of an existing workbook, in sheet order."""
+        try:
+            df = pd.read_excel(excel_path, sheet_name="Processed JSON")
+        except Exception as e:
+            logger.warning(f"Could not import results from {excel_path}: {str(e)}")
+            return
+
+        columns = [column for column in RESULT_COLUMNS + ["file_path"] if column in df.columns]
+        df = df[columns].astype(object).where(df[columns].notna(), None)
+        imported = self.append_many(df.to_dict('records'))
+        logger.info(f"Imported {imported} rows from {excel_path}")
+
+    def append(self, row: Dict[str, Any]) -> int:
+        """
+        Append a single result row.
+
+        Args:
+            row: Dictionary with the result columns.
+
+        Returns:
+            Number of rows written.
+        """
+        return self.append_many([row])
+
+    def append_many(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Append several result rows in one transaction.
+
+        Args:
+            rows: List of dictionaries with the result columns.
+
+        Returns:
+            Number of rows written.
+        """
+        if not rows:
+            return 0
+
+        values = [
+            (
+                row.get("edit_id"),
+                row.get("timestamp"),
+                row.get("status"),
+                row.get("file_path"),
+                row.get("json_input"),
+                row.get("response"),
+                report_id_from_path(row["file_path"]) if row.get("file_path") else None
+            )
+            for row in rows
+        ]
+
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT INTO edit_results "
+                    "(edit_id, timestamp, status, file_path, json_input, response, report_id) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    values
+                )
+                self._conn.commit()
+
+            logger.info(f"Appended {len(values)} rows to {self.db_path}")
+            return len(values)
+
+        except Exception as e:
+            logger.error(f"Error appending results: {str(e)}")
+            raise
+
+    def last_row_id(self) -> int:
+        """Return the id of the most recent row, or 0 if the store is empty."""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(id) FROM edit_results").fetchone()
+        return row[0] or 0
+
+    def count(self) -> int:
+        """Return the number of stored rows."""
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM edit_results").fetchone()
+        return row[0]
+
+    def list_results(self, after_id: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Return summary rows in id order, for listings paginated by row id.
+
+        Args:
+            after_id: Only rows with a larger id are returned.
+            limit: Maximum number of rows, or None for all of them.
+
+        Returns:
+            List of dictionaries with id, report_id, file_path, timestamp and status.
+        """
+        query = ("SELECT id, report_id, file_path, timestamp, status FROM edit_results "
+                 "WHERE id > ? ORDER BY id")
+        params = [after_id]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def last_report_row_id(self, report_id: str) -> int:
+        """Return the id of the most recent row for a report ID, or 0 if there is none."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(id) FROM edit_results WHERE report_id = ?", (report_id,)
+            ).fetchone()
+        return row[0] or 0
+
+    def report_rows(self, report_id: str, up_to: int) -> pd.DataFrame:
+        """
+        Return the rows of a report ID, using the report_id index.
+
+        Args:
+            report_id: The report ID.
+            up_to: Only rows with an id up to this value are returned.
+
+        Returns:
+            DataFrame with the result columns.
+        """
+        with self._lock:
+            return pd.read_sql(
+                f"SELECT {', '.join(RESULT_COLUMNS)} FROM edit_results "
+                f"WHERE report_id = ? AND id <= ? ORDER BY id",
+                self._conn,
+                params=(report_id, up_to)
+            )
+
+    def partition_row_id(self, report_id: str) -> int:
+        """Return the last row id included in the report partition, or 0 if it was never built."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT built_row_id FROM report_partitions WHERE report_id = ?", (report_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def set_partition_row_id(self, report_id: str, row_id: int):
+        """Record the last row id included in the report partition."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO report_partitions (report_id, built_row_id) VALUES (?, ?)",
+                (report_id, row_id)
+            )
+            self._conn.commit()
+
+    def render_excel(self) -> Optional[str]:
+        """
+        Render the stored results to the Excel workbook.
+
+        The workbook is rebuilt only if rows were added since the last render
+        or the file was changed on disk by someone else.
+
+        Returns:
+            Path to the workbook, or None if the store is empty.
+        """
+        try:
+            last_row_id = self.last_row_id()
+            if last_row_id == 0:
+                return None
+
+            if self._is_render_current(last_row_id):
+                logger.info(f"Serving cached workbook: {self.excel_path}")
+                return self.excel_path
+
+            with self._lock:
+                df = pd.read_sql(
+                    f"SELECT {', '.join(RESULT_COLUMNS)} FROM edit_results "
+                    f"WHERE id <= ? ORDER BY id",
+                    self._conn,
+                    params=(last_row_id,)
+                )
+
+            with pd.ExcelWriter(self.excel_path, engine='openpyxl', mode='w') as writer:
+                df.to_excel(writer, sheet_name="Processed JSON", index=False)
+
+            self._rendered_row_id = last_row_id
+            self._rendered_mtime = os.path.getmtime(self.excel_path)
+
+            logger.info(f"Rendered {len(df)} rows to Excel: {self.excel_path}")
+            return self.excel_path
+
+        except Exception as e:
+            logger.error(f"Error rendering results to Excel: {str(e)}")
+            raise
+
+    def _is_render_current(self, last_row_id: int) -> bool:
+        """Check whether the rendered workbook still matches the stored rows."""
+        if self._rendered_row_id != last_row_id:
+            return False
+        if not os.path.exists(self.excel_path):
+            return False
+        return os.path.getmtime(self.excel_path) == self._rendered_mtime
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class ResultsWriteError(RuntimeError):
+    """Raised when queued result rows could not be committed to the store."""
+
+
+class _Marker:
+    """Control item placed on the writer queue to request a flush or a stop."""
+
+    def __init__(self, stop: bool = False):
+        self.stop = stop
+        self.done = threading.Event()
+
+class ResultsWriter:
+    """
+    Single background writer for a ResultsStore.
+
+    Request handlers enqueue rows without touching the database; one thread
+    drains the queue and commits the rows in batches once either the batch
+    size or the flush interval is reached. Pending rows are committed by
+    flush() and by close().
+
+    A batch that fails to commit is kept and retried with the next batch, at
+    the latest after flush_interval. Until it is committed, submit() and
+    flush() raise ResultsWriteError, so callers learn that their results are
+    not stored yet.
+    """
+
+    def __init__(self,
+                store: ResultsStore,
+                batch_size: int = 500,
+                flush_interval: float = 1.0,
+                on_commit: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+        """
+        Initialize the ResultsWriter and start its background thread.
+
+        Args:
+            store: The store the rows are committed to.
+            batch_size: Maximum number of rows committed in one batch.
+            flush_interval: Maximum time in seconds a row waits in the queue.
+            on_commit: Optional callback invoked with each committed batch.
+        """
+        self.store = store
+        self.on_commit = on_commit
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.rows_written = 0
+        self.batches_written = 0
+
+        self._queue = queue.Queue()
+        self._closed = False
+
+        # Rows of failed batches, retried first, and the error that failed them
+        self._retained = []
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="results-writer", daemon=True)
+        self._thread.start()
+
+        logger.info(f"ResultsWriter started with batch_size={batch_size}, flush_interval={flush_interval}")
+
+    def submit(self, row: Dict[str, Any]):
+        """
+        Queue a single row for writing.
+
+        Args:
+            row: Dictionary with the result columns.
+        """
+        self.submit_many([row])
+
+    def submit_many(self, rows: List[Dict[str, Any]]):
+        """
+        Queue several rows for writing.
+
+        Args:
+            rows: List of dictionaries with the result columns.
+        """
+        if self._closed:
+            raise RuntimeError("ResultsWriter is closed")
+        self._raise_error()
+
+        for row in rows:
+            self._queue.put(row)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every row queued so far has been committed.
+
+        Args:
+            timeout: Maximum time in seconds to wait.
+
+        Returns:
+            True if the queue was flushed within the timeout.
+
+        Raises:
+            ResultsWriteError: If rows could not be committed.
+        """
+        if not self._thread.is_alive():
+            self._raise_error()
+            return True
+
+        marker = _Marker()
+        self._queue.put(marker)
+        flushed = marker.done.wait(timeout)
+        self._raise_error()
+        return flushed
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Commit all pending rows and stop the background thread.
+
+        Args:
+            timeout: Maximum time in seconds to wait for the thread.
+        """
+        if self._closed:
+            return
+
+        self._closed = True
+        marker = _Marker(stop=True)
+        self._queue.put(marker)
+        self._thread.join(timeout)
+
+        if self.rows_written:
+            logger.info(f"ResultsWriter closed after writing {self.rows_written} rows in {self.batches_written} batches")
+        if self._retained:
+            logger.error(f"ResultsWriter closed with {len(self._retained)} rows that could not be committed")
+        self._raise_error()
+
+    def _raise_error(self):
+        """Raise the error of the rows still waiting for a successful commit, if any."""
+        error, retained = self._error, self._retained
+        if error is not None:
+            raise ResultsWriteError(f"{len(retained)} results could not be committed: {error}") from error
+
+    def _run(self):
+        """Drain the queue and commit rows in batches."""
+        while True:
+            batch = []
+            markers = []
+
+            # Block until the first item of the next batch arrives, or until
+            # failed rows are due for another attempt
+            try:
+                item = self._queue.get(timeout=self.flush_interval if self._retained else None)
+            except queue.Empty:
+                self._commit(batch)
+                continue
+            deadline = time.monotonic() + self.flush_interval
+
+            while True:
+                if isinstance(item, _Marker):
+                    markers.append(item)
+                    break
+
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            self._commit(batch)
+
+            for marker in markers:
+                marker.done.set()
+                if marker.stop:
+                    return
+
+    def _commit(self, batch: List[Dict[str, Any]]):
+        """Write a batch, after the rows of failed batches, keeping it for a retry on failure."""
+        batch = self._retained + batch
+        if not batch:
+            return
+
+        try:
+            self.store.append_many(batch)
+        except Exception as e:
+            logger.error(f"Error committing batch of {len(batch)} results, keeping it for a retry: {str(e)}")
+            self._retained = batch
+            self._error = e
+            return
+
+        self._retained = []
+        self._error = None
+        self.rows_written += len(batch)
+        self.batches_written += 1
+
+        if self.on_commit is not None:
+            try:
+                self.on_commit(batch)
+            except Exception as e:
+                logger.error(f"Error in commit callback: {str(e)}")
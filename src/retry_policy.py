@@ -0,0 +1,351 @@
+import time
+import random
+import asyncio
+import logging
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+# Shared by the batch clients, which configure logging themselves
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying: the API is overloaded, restarting or briefly unavailable
+RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+# Statuses whose Retry-After header says when to try again
+RETRY_AFTER_STATUSES = frozenset({429, 503})
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class ApiStatusError(Exception):
+    """Raised when the API answers with an unsuccessful status."""
+
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None,
+                 retryable: Optional[bool] = None):
+        """
+        Initialize the ApiStatusError.
+
+        Args:
+            status: HTTP status of the response.
+            message: Response body or description of the failure.
+            retry_after: Seconds the API asked the client to wait, if any.
+            retryable: Whether sending the request again can succeed; by default
+                only for statuses in RETRY_STATUSES.
+        """
+        super().__init__(f"API request failed: {status} - {message}")
+        self.status = status
+        self.retry_after = retry_after
+        self.retryable = status in RETRY_STATUSES if retryable is None else retryable
+
+class CircuitOpenError(Exception):
+    """Raised without contacting the API while the circuit breaker is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Circuit breaker is open, API requests paused for {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header.
+
+    Args:
+        value: Header value, either delay-seconds or an HTTP date.
+
+    Returns:
+        Seconds to wait, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    value = value.strip()
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+def retry_after_for(status: int, headers) -> Optional[float]:
+    """
+    Return the delay a response asks for, if its status is one that may carry Retry-After.
+
+    Args:
+        status: HTTP status of the response.
+        headers: Response headers.
+
+    Returns:
+        Seconds to wait, or None.
+    """
+    if status not in RETRY_AFTER_STATUSES:
+        return None
+    return parse_retry_after(headers.get('Retry-After'))
+
+class RetryPolicy:
+    """
+    Retry policy shared by every request of a run.
+
+    Failed requests are retried with exponential backoff and full jitter, so
+    clients that failed together do not retry together. A delay asked for by
+    the API with Retry-After (on 429 and 503) is waited out instead, unless
+    it exceeds max_retry_after.
+
+    Retries are limited run-wide by a budget of budget_min_retries plus
+    budget_ratio retries per request, so a degraded API sees at most that
+    much extra load rather than max_attempts times the request rate.
+
+    A circuit breaker opens after failure_threshold consecutive failures and
+    then refuses requests without sending them. After reset_timeout seconds
+    it lets a single probe request through: success closes the breaker,
+    failure opens it again. Refused requests wait for the probe and are
+    retried without using the budget.
+
+    One policy may be used from several threads and from asyncio tasks.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 30.0,
+                 budget_ratio: float = 0.2, budget_min_retries: int = 10, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0, max_retry_after: float = 120.0):
+        """
+        Initialize the RetryPolicy.
+
+        Args:
+            max_attempts: Attempts per request, including the first one.
+            base_delay: Backoff ceiling of the first retry in seconds; it doubles with every retry.
+            max_delay: Largest backoff ceiling in seconds.
+            budget_ratio: Retries allowed per request made in the run.
+            budget_min_retries: Retries allowed regardless of the number of requests.
+            failure_threshold: Consecutive failures that open the circuit breaker.
+            reset_timeout: Seconds the breaker stays open before probing the API.
+            max_retry_after: Longest Retry-After delay that is waited out; a request
+                asked to wait longer fails instead.
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_min_retries = budget_min_retries
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_retry_after = max_retry_after
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+        self.stats = {
+            'requests': 0,
+            'attempts': 0,
+            'retries': 0,
+            'failures': 0,
+            'budget_exhausted': 0,
+            'circuit_opened': 0,
+            'circuit_rejections': 0
+        }
+
+    @property
+    def state(self) -> str:
+        """Return the circuit breaker state."""
+        with self._lock:
+            return self._state
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Call fn, retrying failures under this policy.
+
+        Args:
+            fn: Function sending one request; it raises on failure.
+
+        Returns:
+            The value returned by fn.
+        """
+        self._count('requests')
+        attempt = 0
+        while True:
+            attempt += 1
+            probe = False
+            try:
+                probe = self._admit()
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self._record_failure(probe, e)
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            except BaseException:
+                self._release(probe)
+                raise
+            self._record_success(probe)
+            return result
+
+    async def call_async(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Await fn(*args, **kwargs), retrying failures under this policy.
+
+        Args:
+            fn: Coroutine function sending one request; it raises on failure.
+
+        Returns:
+            The value returned by fn.
+        """
+        self._count('requests')
+        attempt = 0
+        while True:
+            attempt += 1
+            probe = False
+            try:
+                probe = self._admit()
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                self._record_failure(probe, e)
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled; let another request probe the API
+                self._release(probe)
+                raise
+            self._record_success(probe)
+            return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the retry statistics and the breaker state."""
+        with self._lock:
+            return dict(self.stats, circuit_state=self._state)
+
+    def summary(self) -> str:
+        """Return the retry statistics as one line for the run summary."""
+        stats = self.snapshot()
+        return (f"{stats['requests']} requests, {stats['attempts']} attempts, {stats['retries']} retries, "
+                f"{stats['budget_exhausted']} retries refused by the retry budget, "
+                f"circuit breaker opened {stats['circuit_opened']} times and refused {stats['circuit_rejections']} attempts")
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        """Return True if sending the request again can succeed."""
+        if isinstance(error, ApiStatusError):
+            return error.retryable
+        if isinstance(error, ValueError):
+            # A response that does not decode will not decode the next time either
+            return False
+        # Network errors, timeouts and refusals by the breaker
+        return True
+
+    def _count(self, name: str):
+        """Increment a statistic."""
+        with self._lock:
+            self.stats[name] += 1
+
+    def _admit(self) -> bool:
+        """
+        Let an attempt through the circuit breaker.
+
+        Returns:
+            True if the attempt is the half-open probe.
+        """
+        with self._lock:
+            if self._state == OPEN:
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    self.stats['circuit_rejections'] += 1
+                    raise CircuitOpenError(remaining)
+                self._state = HALF_OPEN
+                logger.info("Circuit breaker half-open, probing the API")
+
+            if self._state == HALF_OPEN:
+                if self._probe_in_flight:
+                    # Wait for the probe rather than piling onto a recovering API
+                    self.stats['circuit_rejections'] += 1
+                    raise CircuitOpenError(self.base_delay)
+                self._probe_in_flight = True
+                self.stats['attempts'] += 1
+                return True
+
+            self.stats['attempts'] += 1
+            return False
+
+    def _record_success(self, probe: bool):
+        """Reset the failure count after an attempt the API answered."""
+        with self._lock:
+            self._consecutive_failures = 0
+            if probe:
+                self._probe_in_flight = False
+            # A late success of a request sent before the breaker opened does not close it
+            if self._state == HALF_OPEN and probe:
+                self._state = CLOSED
+                logger.info("Circuit breaker closed, the API is responding again")
+
+    def _record_failure(self, probe: bool, error: Exception):
+        """Count a failed attempt, opening the breaker when the API looks down."""
+        if isinstance(error, CircuitOpenError):
+            return
+        if not self.is_retryable(error):
+            # The API answered; the request itself is at fault
+            self._record_success(probe)
+            return
+
+        with self._lock:
+            self.stats['failures'] += 1
+            self._consecutive_failures += 1
+            if probe:
+                self._probe_in_flight = False
+            if probe or (self._state == CLOSED and self._consecutive_failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self.stats['circuit_opened'] += 1
+                logger.warning(f"Circuit breaker opened after {self._consecutive_failures} consecutive failures, "
+                               f"pausing API requests for {self.reset_timeout}s")
+
+    def _release(self, probe: bool):
+        """Give up the probe slot of an attempt that neither succeeded nor failed."""
+        if probe:
+            with self._lock:
+                self._probe_in_flight = False
+
+    def _retry_delay(self, attempt: int, error: Exception) -> Optional[float]:
+        """
+        Decide whether a failed attempt is retried.
+
+        Returns:
+            Seconds to wait before the next attempt, or None to give up.
+        """
+        if not self.is_retryable(error) or attempt >= self.max_attempts:
+            return None
+
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None and retry_after > self.max_retry_after:
+            logger.warning(f"API asked to retry after {retry_after:.0f}s, longer than {self.max_retry_after}s; giving up")
+            return None
+
+        with self._lock:
+            if not isinstance(error, CircuitOpenError):
+                allowed = self.budget_min_retries + self.budget_ratio * self.stats['requests']
+                if self.stats['retries'] >= allowed:
+                    if self.stats['budget_exhausted'] == 0:
+                        logger.warning(f"Retry budget of the run exhausted after {self.stats['retries']} retries; "
+                                       f"failing requests without retrying")
+                    self.stats['budget_exhausted'] += 1
+                    return None
+                self.stats['retries'] += 1
+
+        # Full jitter: anywhere between no wait and the exponential backoff ceiling
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        if retry_after is None:
+            return random.uniform(0, ceiling)
+        # Spread the clients told to come back at the same moment
+        return retry_after + random.uniform(0, min(ceiling, self.base_delay))
@@ -4,6 +4,8 @@ import os
 import json
 import pandas as pd
 from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import logging
 
 # Set up logging
@@ -23,6 +25,36 @@ CORS(app)
 # Ensure the results directory exists
 os.makedirs('results', exist_ok=True)
 
+# Bounded pool for loading and parsing the files of a file_paths request
+FILE_LOAD_WORKERS = 8
+file_loader = ThreadPoolExecutor(max_workers=FILE_LOAD_WORKERS, thread_name_prefix="file-loader")
+
+# Files one request loads ahead of the file it is processing, so concurrent requests share the pool
+FILE_LOAD_WINDOW = 4
+
+def read_json_file(path):
+    """Load and parse a JSON file, raising FileNotFoundError if it does not exist"""
+    if not os.path.isfile(path):
+        raise FileNotFoundError(path)
+    
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def load_json_files(file_paths):
+    """Yield the future of each file's parsed document in order, with at most FILE_LOAD_WINDOW loads in flight"""
+    pending = deque()
+    try:
+        for path in file_paths:
+            pending.append(file_loader.submit(read_json_file, path))
+            if len(pending) >= FILE_LOAD_WINDOW:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+    finally:
+        # Stop queued loads if the request stops early
+        for future in pending:
+            future.cancel()
+
 @app.route('/health-check', methods=['GET'])
 def health_check():
     """Simple endpoint to check if the API is running"""
@@ -130,10 +162,14 @@ def process_edit():
             success_count = 0
             error_count = 0
             
-            for index, path in enumerate(file_paths):
+            # Files are loaded a few at a time ahead of the one being processed, in request order
+            futures = load_json_files(file_paths)
+            
+            for index, (path, future) in enumerate(zip(file_paths, futures)):
                 try:
-                    # Check if file exists
-                    if not os.path.isfile(path):
+                    try:
+                        json_data = future.result()
+                    except FileNotFoundError:
                         logger.warning(f"File not found: {path}")
                         results.append({
                             "file_path": path,
@@ -142,10 +178,9 @@ def process_edit():
                         })
                         error_count += 1
                         continue
-                    
-                    # Load and parse JSON file
-                    with open(path, 'r') as f:
-                        json_data = json.load(f)
+                    finally:
+                        # Only this file's document and the window's loads are held
+                        future = None
                     
                     # Process file (demo just returns success)
                     file_edit_id = f"{edit_id}_{index + 1}" if len(file_paths) > 1 else edit_id
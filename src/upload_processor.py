@@ -0,0 +1,65 @@
+import os
+import time
+from typing import Dict, Any
+
+import json_codec
+from json_edit import apply_edit_in_place
+
+def process_upload(filename: str, raw: bytes, upload_dir: str) -> Dict[str, Any]:
+    """
+    Parse, edit and save a single uploaded JSON file.
+
+    Runs in a worker process of the upload pool, so it only takes and returns
+    plain values. The upload is parsed once from its bytes, edited in place
+    (the parsed document is owned by this call) and written once in compact
+    form.
+
+    Args:
+        filename: Name of the uploaded file.
+        raw: Contents of the upload.
+        upload_dir: Directory the processed file is written to.
+
+    Returns:
+        Dictionary with the per-file status, byte counts and timings.
+    """
+    start = time.perf_counter()
+
+    try:
+        json_data = json_codec.loads(raw)
+    except ValueError as e:
+        return {
+            "filename": filename,
+            "status": "error",
+            "reason": f"Invalid JSON format: {str(e)}"
+        }
+    parse_time = time.perf_counter() - start
+
+    try:
+        # Process the JSON data (apply the edit function)
+        apply_edit_in_place(json_data)
+
+        # Save the processed data in compact form
+        write_start = time.perf_counter()
+        encoded = json_codec.dumps_bytes(json_data)
+        file_path = os.path.join(upload_dir, filename)
+        with open(file_path, 'wb') as f:
+            f.write(encoded)
+        write_time = time.perf_counter() - write_start
+
+    except Exception as e:
+        return {
+            "filename": filename,
+            "status": "error",
+            "reason": f"Processing error: {str(e)}"
+        }
+
+    return {
+        "filename": filename,
+        "path": file_path,
+        "status": "success",
+        "bytes_read": len(raw),
+        "bytes_written": len(encoded),
+        "parse_time": round(parse_time, 6),
+        "write_time": round(write_time, 6),
+        "total_time": round(time.perf_counter() - start, 6)
+    }
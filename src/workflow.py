@@ -34,13 +34,15 @@ class JsonProcessingWorkflow:
     
     def __init__(self, 
                 json_dir: str = "C:\\json_files\\", 
-                output_excel: str = "results/api_responses.xlsx"):
+                output_excel: str = "results/api_responses.xlsx",
+                results_dir: str = "results"):
         """
         Initialize the workflow.
         
         Args:
             json_dir: Path to the directory containing JSON files.
             output_excel: Path to the Excel output file.
+            results_dir: Directory holding the API service's results store.
         """
         self.json_dir = json_dir
         self.output_excel = output_excel
@@ -51,7 +53,7 @@ class JsonProcessingWorkflow:
         self.excel_reporter = ExcelReporter(output_file=output_excel)
         
         # Create the API service, but don't start it yet
-        self.api_service = ApiService()
+        self.api_service = ApiService(results_dir=results_dir)
         self.api_thread = None
         
         logger.info(f"Workflow initialized with JSON directory: {json_dir}")
@@ -93,6 +95,7 @@ class JsonProcessingWorkflow:
             # Save the results to Excel
             output_file = self.excel_reporter.save_to_excel()
             logger.info(f"All results saved to Excel file: {output_file}")
+            logger.info(f"API retries: {self.api_client.retry_policy.summary()}")
             
             return output_file
         
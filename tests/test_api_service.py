@@ -1,13 +1,20 @@
+import io
+import os
 import json
 import pytest
+import pandas as pd
 from flask import Flask
 from flask.testing import FlaskClient
-from src.api_service import ApiService
+from src.api_service import ApiService, ResultsWriteError
 
 @pytest.fixture
-def api_service():
+def api_service(tmp_path):
     """Create an API service instance for testing."""
-    return ApiService(host="127.0.0.1", port=5000)
+    service = ApiService(host="127.0.0.1", port=5000, results_dir=str(tmp_path / "results"))
+    yield service
+    service.job_manager.shutdown()
+    service.results_writer.close()
+    service.report_partitions.close()
 
 @pytest.fixture
 def test_client(api_service):
@@ -16,12 +23,17 @@ def test_client(api_service):
     with api_service.app.test_client() as client:
         yield client
 
-def test_api_service_initialization():
+def test_api_service_initialization(tmp_path):
     """Test ApiService initialization."""
-    service = ApiService(host="127.0.0.1", port=8080)
-    assert service.host == "127.0.0.1"
-    assert service.port == 8080
-    assert service.app is not None
+    service = ApiService(host="127.0.0.1", port=8080, results_dir=str(tmp_path / "results"))
+    try:
+        assert service.host == "127.0.0.1"
+        assert service.port == 8080
+        assert service.app is not None
+    finally:
+        service.job_manager.shutdown()
+        service.results_writer.close()
+        service.report_partitions.close()
 
 def test_edit_data(api_service):
     """Test the Edit 1 feature."""
@@ -51,6 +63,25 @@ def test_edit_data(api_service):
     assert "edited" not in data
     assert "processed" not in data.get("properties", {})
 
+def test_edit_data_shares_unchanged_values(api_service):
+    """Test that edit_data copies only the modified paths."""
+    data = {
+        "id": 1,
+        "records": [{"value": i} for i in range(3)],
+        "properties": {"value": 42, "tags": ["a", "b"]}
+    }
+    
+    edited_data = api_service.edit_data(data)
+    
+    # Modified containers are copies
+    assert edited_data is not data
+    assert edited_data["properties"] is not data["properties"]
+    
+    # Unchanged values are shared with the original
+    assert edited_data["records"] is data["records"]
+    assert edited_data["properties"]["tags"] is data["properties"]["tags"]
+    assert "processed" not in data["properties"]
+
 def test_process_json_endpoint(test_client):
     """Test the /process-json endpoint."""
     # Create test data
@@ -130,4 +161,344 @@ def test_process_json_endpoint_no_data(test_client):
     
     # Check the response data
     assert response_data["status"] == "error"
-    assert "Content-Type must be application/json" in response_data["message"]
\ No newline at end of file
+    assert "Content-Type must be application/json" in response_data["message"]
+
+def test_process_edit_records_results(test_client, api_service, sample_json_files):
+    """Test that /process-edit appends to the results store and renders on download."""
+    response = test_client.post(
+        '/process-edit',
+        data=json.dumps({"file_paths": sample_json_files}),
+        content_type='application/json'
+    )
+    
+    assert response.status_code == 200
+    response_data = json.loads(response.data)
+    assert response_data["summary"]["success"] == 2
+    
+    # Results are recorded without rendering the workbook
+    api_service.results_writer.flush()
+    assert api_service.results_store.count() == 2
+    assert not os.path.exists(api_service.results_store.excel_path)
+    
+    # The workbook is rendered when all results are downloaded
+    response = test_client.get('/download-excel/all')
+    assert response.status_code == 200
+    response.close()
+    
+    df = pd.read_excel(api_service.results_store.excel_path, sheet_name="Processed JSON")
+    assert list(df["edit_id"]) == ["Edit 1_1", "Edit 1_2"]
+
+@pytest.mark.parametrize("single", [True, False])
+def test_process_edit_reports_results_write_errors(test_client, api_service, sample_json_files, monkeypatch, single):
+    """Test that a results store failure is a 503 about recording results, not a client error."""
+    def failing_submit(*args):
+        raise ResultsWriteError("disk full")
+    
+    monkeypatch.setattr(api_service.results_writer, "submit", failing_submit)
+    monkeypatch.setattr(api_service.results_writer, "submit_many", failing_submit)
+    body = {"file_path": sample_json_files[0]} if single else {"file_paths": sample_json_files}
+    
+    response = test_client.post('/process-edit', data=json.dumps(body), content_type='application/json')
+    
+    assert response.status_code == 503
+    assert response.json["message"] == "Edit results could not be recorded: disk full"
+
+def test_process_edit_file_paths_keeps_request_order(test_client, sample_json_files, temp_json_dir):
+    """Test that concurrently loaded files are reported in request order with per-file errors."""
+    invalid_file = os.path.join(temp_json_dir, "invalid.json")
+    with open(invalid_file, 'w') as f:
+        f.write("{not valid json")
+    missing_file = os.path.join(temp_json_dir, "missing.json")
+    
+    file_paths = [sample_json_files[0], missing_file, invalid_file, sample_json_files[1]]
+    response = test_client.post(
+        '/process-edit',
+        data=json.dumps({"file_paths": file_paths}),
+        content_type='application/json'
+    )
+    
+    assert response.status_code == 200
+    response_data = json.loads(response.data)
+    assert response_data["status"] == "partial"
+    assert response_data["summary"] == {"total": 4, "success": 2, "error": 2}
+    
+    results = response_data["results"]
+    assert [r["file_path"] for r in results] == file_paths
+    assert [r["status"] for r in results] == ["success", "error", "error", "success"]
+    assert results[1]["message"] == f"File not found at path: {missing_file}"
+    assert results[0]["edit_id"] == "Edit 1_1"
+    assert results[3]["edit_id"] == "Edit 1_4"
+
+def test_file_loads_are_bounded_by_window(api_service, sample_json_files, monkeypatch):
+    """Test that a request only loads file_load_window files ahead of the one it processes."""
+    api_service.file_load_window = 2
+    read_json_file = api_service._read_json_file
+    loaded = []
+    
+    def tracking_read(path):
+        loaded.append(path)
+        return read_json_file(path)
+    
+    monkeypatch.setattr(api_service, "_read_json_file", tracking_read)
+    file_paths = sample_json_files * 5
+    
+    consumed = 0
+    for future in api_service._load_files(file_paths):
+        future.result()
+        consumed += 1
+        # Loads submitted so far: the consumed files plus the rest of the window
+        assert len(loaded) <= consumed + 1
+    assert consumed == len(file_paths) == len(loaded)
+
+@pytest.mark.parametrize("upload_workers", [0, 2])
+def test_process_multiple_jsons(tmp_path, monkeypatch, upload_workers):
+    """Test bulk upload processing inline and on the upload pool."""
+    monkeypatch.chdir(tmp_path)
+    service = ApiService(results_dir=str(tmp_path / "results"), upload_workers=upload_workers)
+    service.app.config['TESTING'] = True
+    
+    upload = {"id": 1, "properties": {"value": 42}}
+    files = [
+        (io.BytesIO(json.dumps(upload, indent=2).encode()), "good.json"),
+        (io.BytesIO(b"{not valid json"), "bad.json"),
+        (io.BytesIO(b"hello"), "notes.txt"),
+    ]
+    
+    try:
+        with service.app.test_client() as client:
+            response = client.post(
+                '/process-multiple-jsons',
+                data={"jsonFiles": files},
+                content_type='multipart/form-data'
+            )
+    finally:
+        service.results_writer.close()
+        if service._upload_pool is not None:
+            service._upload_pool.shutdown()
+    
+    assert response.status_code == 200
+    response_data = json.loads(response.data)
+    assert response_data["processedCount"] == 1
+    assert response_data["failedCount"] == 2
+    
+    processed = response_data["processed"][0]
+    assert processed["filename"] == "good.json"
+    assert processed["bytes_read"] == len(json.dumps(upload, indent=2))
+    assert processed["total_time"] >= 0
+    
+    # The file is written once, edited and in compact form
+    with open(processed["path"], 'rb') as f:
+        contents = f.read()
+    assert processed["bytes_written"] == len(contents)
+    saved = json.loads(contents)
+    assert saved["edited"] is True
+    assert saved["properties"]["processed"] is True
+    assert b"\n" not in contents
+    
+    reasons = {f["filename"]: f["reason"] for f in response_data["failed"]}
+    assert reasons["notes.txt"] == "Not a JSON file"
+    assert reasons["bad.json"].startswith("Invalid JSON format")
+    assert not os.path.exists(tmp_path / "json_files" / "bad.json")
+
+def test_uploads_are_bounded_by_window(tmp_path):
+    """Test that a bulk upload only reads and submits upload_window files ahead of the one it waits for."""
+    service = ApiService(results_dir=str(tmp_path / "results"), upload_workers=0, upload_window=3)
+    read = []
+    
+    class Upload(io.BytesIO):
+        def read(self):
+            read.append(self)
+            return super().read()
+    
+    try:
+        uploads = [(f"upload{i}.json", Upload(json.dumps({"id": i}).encode())) for i in range(10)]
+        taken = 0
+        for filename, future in service._submit_uploads(uploads, str(tmp_path)):
+            assert future.result()["status"] == "success"
+            taken += 1
+            # In flight: read but not yet taken
+            assert len(read) - taken <= service.upload_window - 1
+        assert taken == len(read) == 10
+        assert all(stream.closed for _, stream in uploads)
+    finally:
+        service.job_manager.shutdown()
+        service.results_writer.close()
+        service.report_partitions.close()
+
+def store_results(api_service, file_names):
+    """Record edit results for the given input files in the service's results store."""
+    api_service.results_store.append_many([
+        {
+            "edit_id": "Edit 1",
+            "timestamp": "2024-01-01 00:00:00",
+            "status": "Success",
+            "file_path": f"C:\\json_files\\{file_name}",
+            "json_input": "{}",
+            "response": "{}"
+        }
+        for file_name in file_names
+    ])
+
+def test_processed_jsons_pagination(test_client, api_service):
+    """Test listing processed JSONs with limit and cursor."""
+    store_results(api_service, [f"example{i}.json" for i in range(1, 6)])
+    
+    # Without pagination parameters the full list is returned
+    response = test_client.get('/processed-jsons')
+    records = json.loads(response.data)
+    assert [r["id"] for r in records] == ["1", "2", "3", "4", "5"]
+    assert records[0] == {"id": "1", "file_name": "example1.json",
+                          "timestamp": "2024-01-01 00:00:00", "status": "Success"}
+    
+    # Walk the pages
+    ids = []
+    cursor = None
+    while True:
+        url = '/processed-jsons?limit=2' + (f'&cursor={cursor}' if cursor else '')
+        page = json.loads(test_client.get(url).data)
+        assert page["total"] == 5
+        ids.extend(r["id"] for r in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert ids == ["1", "2", "3", "4", "5"]
+    
+    response = test_client.get('/processed-jsons?limit=0')
+    assert response.status_code == 400
+
+def test_processed_jsons_after_full_download(test_client, api_service, sample_json_files):
+    """Test that the listing follows new edits and survives the rendered full workbook."""
+    response = test_client.post(
+        '/process-edit',
+        data=json.dumps({"file_path": sample_json_files[0]}),
+        content_type='application/json'
+    )
+    assert response.status_code == 200
+    
+    response = test_client.get('/download-excel/all')
+    assert response.status_code == 200
+    response.close()
+    
+    response = test_client.get('/processed-jsons')
+    assert response.status_code == 200
+    assert [r["file_name"] for r in json.loads(response.data)] == ["test1.json"]
+    
+    # A new edit is listed without downloading the workbook again
+    test_client.post(
+        '/process-edit',
+        data=json.dumps({"file_path": sample_json_files[1]}),
+        content_type='application/json'
+    )
+    api_service.results_writer.flush()
+    response = test_client.get('/processed-jsons')
+    assert [r["id"] for r in json.loads(response.data)] == ["test1", "test2"]
+
+def test_download_individual_report(test_client, api_service):
+    """Test downloading the report of one ID from the results store."""
+    store_results(api_service, ["example1.json", "example2.json", "example1.json"])
+    
+    response = test_client.get('/download-excel/1')
+    assert response.status_code == 200
+    df = pd.read_excel(io.BytesIO(response.data))
+    response.close()
+    assert len(df) == 2
+    
+    response = test_client.get('/download-excel/7')
+    assert response.status_code == 404
+
+def test_download_report_partition(test_client, api_service, sample_json_files):
+    """Test that per-ID reports come from partitions that follow new results."""
+    def process_and_download():
+        response = test_client.post(
+            '/process-edit',
+            data=json.dumps({"file_path": sample_json_files[0]}),
+            content_type='application/json'
+        )
+        assert response.status_code == 200
+        
+        response = test_client.get('/download-excel/test1')
+        assert response.status_code == 200
+        response.close()
+        return pd.read_excel(api_service.report_partitions.path_for("test1"), sheet_name="Processed JSON")
+    
+    assert len(process_and_download()) == 1
+    
+    # A new result for the same ID makes the partition stale; the download reflects it
+    assert len(process_and_download()) == 2
+
+def test_process_edit_async(test_client, api_service, sample_json_files):
+    """Test running /process-edit as a background job."""
+    response = test_client.post(
+        '/process-edit',
+        data=json.dumps({"file_paths": sample_json_files, "async": True}),
+        content_type='application/json'
+    )
+    assert response.status_code == 202
+    job_id = response.json["job_id"]
+    assert response.json["status_url"] == f"/jobs/{job_id}"
+    
+    api_service.job_manager.shutdown()
+    
+    response = test_client.get(f'/jobs/{job_id}')
+    assert response.status_code == 200
+    assert response.json["status"] == "succeeded"
+    assert response.json["progress"] == {"completed": 2, "total": 2}
+    
+    response = test_client.get(f'/jobs/{job_id}/result')
+    assert response.status_code == 200
+    assert response.json["summary"] == {"total": 2, "success": 2, "error": 0}
+
+def test_unknown_job(test_client):
+    """Test status and result lookups of an unknown job."""
+    assert test_client.get('/jobs/missing').status_code == 404
+    assert test_client.get('/jobs/missing/result').status_code == 404
+
+def test_process_edit_ndjson_stream(test_client, api_service, sample_json_files):
+    """Test streaming /process-edit results as NDJSON."""
+    response = test_client.post(
+        '/process-edit',
+        data=json.dumps({"file_paths": sample_json_files + ["/nonexistent/path.json"]}),
+        content_type='application/json',
+        headers={"Accept": "application/x-ndjson"}
+    )
+    
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    
+    assert [line["status"] for line in lines[:3]] == ["success", "success", "error"]
+    assert lines[0]["edit_id"] == "Edit 1_1"
+    assert lines[3]["status"] == "partial"
+    assert lines[3]["summary"] == {"total": 3, "success": 2, "error": 1}
+    
+    api_service.results_writer.flush()
+    assert api_service.results_store.count() == 2
+
+def test_process_multiple_jsons_ndjson_stream(tmp_path, monkeypatch):
+    """Test streaming bulk upload results as NDJSON."""
+    monkeypatch.chdir(tmp_path)
+    service = ApiService(results_dir=str(tmp_path / "results"), upload_workers=0)
+    service.app.config['TESTING'] = True
+    
+    files = [
+        (io.BytesIO(b'{"id": 1}'), "good.json"),
+        (io.BytesIO(b"hello"), "notes.txt"),
+    ]
+    
+    try:
+        with service.app.test_client() as client:
+            response = client.post(
+                '/process-multiple-jsons?stream=true',
+                data={"jsonFiles": files},
+                content_type='multipart/form-data'
+            )
+            lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    finally:
+        service.results_writer.close()
+    
+    assert response.mimetype == "application/x-ndjson"
+    assert lines[0] == {"filename": "notes.txt", "status": "error", "reason": "Not a JSON file"}
+    assert lines[1]["filename"] == "good.json"
+    assert lines[1]["status"] == "success"
+    assert lines[2]["processedCount"] == 1
+    assert lines[2]["failedCount"] == 1
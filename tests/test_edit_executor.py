@@ -0,0 +1,88 @@
+import os
+import json
+import pytest
+
+from src import json_codec
+from src.edit_executor import EditExecutor
+from src.output_formats import OutputFormat, read_document
+
+def mark_processed(data):
+    """Edit transform used by the tests; module level so worker processes can import it."""
+    data["processed"] = True
+    data["worker_pid"] = os.getpid()
+    return data
+
+def count_items(data):
+    """Summarize an edited document."""
+    return {"items": len(data.get("items", []))}
+
+@pytest.fixture
+def input_files(tmp_path):
+    """Create JSON files of different sizes, plus one invalid file."""
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    paths = []
+    for i in range(8):
+        path = input_dir / f"file{i}.json"
+        with open(path, 'w') as f:
+            json.dump({"id": i, "items": list(range(i * 100))}, f)
+        paths.append(str(path))
+    
+    invalid = input_dir / "invalid.json"
+    invalid.write_text('{"id": ')
+    paths.insert(3, str(invalid))
+    return paths
+
+def check_results(results, input_files, output_dir):
+    """Check results are complete, in input order, and written by the workers."""
+    assert [r['file_path'] for r in results] == input_files
+    assert results[3]['status'] == 'error'
+    
+    for result in results[:3] + results[4:]:
+        assert result['status'] == 'success'
+        with open(result['output_path'], 'rb') as f:
+            edited = json_codec.load(f)
+        assert edited['processed'] is True
+        assert json_codec.loads(result['data']) == edited
+        assert result['analysis'] == {"items": edited['id'] * 100}
+        assert result['bytes_written'] == os.path.getsize(result['output_path'])
+    assert sorted(os.listdir(output_dir)) == sorted(f"processed_file{i}.json" for i in range(8))
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_files_are_edited_in_order(input_files, tmp_path, workers):
+    """Test inline and pooled edits produce the same ordered results."""
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    
+    with EditExecutor(max_workers=workers, max_pending=3) as executor:
+        results = list(executor.map_files(input_files, mark_processed, output_dir=str(output_dir),
+                                          analyze=count_items, return_data=True))
+    
+    check_results(results, input_files, output_dir)
+    pids = {json_codec.loads(r['data'])['worker_pid'] for r in results if r['status'] == 'success'}
+    if workers == 0:
+        assert pids == {os.getpid()}
+    else:
+        assert os.getpid() not in pids
+
+def test_unordered_results_cover_every_file(input_files, tmp_path):
+    """Test that unordered mapping yields one result per file."""
+    with EditExecutor(max_workers=2, max_pending=2) as executor:
+        results = list(executor.map_files(input_files, mark_processed, ordered=False))
+    
+    assert sorted(r['file_path'] for r in results) == sorted(input_files)
+    assert all(r['output_path'] is None and 'data' not in r for r in results)
+
+def test_output_format_sets_layout_and_name(input_files, tmp_path):
+    """Test that an output format overrides pretty and the output file names."""
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    
+    with EditExecutor(max_workers=0) as executor:
+        results = list(executor.map_files(input_files[:2], mark_processed, output_dir=str(output_dir),
+                                          pretty=True, output_format=OutputFormat.parse("compact+gzip")))
+    
+    for result in results:
+        assert result['output_path'].endswith('.json.gz')
+        assert result['bytes_written'] == os.path.getsize(result['output_path'])
+        assert read_document(result['output_path'])['processed'] is True
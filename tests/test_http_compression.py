@@ -0,0 +1,86 @@
+import gzip
+import json
+import pytest
+from flask import Flask, jsonify, request
+
+import mock_api
+from src import http_compression
+from src.http_compression import compress, decompress, BodyTooLarge
+
+@pytest.fixture
+def client():
+    """Create a test client for the mock processing API."""
+    mock_api.app.config['TESTING'] = True
+    return mock_api.app.test_client()
+
+def records(count):
+    """Build a payload of repetitive generated records."""
+    return {"data": [{"id": i, "name": f"record {i}", "status": "active"} for i in range(count)]}
+
+def test_compress_round_trip():
+    """Test that compressed bodies decompress to the original bytes."""
+    body = json.dumps(records(100)).encode('utf-8')
+    for encoding in http_compression.SUPPORTED_ENCODINGS:
+        compressed = compress(body, encoding)
+        assert len(compressed) < len(body) / 5
+        assert decompress(compressed, encoding) == body
+
+def test_decompress_refuses_oversized_bodies():
+    """Test that a body expanding past the limit is refused."""
+    with pytest.raises(BodyTooLarge):
+        decompress(gzip.compress(b"0" * 10000), "gzip", max_size=1000)
+
+def test_gzip_request_is_decompressed(client):
+    """Test that /process reads a gzip request body transparently."""
+    payload = records(50)
+    response = client.post('/process', data=gzip.compress(json.dumps(payload).encode('utf-8')),
+                           headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip'})
+    
+    assert response.status_code == 200
+    processed = response.get_json()['processed_data']
+    assert [item['id'] for item in processed['data']] == list(range(50))
+
+def test_response_compression_follows_accept_encoding(client):
+    """Test that responses are compressed only for clients that accept it."""
+    payload = json.dumps(records(50))
+    
+    response = client.post('/process', data=payload, content_type='application/json',
+                           headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.data))['status'] == 'success'
+    
+    response = client.post('/process', data=payload, content_type='application/json')
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json()['status'] == 'success'
+    
+    # Small responses are not worth compressing
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+def test_unsupported_or_corrupt_bodies_are_refused(client):
+    """Test that unknown codings get 415 and corrupt bodies 400."""
+    response = client.post('/process', data=b'{}', content_type='application/json',
+                           headers={'Content-Encoding': 'br'})
+    assert response.status_code == 415
+    assert 'gzip' in response.headers['Accept-Encoding']
+    
+    response = client.post('/process', data=b'not gzip', content_type='application/json',
+                           headers={'Content-Encoding': 'gzip'})
+    assert response.status_code == 400
+
+def test_oversized_request_is_refused():
+    """Test that a request expanding past max_request_size gets 413."""
+    app = Flask(__name__)
+    http_compression.init_app(app, max_request_size=1000)
+    
+    @app.route('/echo', methods=['POST'])
+    def echo():
+        return jsonify(size=len(request.get_data()))
+    
+    client = app.test_client()
+    small = client.post('/echo', data=gzip.compress(b"0" * 500), headers={'Content-Encoding': 'gzip'})
+    assert small.get_json() == {'size': 500}
+    
+    large = client.post('/echo', data=gzip.compress(b"0" * 5000), headers={'Content-Encoding': 'gzip'})
+    assert large.status_code == 413
@@ -0,0 +1,97 @@
+import os
+import threading
+import pytest
+from flask import Flask
+from src.job_manager import JobManager, job_blueprint
+
+@pytest.fixture
+def job_manager():
+    """Create a JobManager instance for testing."""
+    manager = JobManager(max_workers=2, history_size=2)
+    yield manager
+    manager.shutdown()
+
+def test_job_result_and_progress(job_manager):
+    """Test that a job records its progress and result."""
+    def work(job, items):
+        for index, _ in enumerate(items):
+            job.update_progress(index + 1, len(items))
+        return sum(items)
+    
+    job = job_manager.submit("sum", work, [1, 2, 3])
+    job_manager.shutdown()
+    
+    status = job.to_dict()
+    assert status["status"] == "succeeded"
+    assert status["progress"] == {"completed": 3, "total": 3}
+    assert job.result == 6
+
+def test_job_failure(job_manager):
+    """Test that an exception marks the job as failed."""
+    def work(job):
+        raise ValueError("bad input")
+    
+    job = job_manager.submit("fail", work)
+    job_manager.shutdown()
+    
+    assert job.status == "failed"
+    assert job.error == "bad input"
+    assert job.finished
+
+def test_running_job_status(job_manager):
+    """Test the status of a job that has not finished."""
+    release = threading.Event()
+    job = job_manager.submit("wait", lambda job: release.wait())
+    
+    assert job_manager.get(job.id).finished is False
+    release.set()
+
+def test_history_is_bounded(job_manager):
+    """Test that only the most recent finished jobs are retained."""
+    jobs = []
+    for _ in range(3):
+        job = job_manager.submit("noop", lambda job: None)
+        while not job.finished:
+            threading.Event().wait(0.01)
+        jobs.append(job)
+    
+    assert job_manager.get(jobs[0].id) is None
+    assert job_manager.get(jobs[1].id) is jobs[1]
+    assert job_manager.get(jobs[2].id) is jobs[2]
+
+def test_large_results_are_kept_on_disk(tmp_path):
+    """Test that a result above max_result_memory_bytes is spilled and removed when its job is evicted."""
+    manager = JobManager(max_workers=1, history_size=1, result_dir=str(tmp_path), max_result_memory_bytes=1024)
+    large = manager.submit("large", lambda job: {"data": "x" * 4096})
+    small = manager.submit("small", lambda job: {"data": "x"})
+    manager.shutdown()
+    
+    # The large job was evicted by the small one, which stays in memory
+    assert os.listdir(tmp_path) == []
+    assert small.result == {"data": "x"}
+    
+    manager = JobManager(max_workers=1, history_size=1, result_dir=str(tmp_path), max_result_memory_bytes=1024)
+    large = manager.submit("large", lambda job: {"data": "x" * 4096})
+    manager.shutdown()
+    
+    assert large._result is None
+    assert os.listdir(tmp_path) == [f"{large.id}.pickle"]
+    assert large.result == {"data": "x" * 4096}
+
+@pytest.mark.parametrize("result, status_code, body", [
+    ({"total": 6}, 200, {"total": 6}),
+    (({"status": "error"}, 400), 400, {"status": "error"}),
+    (b'{"encoded": true}', 200, {"encoded": True}),
+])
+def test_job_routes(job_manager, result, status_code, body):
+    """Test the job status and result routes for each kind of result."""
+    app = Flask(__name__)
+    app.register_blueprint(job_blueprint(job_manager))
+    job = job_manager.submit("work", lambda job: result)
+    job_manager.shutdown()
+    
+    with app.test_client() as client:
+        assert client.get(f"/jobs/{job.id}").json["status"] == "succeeded"
+        response = client.get(f"/jobs/{job.id}/result")
+        assert (response.status_code, response.json) == (status_code, body)
+        assert client.get("/jobs/missing/result").status_code == 404
@@ -0,0 +1,65 @@
+import io
+import json
+import pytest
+
+from src import json_codec
+
+def test_compact_output_by_default():
+    """Test that values are encoded compactly and round-trip."""
+    value = {"id": 1, "name": "café", "tags": ["a", "b"], "nested": {"ok": True, "none": None}}
+    
+    encoded = json_codec.dumps(value)
+    assert encoded == json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    assert json_codec.loads(encoded) == value
+    assert json_codec.loads(json_codec.dumps_bytes(value)) == value
+
+def test_pretty_output_matches_indent_2():
+    """Test that pretty output is indented like json.dumps(indent=2)."""
+    value = {"data": [{"id": 1, "values": [1, 2]}, {"id": 2, "values": []}], "meta": {}}
+    assert json_codec.dumps(value, pretty=True) == json.dumps(value, indent=2)
+
+def test_non_ascii_text_is_written_as_utf8():
+    """Test the documented difference from json.dumps: non-ASCII text is not escaped."""
+    value = {"name": "café"}
+    
+    assert json_codec.dumps_bytes(value, pretty=True) == json.dumps(value, indent=2, ensure_ascii=False).encode("utf-8")
+    assert json_codec.loads(json.dumps(value, indent=2)) == json_codec.loads(json_codec.dumps_bytes(value, pretty=True))
+
+def test_values_only_the_standard_library_handles():
+    """Test the fallbacks for big integers, non-string keys and NaN."""
+    assert json_codec.loads(json_codec.dumps({"big": 2 ** 70})) == {"big": 2 ** 70}
+    assert json_codec.loads(json_codec.dumps({1: "one"})) == {"1": "one"}
+    assert json_codec.loads('{"value": NaN}')["value"] != json_codec.loads('{"value": NaN}')["value"]
+
+def test_default_and_errors():
+    """Test that unsupported objects go through default and invalid documents raise JSONDecodeError."""
+    class Thing:
+        pass
+    
+    assert json_codec.loads(json_codec.dumps({"thing": Thing()}, default=lambda obj: "thing")) == {"thing": "thing"}
+    with pytest.raises(TypeError):
+        json_codec.dumps({"thing": Thing()})
+    with pytest.raises(json_codec.JSONDecodeError):
+        json_codec.loads('{"id": ')
+
+def test_load_and_dump_text_and_binary_files():
+    """Test file helpers in both text and binary mode."""
+    value = {"id": 1, "name": "café"}
+    
+    binary = io.BytesIO()
+    json_codec.dump(value, binary)
+    text = io.StringIO()
+    json_codec.dump(value, text, pretty=True)
+    
+    assert json_codec.load(io.BytesIO(binary.getvalue())) == value
+    assert json_codec.load(io.StringIO(text.getvalue())) == value
+
+def test_standard_library_backend_gives_the_same_output(monkeypatch):
+    """Test that output does not depend on whether orjson is installed."""
+    value = {"id": 1, "name": "café", "data": [{"x": 1.5}, {"y": [True, None]}]}
+    expected = (json_codec.dumps(value), json_codec.dumps(value, pretty=True))
+    
+    monkeypatch.setattr(json_codec, "orjson", None)
+    assert (json_codec.dumps(value), json_codec.dumps(value, pretty=True)) == expected
+    assert json_codec.dumps_bytes(value) == expected[0].encode("utf-8")
+    assert json_codec.loads(expected[0]) == value
@@ -0,0 +1,143 @@
+import json
+import pytest
+
+import json_stream
+from json_stream import sniff_json_array, scan_json_array, iter_json_array_chunks
+
+@pytest.fixture(autouse=True)
+def small_buffer(monkeypatch):
+    """Use a tiny read buffer so values span buffer refills."""
+    monkeypatch.setattr(json_stream, "BUFFER_SIZE", 7)
+
+def write_json(path, data, **kwargs):
+    """Write a JSON test file."""
+    with open(path, 'w') as f:
+        json.dump(data, f, **kwargs)
+    return str(path)
+
+def test_object_document(tmp_path):
+    """Test streaming the data array of an object with fields before and after it."""
+    data = {
+        "dataset_type": "customer_data",
+        "record_count": 5,
+        "data": [{"id": i, "name": f"customer \"{i}\"", "score": i * 1.5} for i in range(5)],
+        "trailer": {"checksum": 12345}
+    }
+    path = write_json(tmp_path / "data.json", data, indent=2)
+    
+    layout = scan_json_array(path)
+    
+    assert layout.kind == 'object'
+    assert layout.item_count is None
+    assert layout.template == {"dataset_type": "customer_data", "record_count": 5}
+    assert layout.key_order == ["dataset_type", "record_count", "data"]
+    
+    chunks = [items for items, _ in iter_json_array_chunks(path, chunk_size=2, layout=layout)]
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert [item for chunk in chunks for item in chunk] == data["data"]
+    
+    assert layout.item_count == 5
+    assert layout.template == {"dataset_type": "customer_data", "record_count": 5, "trailer": {"checksum": 12345}}
+    assert layout.key_order == ["dataset_type", "record_count", "data", "trailer"]
+
+@pytest.mark.parametrize("chunk_size, expected", [(2, [False, False, True]), (5, [True])])
+def test_trailing_fields_are_added_before_the_last_chunk(tmp_path, chunk_size, expected):
+    """Test that fields after the array are in the template by the time the last chunk is yielded."""
+    path = write_json(tmp_path / "data.json", {"data": list(range(5)), "trailer": "end"})
+    layout = scan_json_array(path)
+    
+    seen = ['trailer' in layout.template for _ in iter_json_array_chunks(path, chunk_size=chunk_size, layout=layout)]
+    
+    assert seen == expected
+
+def test_list_document(tmp_path):
+    """Test streaming a root list of numbers."""
+    path = write_json(tmp_path / "list.json", list(range(100, 110)))
+    
+    layout = scan_json_array(path)
+    
+    assert layout.kind == 'list'
+    assert list(iter_json_array_chunks(path, chunk_size=4, layout=layout)) == [
+        ([100, 101, 102, 103], 12),
+        ([104, 105, 106, 107], 12),
+        ([108, 109], 6)
+    ]
+    assert layout.item_count == 10
+
+def test_empty_array(tmp_path):
+    """Test a document with an empty data array."""
+    path = write_json(tmp_path / "empty.json", {"data": [], "trailer": 1})
+    layout = scan_json_array(path)
+    
+    assert list(iter_json_array_chunks(path, chunk_size=4, layout=layout)) == []
+    assert (layout.item_count, layout.template) == (0, {"trailer": 1})
+
+def test_byte_order_mark(tmp_path):
+    """Test that a file starting with a UTF-8 byte order mark can be streamed."""
+    path = tmp_path / "bom.json"
+    path.write_bytes(b'\xef\xbb\xbf{"source": "caf\xc3\xa9", "data": [1, 2, 3]}')
+    
+    layout = scan_json_array(str(path))
+    
+    assert layout.template == {"source": "café"}
+    assert list(iter_json_array_chunks(str(path), chunk_size=2)) == [([1, 2], 2), ([3], 1)]
+
+@pytest.mark.parametrize("text", ['[1, 2]garbage', '{"data": [1, 2]} {}', '{"data": [1, 2], "trailer": 1}]'])
+def test_text_after_the_document_is_rejected(tmp_path, text):
+    """Test that text after the root value fails the last chunk, like json.load rejects it."""
+    path = tmp_path / "extra.json"
+    path.write_text(text)
+    
+    chunks = iter_json_array_chunks(str(path), chunk_size=1)
+    assert next(chunks) == ([1], 1)
+    with pytest.raises(json.JSONDecodeError):
+        next(chunks)
+
+def test_trailing_whitespace_is_accepted(tmp_path):
+    """Test that whitespace after the root value is allowed."""
+    path = tmp_path / "spaced.json"
+    path.write_text('{"data": [1, 2]}\n\n  ')
+    
+    assert list(iter_json_array_chunks(str(path))) == [([1, 2], 2)]
+
+def test_byte_budget(tmp_path):
+    """Test chunks cut by a byte budget that changes between chunks."""
+    path = write_json(tmp_path / "list.json", ["a" * 8, "b" * 8, "c" * 8, "d" * 8, "e" * 8])
+    budgets = iter([20, 10, 100])
+    
+    chunks = list(iter_json_array_chunks(path, max_bytes=lambda: next(budgets)))
+    
+    # Each item takes 10 characters including its quotes
+    assert [(len(items), size) for items, size in chunks] == [(2, 20), (1, 10), (2, 20)]
+
+@pytest.mark.parametrize("data", [
+    {"records": [1, 2, 3]},
+    {"data": {"nested": True}},
+    "just a string",
+])
+def test_documents_that_cannot_be_streamed(tmp_path, data):
+    """Test that documents without a streamable array are reported as such."""
+    path = write_json(tmp_path / "other.json", data)
+    
+    assert scan_json_array(path) is None
+
+@pytest.mark.parametrize("text, expected", [
+    ('  [1, 2, 3]', 'list'),
+    ('{"dataset_type": "logs", "data": [{"id": 1}]}', 'object'),
+    ('{"metadata": {"data": [1]}}', 'object'),
+    ('{"records": [1, 2, 3]}', None),
+    ('"data": [', None),
+])
+def test_sniff_json_array(tmp_path, text, expected):
+    """Test guessing the layout from the start of a file."""
+    path = tmp_path / "sniff.json"
+    path.write_text(text)
+    
+    assert sniff_json_array(str(path)) == expected
+
+def test_sniff_reads_only_a_prefix(tmp_path, monkeypatch):
+    """Test that a data array starting after the scanned prefix is not found."""
+    monkeypatch.setattr(json_stream, "PREFIX_SCAN_BYTES", 32)
+    path = write_json(tmp_path / "late.json", {"description": "x" * 64, "data": [1, 2]})
+    
+    assert sniff_json_array(path) is None
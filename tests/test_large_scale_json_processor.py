@@ -0,0 +1,772 @@
+import os
+import json
+import glob
+import gzip
+import time
+import asyncio
+import pytest
+import pandas as pd
+from aiohttp import web
+
+import large_scale_json_processor
+from large_scale_json_processor import JSONProcessor, ChunkBudget, MergedResponseWriter
+from src.retry_policy import RetryPolicy
+from src.output_formats import OutputFormat, read_document
+
+async def echo_handler(request):
+    """Mock processing API that returns the posted data."""
+    data = await request.json()
+    return web.json_response({"status": "success", "processed_data": data})
+
+async def start_api(handler=echo_handler):
+    """Start a local mock processing API and return its runner and endpoint."""
+    app = web.Application(client_max_size=1024 ** 3)
+    app.router.add_post('/process', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}/process"
+
+@pytest.fixture
+def output_dir(tmp_path, monkeypatch):
+    """Redirect processor output to a temporary directory."""
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    monkeypatch.setattr(large_scale_json_processor, "OUTPUT_DIR", str(output_dir))
+    return output_dir
+
+@pytest.fixture
+def input_dir(tmp_path):
+    """Create a directory of small JSON files."""
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    for i in range(6):
+        with open(input_dir / f"example{i}.json", 'w') as f:
+            json.dump({"id": i, "name": f"record {i}"}, f)
+    return input_dir
+
+def test_pooled_session_reuses_connections(input_dir, output_dir, monkeypatch):
+    """Test that one run shares a pooled session across requests."""
+    async def run():
+        runner, endpoint = await start_api()
+        monkeypatch.setattr(large_scale_json_processor, "API_ENDPOINT", endpoint)
+        try:
+            processor = JSONProcessor(connection_limit_per_host=2)
+            processor.json_files_dir = str(input_dir)
+            results = await processor.process_json_files()
+        finally:
+            await runner.cleanup()
+        return processor, results
+    
+    processor, results = asyncio.run(run())
+    
+    assert [r['status'] for r in results] == ['success'] * 6
+    assert processor._session is None
+    stats = processor.connection_stats
+    assert stats['requests'] == 6
+    assert stats['connections_created'] <= 2
+    assert stats['connections_created'] + stats['connections_reused'] == 6
+
+def test_large_file_is_streamed_in_chunks(tmp_path, output_dir, monkeypatch):
+    """Test that big files are sent in chunks read straight from the file."""
+    monkeypatch.setattr(large_scale_json_processor, "STREAM_MIN_BYTES", 0)
+    
+    input_dir = tmp_path / "large"
+    input_dir.mkdir()
+    with open(input_dir / "large.json", 'w') as f:
+        json.dump({"dataset_type": "sensor", "data": [{"id": i} for i in range(7)]}, f)
+    
+    received = []
+    
+    async def handler(request):
+        data = await request.json()
+        received.append(data)
+        return web.json_response({"status": "success", "processed_data": data})
+    
+    async def run():
+        runner, endpoint = await start_api(handler)
+        monkeypatch.setattr(large_scale_json_processor, "API_ENDPOINT", endpoint)
+        try:
+            processor = JSONProcessor()
+            processor.json_files_dir = str(input_dir)
+            # Items like {"id": 0} take 9 bytes, so three of them fill a chunk
+            processor.chunk_budget = ChunkBudget(target_bytes=25)
+            return await processor.process_json_files()
+        finally:
+            await runner.cleanup()
+    
+    results = asyncio.run(run())
+    
+    assert results[0]['status'] == 'chunked'
+    assert results[0]['successful_chunks'] == 3
+    assert [chunk['chunk_info']['chunk_index'] for chunk in received] == [1, 2, 3]
+    assert [chunk['chunk_info']['item_offset'] for chunk in received] == [0, 3, 6]
+    assert all(chunk['dataset_type'] == 'sensor' for chunk in received)
+    assert [item['id'] for chunk in received for item in chunk['data']] == list(range(7))
+    
+    with open(output_dir / "merged_response_large.json") as f:
+        merged = json.load(f)
+    assert merged['merged_info']['total_items'] == 7
+
+def test_chunks_of_one_file_are_sent_concurrently(tmp_path, output_dir, monkeypatch):
+    """Test that a single large file uses every request slot and keeps chunk order."""
+    monkeypatch.setattr(large_scale_json_processor, "MAX_CONCURRENT_REQUESTS", 3)
+    
+    input_dir = tmp_path / "large"
+    input_dir.mkdir()
+    with open(input_dir / "large.json", 'w') as f:
+        json.dump({"source": "sensors", "data": [{"id": i} for i in range(12)]}, f)
+    
+    in_flight = {"current": 0, "max": 0}
+    
+    async def handler(request):
+        data = await request.json()
+        in_flight["current"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["current"])
+        # Later chunks answer first
+        await asyncio.sleep(0.05 / data["chunk_info"]["chunk_index"])
+        in_flight["current"] -= 1
+        return web.json_response({"status": "success", "processed_data": data})
+    
+    async def run():
+        runner, endpoint = await start_api(handler)
+        monkeypatch.setattr(large_scale_json_processor, "API_ENDPOINT", endpoint)
+        try:
+            processor = JSONProcessor()
+            processor.json_files_dir = str(input_dir)
+            # A fixed budget of two items per chunk; the file holds about 14 bytes per item
+            processor.chunk_budget = ChunkBudget(target_bytes=30, min_bytes=30, max_bytes=30)
+            return await processor.process_json_files()
+        finally:
+            await runner.cleanup()
+    
+    results = asyncio.run(run())
+    
+    assert in_flight["max"] == 3
+    assert [chunk['chunk_index'] for chunk in results[0]['chunk_results']] == [1, 2, 3, 4, 5, 6]
+    
+    with open(output_dir / "merged_response_large.json") as f:
+        merged = json.load(f)
+    assert [item['id'] for item in merged['data']] == list(range(12))
+
+def test_loaded_files_are_chunked_by_byte_budget(tmp_path, output_dir, monkeypatch):
+    """Test that a loaded file with few but large records is chunked once it exceeds the chunk budget."""
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    with open(input_dir / "wide.json", 'w') as f:
+        json.dump({"data": [{"id": i, "text": "x" * 100} for i in range(4)]}, f)
+    with open(input_dir / "narrow.json", 'w') as f:
+        json.dump({"data": [{"id": i} for i in range(4)]}, f)
+    
+    async def run():
+        runner, endpoint = await start_api()
+        monkeypatch.setattr(large_scale_json_processor, "API_ENDPOINT", endpoint)
+        try:
+            processor = JSONProcessor()
+            processor.json_files_dir = str(input_dir)
+            processor.chunk_budget = ChunkBudget(target_bytes=300, min_bytes=300, max_bytes=300)
+            return await processor.process_json_files()
+        finally:
+            await runner.cleanup()
+    
+    results = {r['filename']: r for r in asyncio.run(run())}
+    
+    assert (results['wide.json']['status'], results['wide.json']['total_chunks']) == ('chunked', 2)
+    assert results['narrow.json']['status'] == 'success'
+
+def test_files_are_taken_from_a_bounded_queue(tmp_path, output_dir, monkeypatch):
+    """Test that only file_workers files are loaded at a time and results keep input order."""
+    input_dir = tmp_path / "many"
+    input_dir.mkdir()
+    for i in range(12):
+        with open(input_dir / f"example{i:02d}.json", 'w') as f:
+            json.dump({"id": i}, f)
+    
+    loaded = 0
+    max_loaded = 0
+    
+    def counting_load(file_path):
+        nonlocal loaded, max_loaded
+        loaded += 1
+        max_loaded = max(max_loaded, loaded)
+        with open(file_path) as f:
+            return json.load(f), 0.0, 0.0
+    
+    async def slow_handler(request):
+        nonlocal loaded
+        data = await request.json()
+        await asyncio.sleep(0.02)
+        loaded -= 1
+        return web.json_response({"status": "success", "processed_data": data})
+    
+    monkeypatch.setattr(large_scale_json_processor, "_load_json_file", counting_load)
+    
+    async def run():
+        runner, endpoint = await start_api(slow_handler)
+        monkeypatch.setattr(large_scale_json_processor, "API_ENDPOINT", endpoint)
+        try:
+            processor = JSONProcessor(file_workers=2)
+            processor.json_files_dir = str(input_dir)
+            return await processor.process_json_files()
+        finally:
+            await runner.cleanup()
+    
+    results = asyncio.run(run())
+    
+    # Results are in the order the files were listed, not the order they completed in
+    listed = [os.path.basename(path) for path in glob.glob(os.path.join(str(input_dir), "*.json"))]
+    assert [r['filename'] for r in results] == listed
+    assert all(r['status'] == 'success' for r in results)
+    # Five request slots, but only two files are ever loaded
+    assert max_loaded == 2
+
+def test_file_decoding_does_not_block_requests(input_dir, output_dir, monkeypatch):
+    """Test that the event loop keeps running while files are read and decoded."""
+    def slow_load(file_path):
+        time.sleep(0.2)
+        with open(file_path) as f:
+            return json.load(f), 0.2, 0.0
+    
+    monkeypatch.setattr(large_scale_json_processor, "_load_json_file", slow_load)
+    
+    async def run():
+        runner, endpoint = await start_api()
+        monkeypatch.setattr(large_scale_json_processor, "API_ENDPOINT", endpoint)
+        ticks = 0
+        
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        
+        beat = asyncio.create_task(heartbeat())
+        try:
+            processor = JSONProcessor(io_workers=2)
+            processor.json_files_dir = str(input_dir)
+            results = await processor.process_json_files()
+        finally:
+            beat.cancel()
+            await runner.cleanup()
+        return results, ticks
+    
+    results, ticks = asyncio.run(run())
+    
+    assert [r['status'] for r in results] == ['success'] * 6
+    # Six 0.2s decodes on two threads take about 0.6s, during which the loop keeps ticking
+    assert ticks >= 20
+
+def test_large_files_are_decoded_in_process_pool(tmp_path, output_dir, monkeypatch):
+    """Test that loaded files are decoded in worker processes while streamed ones are read in place."""
+    monkeypatch.setattr(large_scale_json_processor, "PROCESS_DECODE_MIN_BYTES", 0)
+    monkeypatch.setattr(large_scale_json_processor, "STREAM_MIN_BYTES", 200)
+    
+    input_dir = tmp_path / "large"
+    input_dir.mkdir()
+    with open(input_dir / "small.json", 'w') as f:
+        json.dump({"id": 1}, f)
+    with open(input_dir / "large.json", 'w') as f:
+        json.dump({"source": "sensors", "data": [{"id": i} for i in range(40)]}, f)
+    
+    async def run():
+        runner, endpoint = await start_api()
+        monkeypatch.setattr(large_scale_json_processor, "API_ENDPOINT", endpoint)
+        try:
+            processor = JSONProcessor(decode_processes=1)
+            processor.json_files_dir = str(input_dir)
+            processor.chunk_budget = ChunkBudget(target_bytes=100, min_bytes=100, max_bytes=100)
+            results = await processor.process_json_files()
+        finally:
+            await runner.cleanup()
+        return processor, results
+    
+    processor, results = asyncio.run(run())
+    
+    statuses = {r['filename']: r['status'] for r in results}
+    assert statuses == {'small.json': 'success', 'large.json': 'chunked'}
+    assert processor._decode_executor is None
+    with open(output_dir / "merged_response_large.json") as f:
+        assert [item['id'] for item in json.load(f)['data']] == list(range(40))
+
+def test_compressed_ndjson_output(tmp_path, output_dir, monkeypatch):
+    """Test that responses and chunk files are written as gzipped NDJSON and merged from it."""
+    monkeypatch.setattr(large_scale_json_processor, "STREAM_MIN_BYTES", 50)
+    
+    input_dir = tmp_path / "large"
+    input_dir.mkdir()
+    with open(input_dir / "small.json", 'w') as f:
+        json.dump({"id": 1}, f)
+    with open(input_dir / "large.json", 'w') as f:
+        json.dump({"source": "sensors", "data": [{"id": i} for i in range(10)]}, f)
+    
+    async def run():
+        runner, endpoint = await start_api()
+        monkeypatch.setattr(large_scale_json_processor, "API_ENDPOINT", endpoint)
+        try:
+            processor = JSONProcessor(output_format="ndjson+gzip")
+            processor.json_files_dir = str(input_dir)
+            processor.chunk_budget = ChunkBudget(target_bytes=40, min_bytes=40, max_bytes=40)
+            return await processor.process_json_files()
+        finally:
+            await runner.cleanup()
+    
+    results = {r['filename']: r for r in asyncio.run(run())}
+    
+    assert results['small.json']['response_file'] == str(output_dir / "response_small.ndjson.gz")
+    assert read_document(results['small.json']['response_file'])['processed_data'] == {"id": 1}
+    
+    chunk_files = [chunk['response_file'] for chunk in results['large.json']['chunk_results']]
+    assert len(chunk_files) > 1 and all(path.endswith('.ndjson.gz') for path in chunk_files)
+    
+    merged_path = output_dir / "merged_response_large.ndjson.gz"
+    assert results['large.json']['status'] == 'chunked'
+    with gzip.open(merged_path, 'rt') as f:
+        lines = f.read().splitlines()
+    assert [json.loads(line) for line in lines[:10]] == [{"id": i} for i in range(10)]
+    
+    merged = read_document(str(merged_path))
+    assert merged['source'] == 'sensors'
+    assert [item['id'] for item in merged['data']] == list(range(10))
+    assert merged['merged_info']['total_items'] == 10
+
+def test_restarted_run_resumes_from_manifest(tmp_path, output_dir, monkeypatch):
+    """Test that a rerun skips completed files and chunks and only retries failed chunks."""
+    monkeypatch.setattr(large_scale_json_processor, "STREAM_MIN_BYTES", 50)
+    
+    input_dir = tmp_path / "large"
+    input_dir.mkdir()
+    with open(input_dir / "small.json", 'w') as f:
+        json.dump({"id": 1}, f)
+    with open(input_dir / "large.json", 'w') as f:
+        json.dump({"source": "sensors", "data": [{"id": i} for i in range(7)]}, f)
+    
+    received = []
+    fail_offsets = {3}
+    
+    async def handler(request):
+        data = await request.json()
+        received.append(data)
+        if data.get("chunk_info", {}).get("item_offset") in fail_offsets:
+            return web.Response(status=500, text="failed")
+        return web.json_response({"status": "success", "processed_data": data})
+    
+    async def run(target_bytes):
+        runner, endpoint = await start_api(handler)
+        monkeypatch.setattr(large_scale_json_processor, "API_ENDPOINT", endpoint)
+        try:
+            # Fail chunks at once instead of retrying them
+            processor = JSONProcessor(retry_policy=RetryPolicy(max_attempts=1))
+            processor.json_files_dir = str(input_dir)
+            processor.chunk_budget = ChunkBudget(target_bytes=target_bytes, min_bytes=target_bytes, max_bytes=target_bytes)
+            results = await processor.process_json_files()
+        finally:
+            await runner.cleanup()
+        return {r['filename']: r for r in results}
+    
+    # Items take 9 bytes, so a budget of 25 bytes makes chunks of three items
+    results = asyncio.run(run(25))
+    assert results['small.json']['status'] == 'success'
+    assert results['large.json']['failed_chunks'] == 1
+    assert not (output_dir / "merged_response_large.json").exists()
+    
+    # The rerun uses a different chunk size; only the failed item range is sent again
+    received.clear()
+    fail_offsets.clear()
+    results = asyncio.run(run(9))
+    
+    assert [(chunk['chunk_info']['item_offset'], chunk['chunk_info']['items_in_chunk']) for chunk in received] == [(3, 1), (4, 1), (5, 1)]
+    assert results['small.json']['resumed'] is True
+    large = results['large.json']
+    assert (large['total_chunks'], large['resumed_chunks'], large['successful_chunks']) == (5, 2, 5)
+    assert [chunk['item_offset'] for chunk in large['chunk_results']] == [0, 3, 4, 5, 6]
+    
+    with open(output_dir / "merged_response_large.json") as f:
+        merged = json.load(f)
+    assert [item['id'] for item in merged['data']] == list(range(7))
+    
+    # A completed run is skipped entirely
+    received.clear()
+    results = asyncio.run(run(9))
+    assert received == []
+    assert results['large.json']['resumed'] is True
+
+def test_changed_file_is_processed_again(tmp_path, output_dir, monkeypatch):
+    """Test that a file whose contents changed is not skipped."""
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    with open(input_dir / "example.json", 'w') as f:
+        json.dump({"id": 1}, f)
+    
+    received = []
+    
+    async def handler(request):
+        received.append(await request.json())
+        return web.json_response({"status": "success"})
+    
+    async def run():
+        runner, endpoint = await start_api(handler)
+        monkeypatch.setattr(large_scale_json_processor, "API_ENDPOINT", endpoint)
+        try:
+            processor = JSONProcessor()
+            processor.json_files_dir = str(input_dir)
+            return await processor.process_json_files()
+        finally:
+            await runner.cleanup()
+    
+    asyncio.run(run())
+    asyncio.run(run())
+    with open(input_dir / "example.json", 'w') as f:
+        json.dump({"id": 2}, f)
+    asyncio.run(run())
+    
+    assert received == [{"id": 1}, {"id": 2}]
+
+def test_manifest_write_error_fails_only_its_file(input_dir, output_dir, monkeypatch):
+    """Test that a file whose result cannot be checkpointed is failed while the others complete."""
+    record_file = large_scale_json_processor.RunManifest.record_file
+    
+    def failing_record_file(manifest, file_path, result):
+        if file_path.endswith("example0.json"):
+            raise OSError("disk full")
+        record_file(manifest, file_path, result)
+    
+    monkeypatch.setattr(large_scale_json_processor.RunManifest, "record_file", failing_record_file)
+    
+    async def run():
+        runner, endpoint = await start_api()
+        monkeypatch.setattr(large_scale_json_processor, "API_ENDPOINT", endpoint)
+        try:
+            processor = JSONProcessor()
+            processor.json_files_dir = str(input_dir)
+            return processor, await processor.process_json_files()
+        finally:
+            await runner.cleanup()
+    
+    processor, results = asyncio.run(run())
+    
+    failed = [(r['filename'], r.get('error_type')) for r in results if r['status'] != 'success']
+    assert (len(results), failed) == (6, [('example0.json', 'manifest')])
+    assert processor.metrics.get("example0.json").status == 'error'
+
+def test_request_and_response_bodies_are_compressed(tmp_path, output_dir, monkeypatch):
+    """Test that request bodies are sent gzip-compressed when asked for and compressed responses are read."""
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    payload = {"data": [{"id": i, "name": f"record {i}", "status": "active"} for i in range(200)]}
+    with open(input_dir / "records.json", 'w') as f:
+        json.dump(payload, f)
+    
+    encodings = []
+    
+    async def handler(request):
+        # aiohttp decompresses request bodies itself, so check the header and the raw size
+        encodings.append((request.headers.get('Content-Encoding'), request.content_length))
+        data = await request.json()
+        assert 'gzip' in request.headers['Accept-Encoding']
+        body = gzip.compress(json.dumps({"status": "success", "processed_data": data}).encode('utf-8'))
+        return web.Response(body=body, content_type='application/json', headers={'Content-Encoding': 'gzip'})
+    
+    async def run():
+        runner, endpoint = await start_api(handler)
+        monkeypatch.setattr(large_scale_json_processor, "API_ENDPOINT", endpoint)
+        try:
+            processor = JSONProcessor(request_encoding="gzip")
+            processor.json_files_dir = str(input_dir)
+            results = await processor.process_json_files()
+        finally:
+            await runner.cleanup()
+        return processor, results
+    
+    processor, results = asyncio.run(run())
+    
+    assert results[0]['status'] == 'success'
+    encoding, sent_bytes = encodings[0]
+    assert encoding == 'gzip'
+    stats = processor.transfer_stats
+    assert stats['request_bytes_sent'] == sent_bytes
+    assert stats['request_bytes_sent'] * 5 < stats['request_bytes']
+    assert stats['response_bytes_received'] * 5 < stats['response_bytes']
+    with open(output_dir / "response_records.json") as f:
+        assert json.load(f)['processed_data'] == payload
+
+@pytest.mark.parametrize("status", [415, 400])
+def test_uncompressed_requests_when_api_refuses_encoding(tmp_path, output_dir, monkeypatch, status):
+    """Test that a 4xx answer to a compressed body makes the processor fall back to uncompressed bodies."""
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    with open(input_dir / "records.json", 'w') as f:
+        json.dump({"data": [{"id": i} for i in range(200)]}, f)
+    
+    async def handler(request):
+        if request.headers.get('Content-Encoding'):
+            # A server that does not understand compression
+            return web.json_response({"status": "error"}, status=status)
+        return web.json_response({"status": "success", "processed_data": await request.json()})
+    
+    async def run():
+        runner, endpoint = await start_api(handler)
+        monkeypatch.setattr(large_scale_json_processor, "API_ENDPOINT", endpoint)
+        try:
+            processor = JSONProcessor(request_encoding="gzip", retry_policy=RetryPolicy(base_delay=0))
+            processor.json_files_dir = str(input_dir)
+            results = await processor.process_json_files()
+        finally:
+            await runner.cleanup()
+        return processor, results
+    
+    processor, results = asyncio.run(run())
+    
+    assert results[0]['status'] == 'success'
+    assert processor.request_encoding is None
+
+def test_requests_are_uncompressed_by_default(input_dir, output_dir, monkeypatch):
+    """Test that request bodies are only compressed when a request encoding is asked for."""
+    encodings = []
+    
+    async def handler(request):
+        encodings.append(request.headers.get('Content-Encoding'))
+        return web.json_response({"status": "success", "processed_data": await request.json()})
+    
+    async def run():
+        runner, endpoint = await start_api(handler)
+        monkeypatch.setattr(large_scale_json_processor, "API_ENDPOINT", endpoint)
+        monkeypatch.setattr(large_scale_json_processor, "COMPRESS_MIN_BYTES", 0)
+        try:
+            processor = JSONProcessor()
+            processor.json_files_dir = str(input_dir)
+            return await processor.process_json_files()
+        finally:
+            await runner.cleanup()
+    
+    results = asyncio.run(run())
+    
+    assert all(r['status'] == 'success' for r in results)
+    assert encodings == [None] * 6
+
+def test_unavailable_api_is_retried_after_delay(input_dir, output_dir, monkeypatch):
+    """Test that 503 answers are retried after their Retry-After delay and counted."""
+    refused = set()
+    
+    async def handler(request):
+        data = await request.json()
+        if data['id'] not in refused:
+            refused.add(data['id'])
+            return web.json_response({"status": "error"}, status=503, headers={'Retry-After': '0'})
+        return web.json_response({"status": "success", "processed_data": data})
+    
+    async def run():
+        runner, endpoint = await start_api(handler)
+        monkeypatch.setattr(large_scale_json_processor, "API_ENDPOINT", endpoint)
+        try:
+            processor = JSONProcessor(retry_policy=RetryPolicy(base_delay=0, failure_threshold=100))
+            processor.json_files_dir = str(input_dir)
+            results = await processor.process_json_files()
+        finally:
+            await runner.cleanup()
+        return processor, results
+    
+    processor, results = asyncio.run(run())
+    
+    assert all(r['status'] == 'success' for r in results)
+    assert processor.retry_policy.stats['retries'] == 6
+
+def test_run_metrics_are_saved_with_the_results(tmp_path, output_dir, monkeypatch):
+    """Test that files and chunks are timed and the metrics land in the workbook and a JSON file."""
+    monkeypatch.setattr(large_scale_json_processor, "STREAM_MIN_BYTES", 50)
+    
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    with open(input_dir / "small.json", 'w') as f:
+        json.dump({"id": 1}, f)
+    with open(input_dir / "large.json", 'w') as f:
+        json.dump({"source": "sensors", "data": [{"id": i} for i in range(6)]}, f)
+    
+    async def run():
+        runner, endpoint = await start_api()
+        monkeypatch.setattr(large_scale_json_processor, "API_ENDPOINT", endpoint)
+        try:
+            processor = JSONProcessor()
+            processor.json_files_dir = str(input_dir)
+            processor.chunk_budget = ChunkBudget(target_bytes=20, min_bytes=20, max_bytes=20)
+            await processor.process_json_files()
+        finally:
+            await runner.cleanup()
+        return processor
+    
+    processor = asyncio.run(run())
+    excel_path = processor.save_results_to_excel()
+    
+    with open(processor.metrics_path) as f:
+        metrics = json.load(f)
+    assert processor.metrics_path == excel_path.replace('.xlsx', '_metrics.json')
+    
+    run = metrics['run']
+    assert (run['files'], run['chunks'], run['records']) == (2, 2, 7)
+    assert run['bytes_in'] == os.path.getsize(input_dir / "small.json") + os.path.getsize(input_dir / "large.json")
+    assert run['latency_s']['request']['count'] == 3
+    assert run['latency_s']['request']['p50'] <= run['latency_s']['request']['p99']
+    assert run['records_per_s'] > 0
+    
+    chunks = [chunk for chunk in metrics['chunks'] if chunk['filename'] == 'large.json']
+    assert [chunk['records'] for chunk in chunks] == [3, 3]
+    assert all(chunk['send_s'] > 0 and chunk['bytes_out'] > 0 for chunk in chunks)
+    large = next(unit for unit in metrics['files'] if unit['filename'] == 'large.json')
+    assert large['bytes_out'] == os.path.getsize(output_dir / "merged_response_large.json")
+    
+    sheets = pd.read_excel(excel_path, sheet_name=None)
+    assert set(sheets) == {'Summary', 'Chunk Details', 'Metrics'}
+    assert sheets['Summary']['Send (s)'].notna().all()
+    assert 'Records/s' in set(sheets['Metrics']['Metric'])
+
+def test_merged_response_writer_matches_json_dump(tmp_path):
+    """Test that the streamed merge writes the same document as dumping it whole."""
+    chunks = [
+        {"status": "success", "processed_data": {"source": "sensors", "meta": {"unit": "C"},
+                                                 "data": [{"id": 0, "tags": ["a", "b"]}, {"id": 1, "tags": []}],
+                                                 "chunk_info": {"chunk_index": 1}}},
+        {"status": "success", "processed_data": {"source": "sensors", "meta": {"unit": "C"},
+                                                 "data": [{"id": 2, "nested": {"x": [1, {"y": None}]}}],
+                                                 "chunk_info": {"chunk_index": 2}}},
+    ]
+    output_path = str(tmp_path / "merged.json")
+    
+    writer = MergedResponseWriter("large.json", output_path)
+    for chunk in chunks:
+        writer.add(chunk)
+    assert writer.close() == output_path
+    
+    expected = {
+        "source": "sensors",
+        "meta": {"unit": "C"},
+        "data": [item for chunk in chunks for item in chunk["processed_data"]["data"]],
+        "merged_info": {"original_file": "large.json", "chunk_count": 2, "total_items": 3}
+    }
+    with open(output_path) as f:
+        assert f.read() == json.dumps(expected, indent=2)
+    assert not os.path.exists(output_path + ".tmp")
+
+@pytest.mark.parametrize("name", ["compact", "ndjson", "pretty+gzip"])
+def test_merged_response_writer_output_formats(tmp_path, name):
+    """Test that merged files in every format read back as the pretty merge does."""
+    chunks = [
+        {"status": "success", "processed_data": {"source": "sensors", "data": [{"id": 0}, {"id": 1}]}},
+        {"status": "success", "processed_data": {"source": "sensors", "data": [{"id": 2}]}}
+    ]
+    expected_path = str(tmp_path / "expected.json")
+    output_format = OutputFormat.parse(name)
+    output_path = str(tmp_path / output_format.file_name("merged.json"))
+    
+    for path, writer_format in ((expected_path, None), (output_path, output_format)):
+        writer = MergedResponseWriter("large.json", path, writer_format)
+        for chunk in chunks:
+            writer.add(chunk)
+        writer.close()
+    
+    assert read_document(output_path) == read_document(expected_path)
+
+def test_merged_response_writer_merges_lists(tmp_path):
+    """Test that list responses are merged into a single list."""
+    output_path = str(tmp_path / "merged.json")
+    
+    writer = MergedResponseWriter("large.json", output_path)
+    writer.add([{"id": 0}])
+    writer.add([])
+    writer.add([{"id": 1}, {"id": 2}])
+    writer.close()
+    
+    with open(output_path) as f:
+        assert f.read() == json.dumps([{"id": 0}, {"id": 1}, {"id": 2}], indent=2)
+
+def test_chunk_responses_stream_into_merged_file(tmp_path, output_dir, monkeypatch):
+    """Test that without chunk files the responses are merged in order as they arrive."""
+    monkeypatch.setattr(large_scale_json_processor, "MAX_CONCURRENT_REQUESTS", 3)
+    
+    input_dir = tmp_path / "large"
+    input_dir.mkdir()
+    with open(input_dir / "large.json", 'w') as f:
+        json.dump({"source": "sensors", "data": [{"id": i} for i in range(12)]}, f)
+    
+    async def handler(request):
+        data = await request.json()
+        # Later chunks answer first
+        await asyncio.sleep(0.05 / data["chunk_info"]["chunk_index"])
+        return web.json_response({"status": "success", "processed_data": data})
+    
+    async def run():
+        runner, endpoint = await start_api(handler)
+        monkeypatch.setattr(large_scale_json_processor, "API_ENDPOINT", endpoint)
+        try:
+            processor = JSONProcessor(write_chunk_files=False)
+            processor.json_files_dir = str(input_dir)
+            processor.chunk_budget = ChunkBudget(target_bytes=30, min_bytes=30, max_bytes=30)
+            return await processor.process_json_files()
+        finally:
+            await runner.cleanup()
+    
+    results = asyncio.run(run())
+    
+    assert results[0]['successful_chunks'] == 6
+    assert all(chunk['response_file'] is None for chunk in results[0]['chunk_results'])
+    assert not [name for name in os.listdir(output_dir) if name.startswith("response_")]
+    
+    with open(output_dir / "merged_response_large.json") as f:
+        merged = json.load(f)
+    assert merged['source'] == 'sensors'
+    assert [item['id'] for item in merged['data']] == list(range(12))
+    assert merged['merged_info']['chunk_count'] == 6
+
+def test_unreadable_chunk_fails_the_streamed_file(tmp_path, output_dir, monkeypatch):
+    """Test that a file whose records turn malformed midway is reported as failed, without a merged file."""
+    monkeypatch.setattr(large_scale_json_processor, "STREAM_MIN_BYTES", 0)
+    
+    input_dir = tmp_path / "large"
+    input_dir.mkdir()
+    items = ", ".join(json.dumps({"id": i}) for i in range(12))
+    (input_dir / "large.json").write_text('{"source": "sensors", "data": [' + items + ', {"id": oops}]}')
+    
+    async def run():
+        runner, endpoint = await start_api()
+        monkeypatch.setattr(large_scale_json_processor, "API_ENDPOINT", endpoint)
+        try:
+            processor = JSONProcessor(write_chunk_files=False)
+            processor.json_files_dir = str(input_dir)
+            processor.chunk_budget = ChunkBudget(target_bytes=30, min_bytes=30, max_bytes=30)
+            return processor, await processor.process_json_files()
+        finally:
+            await runner.cleanup()
+    
+    processor, results = asyncio.run(run())
+    
+    assert (results[0]['status'], results[0]['error_type']) == ('error', 'json_decode')
+    assert results[0]['successful_chunks'] == len(results[0]['chunk_results']) > 0
+    assert processor.metrics.get("large.json").status == 'error'
+    assert not [name for name in os.listdir(output_dir) if name.startswith("merged_response_")]
+
+def test_chunk_budget_follows_latency():
+    """Test that the chunk budget grows for fast chunks and shrinks for slow ones."""
+    budget = ChunkBudget(target_bytes=1000, min_bytes=100, max_bytes=10000, target_seconds=10)
+    
+    # Fast responses grow the budget, at most doubling per chunk
+    budget.record_success(1000, 1.0)
+    assert budget.bytes == 2000
+    
+    # A chunk that took twice the target moves the budget halfway to the ideal size
+    budget.record_success(2000, 20.0)
+    assert budget.bytes == 1500
+    
+    budget.record_success(1500, 1.0)
+    budget.record_success(3000, 0.1)
+    budget.record_success(6000, 0.1)
+    assert budget.bytes == 10000
+
+def test_chunk_budget_shrinks_on_failure():
+    """Test that failures halve the chunk budget down to its minimum."""
+    budget = ChunkBudget(target_bytes=1000, min_bytes=300)
+    
+    budget.record_failure()
+    assert budget.bytes == 500
+    
+    budget.record_failure()
+    assert budget.bytes == 300
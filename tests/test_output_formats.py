@@ -0,0 +1,60 @@
+import os
+import gzip
+import json
+import pytest
+
+from src.output_formats import OutputFormat, FORMAT_NAMES, read_document, is_ndjson
+
+DOCUMENTS = [
+    {"status": "success", "processed_data": {"source": "sensors", "data": [{"id": 0}, {"id": 1}]}},
+    {"source": "sensors", "data": [{"id": 0}], "meta": {"unit": "C"}},
+    [{"id": 0}, {"id": 1}],
+    {"id": 1, "name": "record"},
+    []
+]
+
+@pytest.mark.parametrize("name", FORMAT_NAMES)
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_documents_read_back_in_every_format(tmp_path, name, document):
+    """Test that a document written in any format reads back unchanged."""
+    output_format = OutputFormat.parse(name)
+    path = str(tmp_path / output_format.file_name("response_example.json"))
+    
+    size = output_format.write(path, document)
+    
+    assert output_format.name == name
+    assert size == os.path.getsize(path)
+    assert read_document(path) == document
+
+def test_file_names_follow_the_format():
+    """Test the extensions of the output formats."""
+    assert OutputFormat().file_name("response_a.json") == "response_a.json"
+    assert OutputFormat("compact", "gzip").file_name("response_a.json") == "response_a.json.gz"
+    assert OutputFormat.parse("ndjson+gzip").file_name("response_a.json") == "response_a.ndjson.gz"
+    assert is_ndjson("response_a.ndjson.gz") and not is_ndjson("response_a.json.gz")
+    
+    with pytest.raises(ValueError):
+        OutputFormat.parse("yaml")
+
+def test_pretty_and_compact_match_json_dump(tmp_path):
+    """Test that pretty output keeps the json.dump layout and compact drops the whitespace."""
+    document = DOCUMENTS[0]
+    
+    OutputFormat("pretty").write(str(tmp_path / "pretty.json"), document)
+    OutputFormat("compact", "gzip").write(str(tmp_path / "compact.json.gz"), document)
+    
+    assert (tmp_path / "pretty.json").read_text() == json.dumps(document, indent=2)
+    with gzip.open(tmp_path / "compact.json.gz", "rt") as f:
+        assert f.read() == json.dumps(document, separators=(",", ":"))
+
+def test_ndjson_writes_one_record_per_line(tmp_path):
+    """Test that records get a line each and lists are plain NDJSON."""
+    OutputFormat("ndjson").write(str(tmp_path / "list.ndjson"), DOCUMENTS[2])
+    OutputFormat("ndjson").write(str(tmp_path / "response.ndjson"), DOCUMENTS[0])
+    
+    lines = (tmp_path / "list.ndjson").read_text().splitlines()
+    assert [json.loads(line) for line in lines] == DOCUMENTS[2]
+    
+    lines = (tmp_path / "response.ndjson").read_text().splitlines()
+    assert [json.loads(line) for line in lines[:2]] == [{"id": 0}, {"id": 1}]
+    assert len(lines) == 3
@@ -0,0 +1,61 @@
+import logging
+import threading
+import pytest
+from src import payload_logging
+from src.payload_logging import LazyPayload, PayloadLogger
+
+class RecordingHandler(logging.Handler):
+    """Handler that keeps the formatted messages and the thread that formatted them."""
+    
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.threads = []
+    
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+        self.threads.append(threading.current_thread().name)
+
+@pytest.fixture
+def handler():
+    """Attach a recording handler to a test logger."""
+    logger = logging.getLogger("test_payload_logging")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = RecordingHandler()
+    logger.addHandler(handler)
+    yield handler
+    logger.removeHandler(handler)
+
+def test_lazy_payload_truncates():
+    """Test that rendered payloads are capped."""
+    payload = {"items": list(range(10000))}
+    
+    text = str(LazyPayload(payload, max_chars=50))
+    
+    assert text.startswith('{"items": [0, 1, 2')
+    assert text.endswith("... [truncated at 50 chars]")
+    assert len(text) == 50 + len("... [truncated at 50 chars]")
+
+def test_lazy_payload_small():
+    """Test that small payloads are rendered in full."""
+    assert str(LazyPayload({"a": 1}, max_chars=50)) == '{"a": 1}'
+
+def test_sampled_body_is_written_off_thread(handler):
+    """Test that sampled bodies are formatted by the writer thread."""
+    payload_log = PayloadLogger(logging.getLogger("test_payload_logging"), sample_rate=1.0, max_chars=100)
+    
+    payload_log.info("Received JSON request", {"id": 1})
+    assert payload_logging.flush(5.0)
+    
+    assert handler.messages == ['Received JSON request: {"id": 1}']
+    assert handler.threads == ["payload-log-writer"]
+
+def test_unsampled_body_is_not_logged(handler):
+    """Test that bodies outside the sample are left out."""
+    payload_log = PayloadLogger(logging.getLogger("test_payload_logging"), sample_rate=0.0)
+    
+    payload_log.info("Received JSON request", {"id": 1})
+    assert payload_logging.flush(5.0)
+    
+    assert handler.messages == ["Received JSON request (body not sampled)"]
@@ -0,0 +1,12 @@
+from src.report_index import report_file_name, report_id_from_path
+
+def test_report_id_from_path():
+    """Test deriving the report ID from an input path."""
+    assert report_id_from_path("C:\\json_files\\example12.json") == "12"
+    assert report_id_from_path("/data/json_files/example7.json") == "7"
+    assert report_id_from_path("example3.json") == "3"
+
+def test_report_file_name():
+    """Test taking the file name of Windows and POSIX paths."""
+    assert report_file_name("C:\\json_files\\example12.json") == "example12.json"
+    assert report_file_name("/data/json_files/example7.json") == "example7.json"
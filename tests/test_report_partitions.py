@@ -0,0 +1,74 @@
+import os
+import pytest
+import pandas as pd
+from src.results_store import ResultsStore, ResultsWriter
+from src.report_partitions import ReportPartitions
+
+@pytest.fixture
+def results_store(tmp_path):
+    """Create a ResultsStore instance for testing."""
+    store = ResultsStore(
+        db_path=str(tmp_path / "edit_results.db"),
+        excel_path=str(tmp_path / "edit_results.xlsx")
+    )
+    yield store
+    store.close()
+
+@pytest.fixture
+def report_partitions(results_store, tmp_path):
+    """Create a ReportPartitions instance for testing."""
+    partitions = ReportPartitions(results_store, reports_dir=str(tmp_path / "reports"))
+    yield partitions
+    partitions.close()
+
+def make_row(edit_id, file_name):
+    """Create a result row for testing."""
+    return {
+        "edit_id": edit_id,
+        "timestamp": "2024-01-01 00:00:00",
+        "status": "Success",
+        "file_path": f"C:\\json_files\\{file_name}",
+        "json_input": "{}",
+        "response": "{}"
+    }
+
+def test_unknown_id(report_partitions):
+    """Test that an ID without results has no partition."""
+    assert report_partitions.get("1") is None
+
+def test_get_builds_partition(results_store, report_partitions):
+    """Test building a partition with only the rows of its ID."""
+    results_store.append_many([
+        make_row("Edit 1", "example1.json"),
+        make_row("Edit 2", "example2.json"),
+        make_row("Edit 3", "example1.json")
+    ])
+    
+    path = report_partitions.get("1")
+    
+    df = pd.read_excel(path, sheet_name="Processed JSON")
+    assert list(df["edit_id"]) == ["Edit 1", "Edit 3"]
+    assert results_store.partition_row_id("1") == 3
+
+def test_fresh_partition_is_not_rebuilt(results_store, report_partitions):
+    """Test that a fresh partition is served as is."""
+    results_store.append(make_row("Edit 1", "example1.json"))
+    path = report_partitions.get("1")
+    mtime = os.path.getmtime(path)
+    
+    assert report_partitions.get("1") == path
+    assert os.path.getmtime(path) == mtime
+
+def test_writer_commit_rebuilds_in_background(results_store, report_partitions):
+    """Test that committed rows invalidate and rebuild the affected partitions."""
+    writer = ResultsWriter(results_store, on_commit=report_partitions.rows_committed)
+    writer.submit_many([make_row("Edit 1", "example1.json"), make_row("Edit 2", "example2.json")])
+    writer.close()
+    
+    # Wait for the queued background rebuilds
+    report_partitions.close()
+    
+    assert results_store.partition_row_id("1") == 1
+    assert results_store.partition_row_id("2") == 2
+    assert os.path.exists(report_partitions.path_for("1"))
+    assert os.path.exists(report_partitions.path_for("2"))
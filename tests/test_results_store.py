@@ -0,0 +1,176 @@
+import os
+import sqlite3
+import threading
+import pytest
+import pandas as pd
+from src.results_store import ResultsStore, ResultsWriter, ResultsWriteError, RESULT_COLUMNS
+
+@pytest.fixture
+def results_store(tmp_path):
+    """Create a ResultsStore instance for testing."""
+    store = ResultsStore(
+        db_path=str(tmp_path / "edit_results.db"),
+        excel_path=str(tmp_path / "edit_results.xlsx")
+    )
+    yield store
+    store.close()
+
+def make_row(edit_id):
+    """Create a result row for testing."""
+    return {
+        "edit_id": edit_id,
+        "timestamp": "2024-01-01 00:00:00",
+        "status": "Success",
+        "file_path": f"C:\\json_files\\{edit_id}.json",
+        "json_input": "{}",
+        "response": "{\"message\": \"Edit is working properly\"}"
+    }
+
+def test_append_rows(results_store):
+    """Test appending rows to the store."""
+    assert results_store.count() == 0
+    assert results_store.last_row_id() == 0
+    
+    results_store.append(make_row("Edit 1"))
+    results_store.append_many([make_row("Edit 2"), make_row("Edit 3")])
+    
+    assert results_store.count() == 3
+    assert results_store.last_row_id() == 3
+
+def test_list_results_by_keyset(results_store):
+    """Test listing summary rows page by page after a row id."""
+    results_store.append_many([make_row(f"example{i}") for i in range(1, 6)])
+    
+    first = results_store.list_results(limit=2)
+    assert [row["report_id"] for row in first] == ["1", "2"]
+    assert first[0]["file_path"] == "C:\\json_files\\example1.json"
+    
+    rest = results_store.list_results(after_id=first[-1]["id"])
+    assert [row["report_id"] for row in rest] == ["3", "4", "5"]
+
+def test_render_empty_store(results_store):
+    """Test that an empty store does not render a workbook."""
+    assert results_store.render_excel() is None
+    assert not os.path.exists(results_store.excel_path)
+
+def test_render_excel(results_store):
+    """Test rendering the stored rows to Excel."""
+    results_store.append_many([make_row("Edit 1"), make_row("Edit 2")])
+    
+    output_file = results_store.render_excel()
+    
+    df = pd.read_excel(output_file, sheet_name="Processed JSON")
+    assert list(df.columns) == RESULT_COLUMNS
+    assert list(df["edit_id"]) == ["Edit 1", "Edit 2"]
+
+def test_existing_workbook_keeps_its_rows(tmp_path):
+    """Test that rows of the shared workbook are imported once and the workbook itself is left alone."""
+    shared_path = tmp_path / "api_responses.xlsx"
+    legacy = pd.DataFrame([{"edit_id": "Edit 0", "timestamp": "2023-12-31 00:00:00", "status": "Success",
+                            "json_input": "{}", "response": "{}"}])
+    legacy.to_excel(shared_path, sheet_name="Processed JSON", index=False)
+    
+    def open_store():
+        return ResultsStore(db_path=str(tmp_path / "edit_results.db"), excel_path=str(tmp_path / "edit_results.xlsx"),
+                            import_excel_path=str(shared_path))
+    
+    store = open_store()
+    store.append(make_row("Edit 1"))
+    output_file = store.render_excel()
+    store.close()
+    
+    assert list(pd.read_excel(output_file, sheet_name="Processed JSON")["edit_id"]) == ["Edit 0", "Edit 1"]
+    assert list(pd.read_excel(shared_path, sheet_name="Processed JSON")["edit_id"]) == ["Edit 0"]
+    
+    # Reopening does not import the rows again
+    store = open_store()
+    assert store.count() == 2
+    store.close()
+
+def test_render_is_cached_until_new_rows(results_store):
+    """Test that the rendered workbook is reused until new rows arrive."""
+    results_store.append(make_row("Edit 1"))
+    results_store.render_excel()
+    mtime = os.path.getmtime(results_store.excel_path)
+    
+    # No new rows, so the file is not rewritten
+    results_store.render_excel()
+    assert os.path.getmtime(results_store.excel_path) == mtime
+    
+    # A new row invalidates the rendered workbook
+    results_store.append(make_row("Edit 2"))
+    results_store.render_excel()
+    df = pd.read_excel(results_store.excel_path, sheet_name="Processed JSON")
+    assert len(df) == 2
+
+def test_writer_flush(results_store):
+    """Test that queued rows are committed by flush."""
+    writer = ResultsWriter(results_store, batch_size=100, flush_interval=60)
+    writer.submit_many([make_row("Edit 1"), make_row("Edit 2")])
+    writer.submit(make_row("Edit 3"))
+    
+    assert writer.flush(timeout=5)
+    assert results_store.count() == 3
+    assert writer.batches_written == 1
+    writer.close()
+
+def test_writer_batches_by_size(results_store):
+    """Test that the writer commits a batch once the batch size is reached."""
+    writer = ResultsWriter(results_store, batch_size=2, flush_interval=60)
+    writer.submit_many([make_row(f"Edit {i}") for i in range(5)])
+    writer.close()
+    
+    assert results_store.count() == 5
+    assert writer.batches_written == 3
+
+def test_writer_concurrent_submit(results_store):
+    """Test that rows submitted from many threads are all written."""
+    writer = ResultsWriter(results_store, batch_size=50, flush_interval=0.05)
+    
+    def submit_rows(thread_index):
+        for i in range(20):
+            writer.submit(make_row(f"Edit {thread_index}_{i}"))
+    
+    threads = [threading.Thread(target=submit_rows, args=(t,)) for t in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    writer.close()
+    assert results_store.count() == 160
+
+def test_writer_rejects_rows_after_close(results_store):
+    """Test that a closed writer does not accept rows."""
+    writer = ResultsWriter(results_store)
+    writer.close()
+    
+    with pytest.raises(RuntimeError):
+        writer.submit(make_row("Edit 1"))
+
+def test_writer_keeps_and_reports_failed_batches(results_store, monkeypatch):
+    """Test that a failed batch is retried instead of dropped, and its error is raised."""
+    append_many = results_store.append_many
+    failures = [sqlite3.OperationalError("database is locked")]
+    
+    def flaky_append_many(rows):
+        if failures:
+            raise failures.pop()
+        return append_many(rows)
+    
+    monkeypatch.setattr(results_store, "append_many", flaky_append_many)
+    writer = ResultsWriter(results_store, batch_size=100, flush_interval=60)
+    writer.submit_many([make_row("Edit 1"), make_row("Edit 2")])
+    
+    with pytest.raises(ResultsWriteError):
+        writer.flush(timeout=5)
+    with pytest.raises(ResultsWriteError):
+        writer.submit(make_row("Edit 3"))
+    assert results_store.count() == 0
+    
+    # The next commit writes the kept rows
+    assert writer.flush(timeout=5)
+    assert results_store.count() == 2
+    writer.submit(make_row("Edit 3"))
+    writer.close()
+    assert results_store.count() == 3
@@ -0,0 +1,144 @@
+import time
+import asyncio
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.retry_policy import (
+    RetryPolicy, ApiStatusError, CircuitOpenError, parse_retry_after, CLOSED, OPEN
+)
+
+class FlakyCall:
+    """Callable failing with the given errors before succeeding."""
+    
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+    
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+def test_failures_are_retried_with_jittered_backoff(monkeypatch):
+    """Test that retries wait a random delay below the doubling ceiling."""
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    policy = RetryPolicy(max_attempts=4, base_delay=1.0)
+    
+    call = FlakyCall(ConnectionError(), ApiStatusError(502, "bad gateway"), ApiStatusError(500, "error"))
+    assert policy.call(call) == "ok"
+    
+    assert call.calls == 4
+    assert len(sleeps) == 3
+    assert all(0 <= delay <= ceiling for delay, ceiling in zip(sleeps, [1, 2, 4]))
+    assert policy.stats['retries'] == 3
+
+def test_client_errors_are_not_retried(monkeypatch):
+    """Test that statuses the API will answer the same way fail at once."""
+    monkeypatch.setattr(time, "sleep", lambda delay: None)
+    policy = RetryPolicy(failure_threshold=1)
+    
+    call = FlakyCall(ApiStatusError(400, "bad request"))
+    with pytest.raises(ApiStatusError):
+        policy.call(call)
+    
+    assert call.calls == 1
+    assert policy.state == CLOSED
+
+def test_retry_after_is_honoured(monkeypatch):
+    """Test that a 429 waits for the Retry-After delay, and gives up if it is too long."""
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    policy = RetryPolicy(base_delay=0.5, max_retry_after=60)
+    
+    assert policy.call(FlakyCall(ApiStatusError(429, "slow down", retry_after=7))) == "ok"
+    assert 7 <= sleeps[0] <= 7.5
+    
+    call = FlakyCall(ApiStatusError(503, "maintenance", retry_after=3600))
+    with pytest.raises(ApiStatusError):
+        policy.call(call)
+    assert call.calls == 1
+
+def test_parse_retry_after():
+    """Test both forms of the Retry-After header."""
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 25 < parse_retry_after(format_datetime(retry_at, usegmt=True)) <= 30
+
+def test_retry_budget_is_shared_by_the_run(monkeypatch):
+    """Test that retries stop once the run-wide budget is spent."""
+    monkeypatch.setattr(time, "sleep", lambda delay: None)
+    policy = RetryPolicy(max_attempts=3, budget_ratio=0, budget_min_retries=2, failure_threshold=100)
+    
+    calls = [FlakyCall(ConnectionError(), ConnectionError()) for _ in range(3)]
+    assert policy.call(calls[0]) == "ok"
+    with pytest.raises(ConnectionError):
+        policy.call(calls[1])
+    
+    assert [call.calls for call in calls[:2]] == [3, 1]
+    assert policy.stats['retries'] == 2
+    assert policy.stats['budget_exhausted'] == 1
+
+def test_circuit_breaker_opens_and_probes(monkeypatch):
+    """Test that the breaker refuses requests while open and closes after a successful probe."""
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    policy = RetryPolicy(max_attempts=1, failure_threshold=2, reset_timeout=30)
+    
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            policy.call(FlakyCall(ConnectionError()))
+    assert policy.state == OPEN
+    
+    # Refused without calling the API
+    call = FlakyCall()
+    with pytest.raises(CircuitOpenError):
+        policy.call(call)
+    assert call.calls == 0
+    
+    # A failed probe opens the breaker again
+    now[0] += 31
+    with pytest.raises(ConnectionError):
+        policy.call(FlakyCall(ConnectionError()))
+    assert policy.state == OPEN
+    
+    now[0] += 31
+    assert policy.call(FlakyCall()) == "ok"
+    assert policy.state == CLOSED
+    assert policy.stats['circuit_opened'] == 2
+    assert policy.stats['circuit_rejections'] == 1
+
+def test_half_open_breaker_sends_one_probe():
+    """Test that concurrent requests wait for the probe instead of all being sent."""
+    policy = RetryPolicy(max_attempts=1, base_delay=0.02, failure_threshold=1, reset_timeout=0.05)
+    sent = []
+    
+    async def request(index):
+        sent.append(index)
+        await asyncio.sleep(0.05)
+        return index
+    
+    async def fail():
+        raise ConnectionError()
+    
+    async def run():
+        with pytest.raises(ConnectionError):
+            await policy.call_async(fail)
+        await asyncio.sleep(0.06)
+        # Retry from here on, so the requests refused during the probe are sent afterwards
+        policy.max_attempts = 5
+        return await asyncio.gather(*(policy.call_async(request, i) for i in range(3)), return_exceptions=True)
+    
+    results = asyncio.run(run())
+    
+    # Only the probe went out while the breaker was half-open; the others followed once it closed
+    assert sent[0] == results[0] == 0
+    assert results == [0, 1, 2]
+    assert policy.state == CLOSED
+    assert policy.stats['circuit_rejections'] >= 2
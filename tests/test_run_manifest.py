@@ -0,0 +1,64 @@
+import json
+import os
+
+from run_manifest import RunManifest
+
+def write_input(tmp_path):
+    """Write an input file and a response file for one of its chunks."""
+    input_path = tmp_path / "large.json"
+    input_path.write_text(json.dumps({"data": list(range(6))}))
+    response_path = tmp_path / "response_large_chunk_1.json"
+    response_path.write_text("{}")
+    return str(input_path), str(response_path)
+
+def test_changes_are_journaled_until_compacted(tmp_path):
+    """Test that files, chunks and results are appended to the journal and only compact() writes the manifest."""
+    input_path, response_path = write_input(tmp_path)
+    manifest = RunManifest(str(tmp_path / "manifest.json"))
+    manifest.begin_file(input_path)
+    for offset in (0, 2, 4):
+        manifest.record_chunk(input_path, {'item_offset': offset, 'items_in_chunk': 2, 'response_file': response_path})
+    
+    # One journal line per change, and no manifest yet
+    assert not os.path.exists(manifest.path)
+    with open(manifest.journal_path) as f:
+        assert len(f.readlines()) == 4
+    
+    # A restarted run sees the journaled changes
+    resumed = RunManifest(manifest.path)
+    assert [chunk['item_offset'] for chunk in resumed.completed_chunks(input_path)] == [0, 2, 4]
+    
+    result = {'status': 'chunked', 'failed_chunks': 0, 'merged_file': response_path}
+    resumed.record_file(input_path, result)
+    assert RunManifest(manifest.path).begin_file(input_path) == result
+    
+    resumed.compact()
+    assert not os.path.exists(resumed.journal_path)
+    assert RunManifest(manifest.path).begin_file(input_path) == result
+
+def test_completed_file_with_missing_outputs_is_processed_again(tmp_path):
+    """Test that a completed file is not skipped once one of its response files is gone."""
+    input_path, response_path = write_input(tmp_path)
+    manifest = RunManifest(str(tmp_path / "manifest.json"))
+    manifest.begin_file(input_path)
+    manifest.record_file(input_path, {'status': 'chunked', 'failed_chunks': 0,
+                                      'chunk_results': [{'response_file': response_path}]})
+    
+    os.remove(response_path)
+    
+    assert RunManifest(manifest.path).begin_file(input_path) is None
+
+def test_torn_and_stale_journal_lines_are_skipped(tmp_path):
+    """Test that a line cut short and a chunk of an earlier version of the file are not replayed."""
+    input_path, response_path = write_input(tmp_path)
+    manifest = RunManifest(str(tmp_path / "manifest.json"))
+    manifest.begin_file(input_path)
+    manifest.record_chunk(input_path, {'item_offset': 0, 'items_in_chunk': 2, 'response_file': response_path})
+    stale = {'item_offset': 2, 'items_in_chunk': 2, 'response_file': response_path}
+    with open(manifest.journal_path, 'a') as f:
+        f.write(json.dumps({'file': os.path.abspath(input_path), 'hash': 'earlier', 'chunk': stale}) + '\n')
+        f.write('{"file": "large.json", "hash"')
+    
+    chunks = RunManifest(manifest.path).completed_chunks(input_path)
+    
+    assert [chunk['item_offset'] for chunk in chunks] == [0]
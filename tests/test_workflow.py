@@ -3,6 +3,12 @@ import pytest
 from unittest.mock import MagicMock, patch
 from src.workflow import JsonProcessingWorkflow
 
+def close_api_service(service):
+    """Stop the background threads of a workflow's API service."""
+    service.job_manager.shutdown()
+    service.results_writer.close()
+    service.report_partitions.close()
+
 @pytest.fixture
 def mock_components():
     """Create mock components for the workflow."""
@@ -19,12 +25,14 @@ def mock_components():
     }
 
 @pytest.fixture
-def workflow_with_mocks(mock_components, temp_json_dir, temp_output_file):
+def workflow_with_mocks(mock_components, temp_json_dir, temp_output_file, tmp_path):
     """Create a workflow with mock components."""
     workflow = JsonProcessingWorkflow(
         json_dir=temp_json_dir,
-        output_excel=temp_output_file
+        output_excel=temp_output_file,
+        results_dir=str(tmp_path / "results")
     )
+    close_api_service(workflow.api_service)
     
     # Replace the components with mocks
     workflow.json_reader = mock_components["json_reader"]
@@ -37,12 +45,14 @@ def workflow_with_mocks(mock_components, temp_json_dir, temp_output_file):
     
     return workflow
 
-def test_workflow_initialization(temp_json_dir, temp_output_file):
+def test_workflow_initialization(temp_json_dir, temp_output_file, tmp_path):
     """Test workflow initialization."""
     workflow = JsonProcessingWorkflow(
         json_dir=temp_json_dir,
-        output_excel=temp_output_file
+        output_excel=temp_output_file,
+        results_dir=str(tmp_path / "results")
     )
+    close_api_service(workflow.api_service)
     
     assert workflow.json_dir == temp_json_dir
     assert workflow.output_excel == temp_output_file
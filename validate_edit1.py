@@ -3,6 +3,8 @@ import json
 import shutil
 from datetime import datetime
 
+from src.edit_executor import EditExecutor
+
 # Configuration
 INPUT_FILES = [
     "json1_simple.json",
@@ -13,6 +15,9 @@ INPUT_FILES = [
 ]
 OUTPUT_DIR = "processed_json"
 
+# Worker processes applying the edit; None uses every CPU, 0 edits in this process
+EDIT_WORKERS = None
+
 # Create output directory
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
@@ -48,80 +53,69 @@ def apply_edit_one(json_data):
     
     return transformed_data
 
-def process_files():
-    """Process each input JSON file and save the transformed version"""
+def analyze_changes(transformed_data):
+    """Summarize the fields and nested items added by the transformation"""
+    added_fields = [field for field in ('processed', 'processed_at', 'validation_status', 'validation_id')
+                    if field in transformed_data]
+    
+    # Count nested changes
+    nested_objects_processed = 0
+    nested_arrays_processed = 0
+    
+    for key, value in transformed_data.items():
+        if isinstance(value, dict) and '_processed' in value:
+            nested_objects_processed += 1
+        elif isinstance(value, list) and all(isinstance(item, dict) for item in value):
+            for item in value:
+                if '_processed' in item:
+                    nested_arrays_processed += 1
+    
+    return {
+        'added_fields': added_fields,
+        'nested_objects_processed': nested_objects_processed,
+        'nested_arrays_processed': nested_arrays_processed
+    }
+
+def process_files(workers=EDIT_WORKERS):
+    """Process each input JSON file in worker processes and save the transformed version"""
     results = []
     
     print(f"Processing {len(INPUT_FILES)} JSON files...")
     
-    for filename in INPUT_FILES:
-        print(f"\nProcessing: {filename}")
-        
-        try:
-            # Read the input file
-            with open(filename, 'r') as f:
-                data = json.load(f)
+    # Workers transform, save and analyze each file; only the analysis comes back
+    with EditExecutor(max_workers=workers) as executor:
+        for result in executor.map_files(INPUT_FILES, apply_edit_one, output_dir=OUTPUT_DIR,
+                                         pretty=True, analyze=analyze_changes):
+            filename = result['filename']
+            print(f"\nProcessing: {filename}")
             
-            # Apply Edit 1 transformation
-            transformed_data = apply_edit_one(data)
-            
-            # Save transformed file
-            output_filename = f"processed_{filename}"
-            output_path = os.path.join(OUTPUT_DIR, output_filename)
-            
-            with open(output_path, 'w') as f:
-                json.dump(transformed_data, f, indent=2)
+            if result['status'] == 'error':
+                print(f"✗ Error processing {filename}: {result['error']}")
+                results.append({
+                    'filename': filename,
+                    'status': 'error',
+                    'error': result['error']
+                })
+                continue
             
             # Copy original to output dir for comparison
-            shutil.copy(filename, os.path.join(OUTPUT_DIR, f"original_{filename}"))
+            shutil.copy(result['file_path'], os.path.join(OUTPUT_DIR, f"original_{filename}"))
             
             print(f"✓ Transformation successful")
             print(f"  Original file: {filename}")
-            print(f"  Processed file: {output_path}")
-            
-            # Analyze changes
-            added_fields = []
-            if 'processed' in transformed_data:
-                added_fields.append('processed')
-            if 'processed_at' in transformed_data:
-                added_fields.append('processed_at')
-            if 'validation_status' in transformed_data:
-                added_fields.append('validation_status')
-            if 'validation_id' in transformed_data:
-                added_fields.append('validation_id')
-            
-            # Count nested changes
-            nested_objects_processed = 0
-            nested_arrays_processed = 0
-            
-            for key, value in transformed_data.items():
-                if isinstance(value, dict) and '_processed' in value:
-                    nested_objects_processed += 1
-                elif isinstance(value, list) and all(isinstance(item, dict) for item in value):
-                    for item in value:
-                        if '_processed' in item:
-                            nested_arrays_processed += 1
+            print(f"  Processed file: {result['output_path']}")
             
+            analysis = result['analysis']
             print(f"  Changes made:")
-            print(f"  - Top-level fields added: {', '.join(added_fields)}")
-            print(f"  - Nested objects processed: {nested_objects_processed}")
-            print(f"  - Nested array items processed: {nested_arrays_processed}")
+            print(f"  - Top-level fields added: {', '.join(analysis['added_fields'])}")
+            print(f"  - Nested objects processed: {analysis['nested_objects_processed']}")
+            print(f"  - Nested array items processed: {analysis['nested_arrays_processed']}")
             
             # Store results
             results.append({
                 'filename': filename,
                 'status': 'success',
-                'added_fields': added_fields,
-                'nested_objects_processed': nested_objects_processed,
-                'nested_arrays_processed': nested_arrays_processed
-            })
-            
-        except Exception as e:
-            print(f"✗ Error processing {filename}: {str(e)}")
-            results.append({
-                'filename': filename,
-                'status': 'error',
-                'error': str(e)
+                **analysis
             })
     
     return results